@@ -0,0 +1,290 @@
+"""
+Worker agent: runs flow jobs the HelperGUI's dispatcher (dispatch.py) sends.
+
+Install the helper in the worker's ORFS checkout (next to flow/, like on the
+workstation) and start an agent there; list the agents in the "workers"
+setting of the GUI. A job brings its design, sources and the current state
+of its variant; the agent runs make on it in its own process group, streams
+the output back and returns the variant's objects/results/logs/reports.
+
+The agent runs whatever make and config.mk ask for, so it only listens on
+localhost unless told otherwise; on a shared network give it a --token
+(the GUI's worker_token setting) and only expose it to trusted machines.
+
+Usage:
+    python3 agent.py [--host 127.0.0.1] [--port 7100] [--cores N] [--token SECRET] [--settings PATH]
+"""
+import argparse
+import hmac
+import json
+import os
+import re
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+
+from catalog import subdirectories
+from core import FlowProject, make_args
+from dispatch import (DEFAULT_PORT, MAX_LINE, PROTOCOL, ProtocolError, design_paths, pack, receive, receive_file,
+                      replace, send, send_file, variant_paths)
+from procmon import memory_info
+from settings_store import SettingsStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_BATCH = 200       # lines per output message at most
+OUTPUT_BYTES = MAX_LINE - (16 << 10)  # and encoded bytes, leaving room for the envelope
+LINE_CHARS = MAX_LINE // 16  # longer output lines are cut (a character takes up to 12 bytes as JSON)
+OUTPUT_INTERVAL = 0.2    # seconds output is held back to fill a batch
+KILL_DELAY = 5           # seconds between SIGTERM and SIGKILL of a cancelled job
+VARIABLE_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")  # make variables a job may set; also used as a path
+
+
+class Agent:
+    """
+    Accepts jobs while their cores fit: the cores of all running jobs never
+    exceed the agent's, and jobs on the same design, platform and variant
+    (they share directories) never overlap.
+
+    Parameters:
+        project (FlowProject): The worker's ORFS checkout.
+        cores (int): Cores the agent hands out.
+        token (str): Secret every request must carry ("" accepts all).
+    """
+
+    def __init__(self, project, cores, token=""):
+        self.project = project
+        self.cores = cores
+        self.token = token
+        self.work_dir = project.settings.cache_dir("agent")
+        self.lock = threading.Lock()
+        self.running = {}  # {(platform, design, variant): cores}
+
+    def info(self):
+        available, total = memory_info()
+        with self.lock:
+            used = sum(self.running.values())
+            jobs = len(self.running)
+        return {"type": "info", "protocol": PROTOCOL, "name": socket.gethostname(), "cores": self.cores,
+                "free_cores": self.cores - used, "memory": total, "available": available, "jobs": jobs,
+                "platforms": subdirectories(os.path.join(self.project.flow_dir, "platforms"))}
+
+    def reserve(self, key, cores):
+        """Cores granted to a job (all free ones for 0/None), or a reason it cannot start now"""
+        with self.lock:
+            if key in self.running:
+                return None, f"{key[1]}/{key[0]} [{key[2]}] is already running here"
+            free = self.cores - sum(self.running.values())
+            if free < max(1, cores or 0):
+                return None, f"{free} of {self.cores} cores free"
+            cores = cores or free
+            self.running[key] = cores
+            return cores, None
+
+    def release(self, key):
+        with self.lock:
+            self.running.pop(key, None)
+
+    def handle(self, reader, writer):
+        message = receive(reader)
+        if message.get("protocol") != PROTOCOL:
+            send(writer, {"type": "error", "reason": f"protocol {message.get('protocol')} is not {PROTOCOL}"})
+        elif not hmac.compare_digest(str(message.get("token", "")), self.token):
+            send(writer, {"type": "error", "reason": "wrong token"})
+        elif message["type"] == "info":
+            send(writer, self.info())
+        elif message["type"] == "run":
+            self.run_job(reader, writer, message)
+        else:
+            send(writer, {"type": "error", "reason": f"unknown request {message['type']}"})
+
+    def run_job(self, reader, writer, request):
+        platform, design, variant = request["platform"], request["design"], request.get("variant", "base")
+        if not all(name and os.sep not in name and name not in (".", "..") for name in (platform, design, variant,
+                                                                                          request["nickname"])):
+            send(writer, {"type": "error", "reason": "bad design, platform or variant name"})
+            return
+        if not all(VARIABLE_RE.match(name) for name in request.get("variables") or {}):
+            send(writer, {"type": "error", "reason": "bad make variable name"})
+            return
+        key = (platform, design, variant)
+        cores, reason = self.reserve(key, request.get("cores"))
+        if cores is None:
+            send(writer, {"type": "busy", "reason": reason})
+            return
+        try:
+            send(writer, {"type": "accepted", "cores": cores})
+            with tempfile.TemporaryDirectory(dir=self.work_dir) as tmp:
+                self.run_in(tmp, reader, writer, request, cores)
+        finally:
+            self.release(key)
+
+    def run_in(self, tmp, reader, writer, request, cores):
+        platform, design, variant = request["platform"], request["design"], request.get("variant", "base")
+        flow_dir = self.project.flow_dir
+        variables = dict(request.get("variables") or {})
+        while True:
+            header = receive(reader)
+            if header["type"] == "bundle":
+                break
+            if header["type"] != "input":
+                raise ProtocolError(f"expected input files, got {header['type']}")
+            filename = os.path.basename(header["filename"])
+            if not VARIABLE_RE.match(header["name"]) or filename in ("", ".", ".."):
+                raise ProtocolError(f"bad input file {header['name']!r}: {header['filename']!r}")
+            # a file a make variable names (a sweep variant's SDC_FILE), kept for this job only
+            path = os.path.join(tmp, "inputs", header["name"], filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            receive_file(reader, path)
+            variables[header["name"]] = path
+        bundle = os.path.join(tmp, "bundle.tar.gz")
+        receive_file(reader, bundle)
+        variants = variant_paths(platform, request["nickname"], variant)
+        replace(bundle, flow_dir, design_paths(platform, design) + variants)
+
+        process = None
+        cancelled = threading.Event()
+
+        def stop():
+            cancelled.set()
+            if process is None or process.poll() is not None:
+                return
+            try:
+                os.killpg(process.pid, signal.SIGTERM)  # make and every tool it started
+                try:
+                    process.wait(KILL_DELAY)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        def started(popen):
+            nonlocal process
+            process = popen
+            if cancelled.is_set():
+                stop()
+
+        def listen():
+            # a cancel message, or the dispatcher going away, stops the job
+            try:
+                while receive(reader)["type"] != "cancel":
+                    pass
+            except (OSError, ProtocolError):
+                pass
+            stop()
+
+        # Lines go out in batches, at the latest OUTPUT_INTERVAL after they were printed
+        batch = []
+        batch_bytes = 0
+        batch_lock = threading.Lock()
+        finished = threading.Event()
+
+        def flush():
+            nonlocal batch_bytes
+            with batch_lock:
+                if not batch:
+                    return
+                lines = batch[:]
+                batch.clear()
+                batch_bytes = 0
+                try:
+                    send(writer, {"type": "output", "lines": lines})
+                    return
+                except OSError:
+                    pass
+            stop()  # nobody is listening any more
+
+        def output(line):
+            nonlocal batch_bytes
+            if len(line) > LINE_CHARS:
+                line = f"{line[:LINE_CHARS]} ... ({len(line) - LINE_CHARS} characters cut)"
+            size = len(json.dumps(line)) + 2
+            if batch_bytes + size > OUTPUT_BYTES:
+                flush()  # the message would get too long for the dispatcher
+            with batch_lock:
+                batch.append(line)
+                batch_bytes += size
+                full = len(batch) >= OUTPUT_BATCH
+            if full:
+                flush()
+
+        def flusher():
+            while not finished.wait(OUTPUT_INTERVAL):
+                flush()
+
+        threading.Thread(target=listen, daemon=True).start()
+        threading.Thread(target=flusher, daemon=True).start()
+        args = make_args(platform, design, request.get("step", ""), cores, variant, variables)
+        try:
+            result = self.project.run_make(args, output, started=started, new_session=True)
+        finally:
+            finished.set()
+        flush()
+        send(writer, {"type": "finished", "exit_code": result.exit_code, "duration": result.duration,
+                      "cancelled": cancelled.is_set()})
+        artifacts = os.path.join(tmp, "artifacts.tar.gz")
+        pack(artifacts, flow_dir, variants)
+        send_file(writer, artifacts, {"type": "artifacts"})
+        send(writer, {"type": "done"})
+
+
+class Handler(socketserver.StreamRequestHandler):
+    wbufsize = 64 << 10
+
+    def handle(self):
+        self.request.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        try:
+            self.server.agent.handle(self.rfile, self.wfile)
+        except (OSError, ProtocolError) as e:
+            print(f"{self.client_address[0]}: {e}", file=sys.stderr)
+
+    def finish(self):
+        try:
+            super().finish()
+        except OSError:
+            pass  # the dispatcher is gone; handle() reported why
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, agent):
+        super().__init__(address, Handler)
+        self.agent = agent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="agent.py", description="Worker agent of the OpenROAD HelperGUI")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for all)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="cores jobs may use together")
+    parser.add_argument("--token", help="secret the dispatcher must send (default: worker_token setting)")
+    parser.add_argument("--settings", default=os.path.join(HERE, "settings.json"), help="settings.json to use")
+    args = parser.parse_args(argv)
+
+    settings = SettingsStore(args.settings)
+    project = FlowProject(HERE, settings)
+    if not shutil.which("make"):
+        print("make not found", file=sys.stderr)
+        return 2
+    project.environment()  # capture env.sh once, before the first job
+    token = args.token if args.token is not None else settings.get("worker_token")
+    server = Server((args.host, args.port), Agent(project, args.cores, token))
+    print(f"Agent for {project.flow_dir} listening on {args.host}:{server.server_address[1]} with {args.cores} cores",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+
+from dispatch import ARTIFACT_DIRS, design_nickname
+from manifest import STAGES, stage_index, variable_stage
+from qor import stage_of_file
+
+CACHE_VERSION = 1
+COPY_BLOCK = 1 << 20
+GARBAGE_AGE = 3600  # seconds an unreferenced file is left alone (an entry being stored may still need it)
+# Each tool's --version flag, the variable ORFS finds it by and the first stage that runs it
+TOOLS = {"yosys": ("YOSYS_EXE", "-V", "synth"), "openroad": ("OPENROAD_EXE", "-version", "floorplan"),
+         "klayout": ("KLAYOUT_CMD", "-v", "finish")}
+VERSION_TIMEOUT = 20
+VERSIONS = {}  # {(executable, mtime_ns): version}, asked once per binary
+
+
+def tool_versions(env):
+    """{tool: version} of the flow's tools, as they report it (size and time of the binary if they do not)"""
+    versions = {}
+    for tool, (variable, flag, _) in TOOLS.items():
+        executable = env.get(variable) or shutil.which(tool, path=env.get("PATH"))
+        executable = executable and shutil.which(executable, path=env.get("PATH"))
+        try:
+            st = os.stat(executable) if executable else None
+        except OSError:
+            st = None
+        if st is None:
+            versions[tool] = "missing"
+            continue
+        version = VERSIONS.get((executable, st.st_mtime_ns))
+        if version is None:
+            try:
+                done = subprocess.run([executable, flag], env=env, stdin=subprocess.DEVNULL, capture_output=True,
+                                      text=True, errors="replace", timeout=VERSION_TIMEOUT)
+                lines = (done.stdout + done.stderr).strip().splitlines() if done.returncode == 0 else []
+            except (OSError, subprocess.SubprocessError):
+                lines = []
+            version = VERSIONS[(executable, st.st_mtime_ns)] = lines[0] if lines else f"{st.st_size}:{st.st_mtime_ns}"
+        versions[tool] = version
+    return versions
+
+
+def stage_key(stage, platform, inputs, versions, variables=None):
+    """
+    Key of what a stage produces: the hashes of every input that affects
+    the stage or an earlier one (FlowManifest.current()), the versions of the
+    tools run up to it and the make variables of those stages. The design's
+    own name is not part of it, so a copy of a design finds its original's
+    results.
+    """
+    limit = stage_index(stage)
+    sha = hashlib.sha256(f"{CACHE_VERSION}\0{stage}\0{platform}\0".encode())
+    for name in sorted(inputs):
+        input_stage, digest = inputs[name]
+        if stage_index(input_stage) <= limit:
+            sha.update(f"input\0{name}\0{digest}\0".encode())
+    for tool, version in sorted(versions.items()):
+        if stage_index(TOOLS[tool][2]) <= limit:
+            sha.update(f"tool\0{tool}\0{version}\0".encode())
+    for name, value in sorted((variables or {}).items()):
+        if stage_index(variable_stage(name)) <= limit:
+            sha.update(f"variable\0{name}\0{value}\0".encode())
+    return sha.hexdigest()
+
+
+def variant_dirs(flow_dir, platform, nickname, variant):
+    return {kind: os.path.join(flow_dir, kind, platform, nickname, variant) for kind in ARTIFACT_DIRS}
+
+
+def stage_files(flow_dir, platform, nickname, variant="base"):
+    """
+    {stage: [(kind/relative path, path, stat)]} of the objects, results,
+    logs and reports of a variant. A file named after its stage (1_synth.v,
+    5_2_route.log, synth_stat.txt) belongs to that stage; any other one
+    (route.guide, the merged libraries under objects) to the first stage
+    that was already done when it was last written.
+    """
+    found = {stage: [] for stage in STAGES}
+    unnamed = []
+    done = {}  # {stage: mtime of its newest named file}
+    for kind, root in variant_dirs(flow_dir, platform, nickname, variant).items():
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                member = os.path.join(kind, os.path.relpath(path, root))
+                stage = stage_of_file(name)
+                if stage is None:
+                    unnamed.append((member, path, st))
+                    continue
+                found[stage].append((member, path, st))
+                done[stage] = max(done.get(stage, 0), st.st_mtime_ns)
+    finished = [stage for stage in STAGES if stage in done]
+    for member, path, st in unnamed:
+        stage = next((stage for stage in finished if done[stage] >= st.st_mtime_ns), finished[-1] if finished else STAGES[0])
+        found[stage].append((member, path, st))
+    return found
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of what ORFS stages produce, shared by designs,
+    variants and users, like ccache for the flow.
+
+    An entry holds the files one stage wrote into a variant's objects,
+    results, logs and reports directories, stored under the stage's key
+    (stage_key()). Their contents are kept once each, under their sha256,
+    however many entries hold them. The directory may be shared over NFS:
+    everything is written under a temporary name and renamed into place,
+    an entry only after its files, and an entry whose files are gone or
+    damaged counts as a miss.
+
+    Restoring an entry marks it used; prune() removes the least recently
+    used entries once the stored files take more than max_bytes, and then
+    the files no entry needs any more.
+
+    Parameters:
+        root (str): The cache directory.
+        max_bytes (int): Space the stored files may take.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(root, "entries")
+        self.files_dir = os.path.join(root, "files")
+
+    def entry_path(self, key):
+        return os.path.join(self.entries_dir, key[:2], f"{key}.json")
+
+    def file_path(self, digest):
+        return os.path.join(self.files_dir, digest[:2], digest)
+
+    def lookup(self, key):
+        try:
+            with open(self.entry_path(key), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def drop(self, key):
+        try:
+            os.remove(self.entry_path(key))
+        except OSError:
+            pass
+
+    def restore(self, key, flow_dir, platform, design, variant="base"):
+        """
+        Put the files of a stage's entry into the variant's directories. The
+        files of that stage and the later ones are removed first, and the
+        restored files get the current time (in the order they were written),
+        so make takes them as newer than the design's inputs.
+
+        Returns:
+            list: The restored files (relative to their variant directory), or
+                None on a miss; a damaged entry is dropped.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        files = entry["files"]
+        if any(not os.path.isfile(self.file_path(item["sha256"])) for item in files):
+            self.drop(key)  # pruned underneath by another user
+            return None
+        nickname = design_nickname(flow_dir, platform, design)
+        dirs = variant_dirs(flow_dir, platform, nickname, variant)
+        stale = STAGES[stage_index(entry["stage"]):]
+        for stage, members in stage_files(flow_dir, platform, nickname, variant).items():
+            if stage in stale:
+                for _, path, _ in members:
+                    os.remove(path)
+        now = time.time_ns()
+        for number, item in enumerate(files):
+            kind, _, relative = item["path"].partition(os.sep)
+            path = os.path.normpath(os.path.join(dirs.get(kind, ""), relative))
+            if kind not in dirs or not path.startswith(dirs[kind] + os.sep):
+                self.drop(key)
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not self.copy(self.file_path(item["sha256"]), path, item["sha256"]):
+                self.drop(key)
+                return None
+            os.chmod(path, item["mode"])
+            os.utime(path, ns=(now + number * 1000, now + number * 1000))
+        os.utime(self.entry_path(key))  # recently used
+        return [item["path"] for item in files]
+
+    def copy(self, source, path, digest):
+        """Copy a stored file out, checking its hash on the way; a damaged one is deleted"""
+        sha = hashlib.sha256()
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(source, "rb") as reader, open(tmp, "wb") as writer:
+            for block in iter(lambda: reader.read(COPY_BLOCK), b""):
+                sha.update(block)
+                writer.write(block)
+        if sha.hexdigest() != digest:
+            os.remove(tmp)
+            os.remove(source)
+            return False
+        os.replace(tmp, path)
+        return True
+
+    def store(self, key, stage, flow_dir, platform, design, variant="base"):
+        """
+        Store the files a stage of the variant wrote under the stage's key.
+
+        Returns:
+            int: Bytes of the stage's files, 0 if it wrote none.
+        """
+        nickname = design_nickname(flow_dir, platform, design)
+        members = sorted(stage_files(flow_dir, platform, nickname, variant)[stage], key=lambda member: member[2].st_mtime_ns)
+        if not members:
+            return 0
+        files = []
+        for member, path, st in members:
+            sha = hashlib.sha256()
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(COPY_BLOCK), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            stored = self.file_path(digest)
+            try:
+                kept = os.path.getsize(stored) == st.st_size
+            except OSError:
+                kept = False
+            if not kept:  # not stored yet, or damaged
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                tmp = f"{stored}.tmp{os.getpid()}"
+                shutil.copyfile(path, tmp)
+                os.replace(tmp, stored)
+            files.append({"path": member, "sha256": digest, "size": st.st_size, "mode": st.st_mode & 0o777})
+        entry = {"stage": stage, "platform": platform, "design": design, "created": time.time(), "files": files}
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp, path)
+        return sum(item["size"] for item in files)
+
+    def scan(self):
+        """([(last used, key, entry)] oldest first, {sha256: (size, mtime)} of the stored files)"""
+        entries = []
+        for path in self.listing(self.entries_dir):
+            if not path.endswith(".json"):
+                continue
+            try:
+                used = os.stat(path).st_mtime
+                with open(path, "r") as file:
+                    entries.append((used, os.path.basename(path)[:-len(".json")], json.load(file)))
+            except (OSError, ValueError):
+                continue
+        stored = {}
+        for path in self.listing(self.files_dir):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stored[os.path.basename(path)] = (st.st_size, st.st_mtime)
+        entries.sort(key=lambda entry: entry[0])
+        return entries, stored
+
+    def listing(self, directory):
+        try:
+            shards = [entry.path for entry in os.scandir(directory) if entry.is_dir()]
+        except OSError:
+            return []
+        paths = []
+        for shard in shards:
+            try:
+                paths += [entry.path for entry in os.scandir(shard) if entry.is_file()]
+            except OSError:
+                continue
+        return paths
+
+    def stats(self):
+        """{"entries": count, "bytes": size of the stored files, "stages": {stage: entries}}"""
+        entries, stored = self.scan()
+        stages = {}
+        for _, _, entry in entries:
+            stages[entry.get("stage")] = stages.get(entry.get("stage"), 0) + 1
+        return {"entries": len(entries), "bytes": sum(size for size, _ in stored.values()), "stages": stages}
+
+    def prune(self):
+        """
+        Remove the least recently used entries while the stored files take
+        more than max_bytes, then the files no entry refers to. Skipped while
+        another process prunes. Returns the number of entries removed.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "prune.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0
+            entries, stored = self.scan()
+            references = {}
+            for _, _, entry in entries:
+                for item in entry["files"]:
+                    references[item["sha256"]] = references.get(item["sha256"], 0) + 1
+            total = sum(size for digest, (size, _) in stored.items() if digest in references)
+            removed = 0
+            for _, key, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                self.drop(key)
+                removed += 1
+                for item in entry["files"]:
+                    references[item["sha256"]] -= 1
+                    if not references[item["sha256"]] and item["sha256"] in stored:
+                        total -= stored[item["sha256"]][0]
+            old = time.time() - GARBAGE_AGE
+            for digest, (_, mtime) in stored.items():
+                if not references.get(digest) and mtime < old:
+                    try:
+                        os.remove(self.file_path(digest))
+                    except OSError:
+                        pass
+            return removed
@@ -0,0 +1,118 @@
+"""
+Startup benchmark for the HelperGUI.
+
+Launches the app in fresh interpreters (headless, QT_QPA_PLATFORM=offscreen by
+default) and reports, per run and as min/median/max:
+
+    import      time to import main.py (PyQt6 and the app modules)
+    paint       time from interpreter start until the main window's first paint
+    shell       time from interpreter start until the persistent shell shows its first prompt
+
+Usage:
+    python3 bench_startup.py [--runs N] [--timeout SECONDS] [--json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def child(timeout):
+    start = time.perf_counter()
+    sys.path.insert(0, HERE)
+    os.chdir(HERE)
+
+    import main
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
+    from settings_store import SettingsStore
+
+    result = {"import": time.perf_counter() - start, "paint": None, "shell": None}
+
+    app = QApplication(sys.argv[:1])
+    settings = SettingsStore(main.filepath + "settings.json")
+    settings.listeners.clear()  # never write settings.json from a benchmark
+    settings.save = lambda: False
+    # A cache of its own, so the benchmark neither picks up this user's jobs nor adds to the log store;
+    # the indexes startup reads (design catalog, flow environment) are copied to keep them warm
+    cache = tempfile.mkdtemp(prefix="bench_startup-")
+    with os.scandir(settings.cache_dir()) as entries:
+        for entry in entries:
+            if entry.is_file():
+                shutil.copy2(entry.path, cache)
+    settings.data["cache_dir"] = cache
+
+    def painted():
+        result["paint"] = time.perf_counter() - start
+
+    def shell_ready():
+        result["shell"] = time.perf_counter() - start
+        app.quit()
+
+    window = main.SimpleMainWindow(settings, settings.get("themes")[0]["data"])
+    window.first_painted.connect(painted)
+    window.shell_ready.connect(shell_ready)
+    window.show()
+    QTimer.singleShot(int(timeout * 1000), app.quit)
+    app.exec()
+    window.process.kill()
+    window.process.waitForFinished(1000)
+    window.log_store.close_all()
+    shutil.rmtree(cache, ignore_errors=True)
+    print(json.dumps(result))
+
+
+def run_once(timeout):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout)],
+                          env=env, capture_output=True, text=True, timeout=timeout + 30)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"benchmark child failed:\n{proc.stderr}")
+
+
+def summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure HelperGUI startup times")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=20.0, help="seconds to wait for the shell prompt")
+    parser.add_argument("--json", action="store_true", help="print machine readable results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.timeout)
+        return
+
+    runs = [run_once(args.timeout) for _ in range(args.runs)]
+    report = {key: summary([run[key] for run in runs]) for key in ("import", "paint", "shell")}
+
+    if args.json:
+        print(json.dumps({"runs": runs, "summary": report}, indent=4))
+        return
+
+    print(f"{'':8}{'min':>10}{'median':>10}{'max':>10}   ({args.runs} runs)")
+    for key, stats in report.items():
+        if stats is None:
+            print(f"{key:8}{'n/a':>10}")
+        else:
+            print(f"{key:8}" + "".join(f"{stats[k] * 1000:>8.1f}ms" for k in ("min", "median", "max")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+
+from makevars import EVALUATION_ERRORS, MakeEvaluator
+
+CLOCK_PERIOD_RE = re.compile(r"set\s+clk_period\s+([\d.]+)|-period\s+([\d.]+)")
+
+FINAL_RESULTS = ("6_final.gds", "6_final.odb", "6_final.def")
+
+
+def signature(path):
+    """[mtime_ns, size] of a path, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def subdirectories(path):
+    try:
+        return sorted(entry.name for entry in os.scandir(path) if entry.is_dir() and not entry.name.startswith("."))
+    except OSError:
+        return []
+
+
+def parse_config(path, cwd):
+    """
+    {variable: effective value} of a config.mk on its own (no environment,
+    no platform config); empty if the file cannot be evaluated.
+    """
+    evaluator = MakeEvaluator(cwd)
+    try:
+        evaluator.include(path)
+        return evaluator.effective()
+    except EVALUATION_ERRORS:
+        return {}
+
+
+def parse_clock_period(path):
+    try:
+        with open(path, "r", errors="replace") as file:
+            match = CLOCK_PERIOD_RE.search(file.read())
+    except OSError:
+        return None
+    if not match:
+        return None
+    return float(match.group(1) or match.group(2))
+
+
+class DesignCatalog:
+    """
+    Index of the platforms and designs of an ORFS flow directory.
+
+    Every design under flow/designs/<platform>/<design> is recorded with
+    DESIGN_NAME, DESIGN_NICKNAME, CORE_UTILIZATION (from config.mk), the clock
+    period (from constraint.sdc) and whether results exist under
+    flow/results/<platform>/<nickname>/base ("none", "partial" or "final").
+
+    The index is persisted; a design's metadata is only re-parsed when the
+    signature (mtime, size) of its config.mk, constraint.sdc or results
+    directory changed, so refresh() is a few stat() calls per design. The GUI
+    calls refresh_platform()/refresh_design() for the paths a file watcher
+    reports instead of rescanning everything.
+
+    Parameters:
+        flow_dir (str): The ORFS flow directory.
+        cache_dir (str): Directory for the persisted index.
+    """
+
+    def __init__(self, flow_dir, cache_dir):
+        self.flow_dir = os.path.abspath(flow_dir)
+        self.designs_dir = os.path.join(self.flow_dir, "designs")
+        self.platforms_dir = os.path.join(self.flow_dir, "platforms")
+        self.results_dir = os.path.join(self.flow_dir, "results")
+        key = hashlib.sha256(self.flow_dir.encode()).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"catalog-{key}.json")
+        self.platforms = {}  # {platform: {"installed": bool}}
+        self.designs = {}    # {platform: {design: entry}}
+        self.dirty = False
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            self.platforms = data["platforms"]
+            self.designs = data["designs"]
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({"flow_dir": self.flow_dir, "platforms": self.platforms, "designs": self.designs}, file)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def design_platforms(self):
+        """Platforms with a designs directory (what the PDK dropdown offers)"""
+        return sorted(self.designs)
+
+    def design_dir(self, platform, design):
+        return os.path.join(self.designs_dir, platform, design)
+
+    def results_path(self, platform, nickname):
+        return os.path.join(self.results_dir, platform, nickname, "base")
+
+    def refresh(self):
+        """Bring the whole index up to date. Returns the set of platforms that changed."""
+        changed = set()
+        platforms = {name: {"installed": os.path.isfile(os.path.join(self.platforms_dir, name, "config.mk"))}
+                     for name in subdirectories(self.platforms_dir)}
+        if platforms != self.platforms:
+            self.platforms = platforms
+            self.dirty = True
+        names = [name for name in subdirectories(self.designs_dir) if name != "src"]
+        for platform in set(self.designs) - set(names):
+            del self.designs[platform]
+            changed.add(platform)
+            self.dirty = True
+        for platform in names:
+            if self.refresh_platform(platform):
+                changed.add(platform)
+        return changed
+
+    def refresh_platform(self, platform):
+        """Pick up added/removed designs of one platform and refresh each. Returns True on change."""
+        if platform == "src":
+            return False
+        path = os.path.join(self.designs_dir, platform)
+        if not os.path.isdir(path):
+            if platform in self.designs:
+                del self.designs[platform]
+                self.dirty = True
+                return True
+            return False
+        designs = self.designs.setdefault(platform, {})
+        names = subdirectories(path)
+        changed = False
+        for design in set(designs) - set(names):
+            del designs[design]
+            changed = True
+        for design in names:
+            changed = self.refresh_design(platform, design) or changed
+        self.dirty = self.dirty or changed
+        return changed
+
+    def refresh_design(self, platform, design):
+        """Re-read one design if its files changed. Returns True on change."""
+        design_dir = self.design_dir(platform, design)
+        designs = self.designs.setdefault(platform, {})
+        if not os.path.isdir(design_dir):
+            if design in designs:
+                del designs[design]
+                self.dirty = True
+                return True
+            return False
+
+        entry = designs.get(design)
+        config = os.path.join(design_dir, "config.mk")
+        sdc = os.path.join(design_dir, "constraint.sdc")
+        nickname = entry["nickname"] if entry else design
+        files = [signature(config), signature(sdc)]
+        results = signature(self.results_path(platform, nickname))
+        if entry and entry["files"] == files and entry["results_sig"] == results:
+            return False
+
+        if not entry or entry["files"] != files:
+            values = parse_config(config, self.flow_dir)
+            name = values.get("DESIGN_NAME", design)
+            nickname = values.get("DESIGN_NICKNAME", name)
+            utilization = values.get("CORE_UTILIZATION")
+            try:
+                utilization = float(utilization) if utilization else None
+            except ValueError:
+                pass  # left as the expression config.mk has
+            entry = {"design_name": name, "nickname": nickname, "core_utilization": utilization,
+                     "clock_period": parse_clock_period(sdc), "files": files}
+            results = signature(self.results_path(platform, nickname))
+        entry["results_sig"] = results
+        entry["results"] = self.results_state(platform, entry["nickname"])
+        designs[design] = entry
+        self.dirty = True
+        return True
+
+    def results_state(self, platform, nickname):
+        path = self.results_path(platform, nickname)
+        try:
+            names = os.listdir(path)
+        except OSError:
+            return "none"
+        if any(name in names for name in FINAL_RESULTS):
+            return "final"
+        return "partial" if names else "none"
+
+    def filter(self, platform, text=""):
+        """[(design, entry)] of a platform whose name, DESIGN_NAME or nickname contain text"""
+        text = text.lower()
+        return [(design, entry) for design, entry in sorted(self.designs.get(platform, {}).items())
+                if not text or text in design.lower() or text in str(entry["design_name"]).lower()
+                or text in str(entry["nickname"]).lower()]
+
+    def watch_paths(self):
+        """Directories and files whose changes a watcher should report"""
+        paths = [self.designs_dir, self.platforms_dir, self.results_dir]
+        for platform, designs in self.designs.items():
+            paths.append(os.path.join(self.designs_dir, platform))
+            paths.append(os.path.join(self.results_dir, platform))
+            for design, entry in designs.items():
+                design_dir = self.design_dir(platform, design)
+                paths += [design_dir, os.path.join(design_dir, "config.mk"), os.path.join(design_dir, "constraint.sdc"),
+                          os.path.join(self.results_dir, platform, entry["nickname"]),
+                          self.results_path(platform, entry["nickname"])]
+        return [path for path in paths if os.path.exists(path)]
+
+    def locate(self, path):
+        """(platform, design) a changed path belongs to; either may be None"""
+        path = os.path.abspath(path)
+        for root in (self.designs_dir, self.results_dir):
+            if path == root or path.startswith(root + os.sep):
+                parts = os.path.relpath(path, root).split(os.sep)
+                if parts == ["."]:
+                    return None, None
+                platform = parts[0]
+                if len(parts) < 2:
+                    return platform, None
+                if root == self.designs_dir:
+                    return platform, parts[1]
+                # results are keyed by nickname
+                for design, entry in self.designs.get(platform, {}).items():
+                    if entry["nickname"] == parts[1]:
+                        return platform, design
+                return platform, None
+        return None, None
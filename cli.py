@@ -0,0 +1,234 @@
+"""
+Command line interface of the HelperGUI, for scripts and headless build machines.
+
+Runs the same operations as the GUI's buttons (core.FlowProject) without
+loading Qt. Every command prints a summary, or a JSON object with --json
+(make output then goes to stderr so stdout stays parseable); the exit status
+is 0 on success, 1 when a build failed and 2 for unusable arguments.
+
+Usage:
+    python3 cli.py [--json] [--settings PATH] COMMAND ...
+    python3 main.py --batch [--json] COMMAND ...
+
+Commands:
+    designs [--platform P]                      list platforms and designs
+    import SOURCE --platform P [--design D]     import a design folder
+    reset-config --platform P --design D        config.mk from the gcd template
+    reset-constraint --platform P --design D    constraint.sdc from the gcd template
+    set-makefile --platform P --design D        point flow/Makefile at a design
+    run [STEP] --platform P --design D [--full] [--cores N]
+                                                build up to STEP (default: the whole flow),
+                                                from the first stage whose inputs changed
+    clean [STAGE] --platform P --design D       make clean_STAGE (default: all)
+    cache [--prune]                             size of the stage artifact cache, pruned to
+                                                artifact_cache_max_gb with --prune
+    storage [--by LEVEL] [--top N] [--rescan] [--prune [--apply]]
+                                                disk usage of the flow outputs per platform,
+                                                design, run, stage or kind; --prune previews
+                                                the retention settings, --apply carries them out
+"""
+import argparse
+import json
+import os
+import sys
+
+from core import CoreError, FlowProject
+from settings_store import SettingsStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def design_arguments(parser, required=True):
+    parser.add_argument("--platform", "-p", required=required, help="platform (PDK), e.g. nangate45")
+    parser.add_argument("--design", "-d", required=required, help="design name under flow/designs/<platform>")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="OpenROAD HelperGUI without the GUI")
+    parser.add_argument("--json", action="store_true", help="print a JSON object instead of text")
+    parser.add_argument("--settings", default=os.path.join(HERE, "settings.json"), help="settings.json to use")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    designs = commands.add_parser("designs", help="list platforms and designs")
+    designs.add_argument("--platform", "-p")
+
+    imported = commands.add_parser("import", help="import a design folder")
+    imported.add_argument("source")
+    design_arguments(imported, required=False)
+    imported.set_defaults(platform=None)
+
+    for name in ("reset-config", "reset-constraint", "set-makefile"):
+        design_arguments(commands.add_parser(name))
+
+    run = commands.add_parser("run", help="run make for a design")
+    run.add_argument("step", nargs="?", default="")
+    design_arguments(run)
+    run.add_argument("--full", action="store_true", help="run make as asked, without the incremental check")
+    run.add_argument("--cores", type=int, help="NUM_CORES")
+
+    clean = commands.add_parser("clean", help="make clean_<stage>")
+    clean.add_argument("stage", nargs="?", default="all")
+    design_arguments(clean)
+
+    cache = commands.add_parser("cache", help="show (or prune) the stage artifact cache")
+    cache.add_argument("--prune", action="store_true", help="evict least recently used entries over the limit")
+
+    storage = commands.add_parser("storage", help="disk usage of the flow outputs and retention")
+    storage.add_argument("--by", default="design", help="what to sum the usage by: platform, design, run, stage or kind")
+    storage.add_argument("--top", type=int, default=10, help="largest entries and files shown")
+    storage.add_argument("--rescan", action="store_true", help="walk every file instead of using the size index")
+    storage.add_argument("--prune", action="store_true", help="show what the retention settings would remove")
+    storage.add_argument("--apply", action="store_true", help="with --prune: remove it")
+    return parser
+
+
+def step_dict(result):
+    data = result.to_dict()
+    data["output"] = data["output"][-20:]  # the tail says why it failed; the full log is on disk
+    return data
+
+
+def designs(project, args):
+    from catalog import DesignCatalog  # only this command needs the config.mk evaluator
+
+    catalog = DesignCatalog(project.flow_dir, project.settings.cache_dir())
+    catalog.load()
+    catalog.refresh()
+    catalog.save()
+    platforms = [args.platform] if args.platform else catalog.design_platforms()
+    listing = {platform: {design: {key: entry[key] for key in ("design_name", "nickname", "core_utilization",
+                                                                "clock_period", "results")}
+                          for design, entry in catalog.filter(platform)} for platform in platforms}
+    text = []
+    for platform, entries in listing.items():
+        text.append(f"{platform}:")
+        text += [f"  {design:24} {entry['results']:8} util {entry['core_utilization']}  clock {entry['clock_period']}"
+                 for design, entry in entries.items()]
+    return True, {"platforms": listing}, "\n".join(text)
+
+
+def import_design(project, args):
+    if not args.platform:
+        raise CoreError("--platform is required")
+    result = project.import_design(args.source, args.platform, args.design)
+    data = result.to_dict()
+    bundle = result.bundle
+    text = [f"Synced {result.src_dir}: {result.stats}", f"Bundled {bundle} into '{bundle.path}'."]
+    if not bundle.top_found:
+        text.append("Top module not found, bundled every module")
+    text += [f"warning: {warning}" for warning in result.warnings]
+    return True, data, "\n".join(text)
+
+
+def run_make(project, args, step, incremental):
+    # with --json, stdout carries only the result object
+    stream = sys.stderr if args.json else sys.stdout
+    summary = project.run_step(args.platform, args.design, step, incremental=incremental,
+                               output=lambda line: print(line, file=stream, flush=True), cores=getattr(args, "cores", None))
+    results = summary["results"]
+    ok = all(result.ok for result in results)
+    data = dict(summary, ok=ok, results=[step_dict(result) for result in results])
+    if incremental and summary["start"] is None and not results:
+        text = f"{args.design}/{args.platform} {step or 'finish'} is up to date, nothing to run"
+    else:
+        text = "\n".join(result.summary() for result in results)
+        if summary["cached"]:
+            text = f"Restored {', '.join(summary['cached'])} from the artifact cache\n" + text
+        if summary["skipped"]:
+            text = f"Skipped {', '.join(summary['skipped'])}\n" + text
+        if summary["stored"]:
+            text += f"\nStored {', '.join(summary['stored'])} in the artifact cache"
+    return ok, data, text.strip()
+
+
+def artifact_cache(project, args):
+    cache = project.artifact_cache()
+    if cache is None:
+        raise CoreError("artifact_cache_dir is not set")
+    removed = cache.prune() if args.prune else 0
+    data = dict(cache.stats(), root=cache.root, max_bytes=cache.max_bytes, removed=removed)
+    text = [f"{cache.root}: {data['entries']} entries, {data['bytes'] / (1 << 30):.2f} of "
+            f"{cache.max_bytes / (1 << 30):.2f} GB"]
+    text += [f"  {stage:10} {count}" for stage, count in data["stages"].items()]
+    if args.prune:
+        text.append(f"Removed {removed} entries")
+    return True, data, "\n".join(text)
+
+
+def storage(project, args):
+    # only this command needs the size index and the process helpers; --help and the others start faster without
+    from procmon import format_bytes
+    from storage import LEVELS
+
+    if args.by not in LEVELS:
+        raise CoreError(f"--by must be one of {', '.join(LEVELS)}")
+    if args.apply and not args.prune:
+        raise CoreError("--apply needs --prune")
+    usage = project.storage_usage(args.rescan)
+    totals = usage.totals(args.by)
+    data = {"total": usage.total, "by": args.by, "totals": totals[:args.top], "largest": usage.largest(args.top)}
+    text = [f"Flow outputs: {format_bytes(usage.total)}", f"Largest by {args.by}:"]
+    text += [f"  {format_bytes(size):>10}  {name}" for name, size in totals[:args.top]]
+    text += ["Largest files:"] + [f"  {format_bytes(size):>10}  {path}" for path, size in data["largest"]]
+    if args.prune:
+        actions = project.storage_plan(usage)
+        planned = sum(action["bytes"] for action in actions)
+        data["actions"] = [{key: value for key, value in action.items() if key != "paths"} for action in actions]
+        text.append(f"Retention{'' if args.apply else ' (dry run)'}: {len(actions)} actions, {format_bytes(planned)}")
+        text += [f"  {action['action']:8} {format_bytes(action['bytes']):>10}  {action['run']}: {action['reason']}"
+                 for action in actions]
+        if args.apply:
+            data["freed"], data["errors"] = project.apply_storage(actions)
+            text.append(f"Freed {format_bytes(data['freed'])}")
+            text += [f"error: {error}" for error in data["errors"]]
+            return not data["errors"], data, "\n".join(text)
+    return True, data, "\n".join(text)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        settings = SettingsStore(args.settings)
+    except (OSError, ValueError) as e:
+        print(f"cannot read {args.settings}: {e}", file=sys.stderr)
+        return 2
+    project = FlowProject(HERE, settings)
+
+    try:
+        if args.command == "designs":
+            ok, data, text = designs(project, args)
+        elif args.command == "import":
+            ok, data, text = import_design(project, args)
+        elif args.command == "reset-config":
+            path = project.reset_config(args.platform, args.design)
+            ok, data, text = True, {"path": path}, f"Reset {path}"
+        elif args.command == "reset-constraint":
+            path = project.reset_constraint(args.platform, args.design)
+            ok, data, text = True, {"path": path}, f"Reset {path}"
+        elif args.command == "set-makefile":
+            changed = project.set_makefile(args.platform, args.design)
+            ok, data, text = True, {"changed": changed}, "Makefile updated" if changed else "Makefile already up to date"
+        elif args.command == "run":
+            ok, data, text = run_make(project, args, args.step, not args.full)
+        elif args.command == "cache":
+            ok, data, text = artifact_cache(project, args)
+        elif args.command == "storage":
+            ok, data, text = storage(project, args)
+        else:  # clean
+            ok, data, text = run_make(project, args, f"clean_{args.stage}", False)
+    except (CoreError, OSError, ValueError) as e:
+        if args.json:
+            print(json.dumps({"command": args.command, "ok": False, "error": str(e)}))
+        else:
+            print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(dict(data, command=args.command, ok=ok), indent=4))
+    elif text:
+        print(text)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+import os
+import re
+import shutil
+import subprocess
+
+from flowenv import FlowEnvironment
+from importer import DesignImporter
+from logparse import LineFramer
+from makevars import parse_text, set_assignment, update_file
+from manifest import STAGES, FlowManifest
+from runner import StepResult
+
+TEMPLATE_DESIGN = "gcd"  # ORFS design whose config.mk/constraint.sdc new designs start from
+TEMPLATE_RE = re.compile(r"(?<![A-Za-z0-9_])gcd(?![A-Za-z0-9_])")
+
+
+class CoreError(Exception):
+    """An operation cannot be done as asked (no design selected, template missing, ...)"""
+
+
+def make_args(platform, design, step="", cores=None, variant="base", variables=None):
+    """Command line of one make invocation in the flow directory"""
+    args = []
+    if design and platform:
+        args.append(f"DESIGN_CONFIG=./designs/{platform}/{design}/config.mk")
+    if variant != "base":
+        args.append(f"FLOW_VARIANT={variant}")
+    args += [f"{name}={value}" for name, value in (variables or {}).items() if name != "FLOW_VARIANT"]
+    if cores:
+        args.append(f"NUM_CORES={cores}")
+    if step:
+        args.append(step)
+    return args
+
+
+class ImportResult:
+    def __init__(self, stats, bundle, design_dir, src_dir):
+        self.stats = stats
+        self.bundle = bundle
+        self.design_dir = design_dir
+        self.src_dir = src_dir
+        self.warnings = []
+
+    def to_dict(self):
+        bundle = self.bundle
+        return {"design_dir": self.design_dir, "src_dir": self.src_dir, "synced": str(self.stats),
+                "bundle": {"path": bundle.path, "units": bundle.units, "kept": bundle.kept, "files": bundle.files,
+                           "top_found": bundle.top_found, "duplicates": bundle.duplicates,
+                           "unresolved": sorted(set(bundle.unresolved))},
+                "warnings": self.warnings}
+
+
+class FlowProject:
+    """
+    An ORFS checkout as the helper sees it: the app lives in
+    OpenROAD-flow-scripts/OpenROAD_HelperGUI, the flow in
+    OpenROAD-flow-scripts/flow.
+
+    These are the operations behind the GUI's buttons. Nothing here imports
+    Qt, so cli.py runs the same code from scripts and on machines without a
+    display.
+
+    Parameters:
+        app_dir (str): Directory of the helper (holds defaultMakefile.txt).
+        settings (SettingsStore): Settings (import filters, cache directory).
+    """
+
+    def __init__(self, app_dir, settings):
+        self.app_dir = os.path.abspath(app_dir)
+        self.root = os.path.dirname(self.app_dir)
+        self.flow_dir = os.path.join(self.root, "flow")
+        self.settings = settings
+        self.flow_env = FlowEnvironment(os.path.join(self.root, "env.sh"), settings.cache_dir())
+
+    def design_dir(self, platform, design):
+        return os.path.join(self.flow_dir, "designs", platform, design)
+
+    def src_dir(self, design):
+        return os.path.join(self.flow_dir, "designs", "src", design)
+
+    def import_design(self, source, platform, design=None, progress=None):
+        """
+        Sync a design folder into designs/src/<design>, bundle the modules its top
+        needs into <design>.v and start its config.mk/constraint.sdc from the
+        template design.
+
+        Parameters:
+            progress (callable): progress(done, total, rel) while syncing.
+
+        Returns:
+            ImportResult
+        """
+        from verilog_bundle import VerilogBundler  # starts worker processes; only needed here
+
+        source = os.path.abspath(source)
+        if not os.path.isdir(source):
+            raise CoreError(f"{source} is not a directory")
+        design = design or os.path.basename(source.rstrip(os.sep))
+        design_dir, src_dir = self.design_dir(platform, design), self.src_dir(design)
+        os.makedirs(design_dir, exist_ok=True)
+        os.makedirs(src_dir, exist_ok=True)
+
+        settings = self.settings
+        # The flow reads one file, designs/src/<design>/<design>.v, holding what the top module needs. It is
+        # the bundle's, not synced into, and the bundle is made from the source folder so it never reads itself.
+        bundle = f"{design}.v"
+        importer = DesignImporter(source, src_dir, os.path.join(settings.cache_dir("imports"), f"{design}.json"),
+                                  include=settings.get("import_include"), exclude=settings.get("import_exclude"),
+                                  link_mode=settings.get("import_link_mode"), reserved=[bundle])
+        stats = importer.sync(progress)
+        bundler = VerilogBundler(source, importer.files, os.path.join(settings.cache_dir("bundles"), f"{design}.json"))
+        result = ImportResult(stats, bundler.write(os.path.join(src_dir, bundle), design), design_dir, src_dir)
+        for reset in (self.reset_config, self.reset_constraint):
+            try:
+                reset(platform, design)
+            except CoreError as e:
+                result.warnings.append(str(e))
+        return result
+
+    def template(self, platform, name):
+        path = os.path.join(self.design_dir(platform, TEMPLATE_DESIGN), name)
+        if not os.path.exists(path):
+            raise CoreError(f"{TEMPLATE_DESIGN} {name} missing\nUnable to copy reference content")
+        with open(path, "r") as file:
+            return file.read()
+
+    def reset_config(self, platform, design):
+        """config.mk of the template design with its name replaced in variable values only. Returns the path."""
+        if not (platform and design):
+            raise CoreError("SELECT DESIGN AND PDK FIRST")
+        text = self.template(platform, "config.mk")
+        for statement in parse_text(text):
+            if statement[0] == "assign" and TEMPLATE_RE.search(statement[4]):
+                text = set_assignment(text, statement[2], TEMPLATE_RE.sub(design, statement[4]))
+        path = os.path.join(self.design_dir(platform, design), "config.mk")
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def reset_constraint(self, platform, design):
+        """constraint.sdc of the template design with its name replaced. Returns the path."""
+        if not (platform and design):
+            raise CoreError("SELECT DESIGN AND PDK FIRST")
+        text = self.template(platform, "constraint.sdc").replace(TEMPLATE_DESIGN, design)
+        path = os.path.join(self.design_dir(platform, design), "constraint.sdc")
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def set_makefile(self, platform, design):
+        """Point DESIGN_CONFIG of flow/Makefile at a design. Returns True if the file changed."""
+        if not design:
+            raise CoreError("No design has been imported yet.")
+        makefile = os.path.join(self.flow_dir, "Makefile")
+        if not os.path.exists(makefile):
+            shutil.copy(os.path.join(self.app_dir, "defaultMakefile.txt"), makefile)
+        # Only the DESIGN_CONFIG assignment is touched, and the file only written if it changes
+        return update_file(makefile, {"DESIGN_CONFIG": f"./designs/{platform}/{design}/config.mk"})
+
+    def manifest(self, platform, design):
+        return FlowManifest(self.flow_dir, platform, design,
+                            os.path.join(self.settings.cache_dir("manifests"), f"{platform}__{design}.json"))
+
+    def invalidate(self, platform, design, stage):
+        """A clean_<stage> run invalidates that stage and everything after it"""
+        if stage == "all":
+            stage = STAGES[0]
+        if stage not in STAGES:
+            return
+        manifest = self.manifest(platform, design)
+        completed = manifest.saved.get("completed")
+        if completed and STAGES.index(completed) >= STAGES.index(stage):
+            manifest.saved["completed"] = STAGES[STAGES.index(stage) - 1] if stage != STAGES[0] else None
+            manifest.save(manifest.saved["inputs"], manifest.saved["files"], manifest.saved["completed"])
+
+    def environment(self):
+        """os.environ plus the flow environment (env.sh, captured once and cached)"""
+        if not self.flow_env.ready and os.path.exists(self.flow_env.env_sh) and not self.flow_env.load_cached():
+            self.flow_env.capture()
+        return self.flow_env.apply(os.environ) if self.flow_env.ready else dict(os.environ)
+
+    def artifact_cache(self):
+        """The shared stage artifact cache (artifact_cache_dir), or None when it is not set"""
+        root = self.settings.get("artifact_cache_dir")
+        if not root:
+            return None
+        from artifact_cache import ArtifactCache
+        return ArtifactCache(os.path.expanduser(root), int(self.settings.get("artifact_cache_max_gb") * (1 << 30)))
+
+    def restore_stages(self, platform, design, start, target, inputs, output=None):
+        """
+        Take the stages from start to target out of the artifact cache, up to
+        the first one it does not hold.
+
+        Parameters:
+            inputs (dict): Input hashes of the design (FlowManifest.plan()).
+            output (callable): Called with a line per restored stage.
+
+        Returns:
+            tuple: (stage make still has to start from, None if all were
+            restored; the restored stages; {stage: cache key} of the stages
+            make builds, for store_stages() once it succeeded)
+        """
+        cache = self.artifact_cache()
+        if cache is None:
+            return start, [], {}
+        from artifact_cache import stage_key, tool_versions
+        versions = tool_versions(self.environment())
+        stages = STAGES[STAGES.index(start):STAGES.index(target) + 1]
+        keys = {stage: stage_key(stage, platform, inputs, versions) for stage in stages}
+        restored = []
+        for stage in stages:
+            files = cache.restore(keys[stage], self.flow_dir, platform, design)
+            if files is None:
+                return stage, restored, {later: keys[later] for later in stages[stages.index(stage):]}
+            restored.append(stage)
+            if output:
+                output(f"{stage}: {len(files)} files restored from the artifact cache")
+        return None, restored, {}
+
+    def store_stages(self, platform, design, keys):
+        """
+        Put what make built for each stage into the artifact cache, then prune it.
+
+        Returns:
+            list: The stages stored (those that wrote any files).
+        """
+        cache = self.artifact_cache()
+        if cache is None or not keys:
+            return []
+        stored = [stage for stage, key in keys.items() if cache.store(key, stage, self.flow_dir, platform, design)]
+        cache.prune()
+        return stored
+
+    def storage_usage(self, rescan=False):
+        """DiskUsage of the flow outputs, from the cached size index (rescan: walk every file again)"""
+        from storage import DiskUsage, SizeIndex
+        index = SizeIndex(self.flow_dir, os.path.join(self.settings.cache_dir("storage"), "index.json"))
+        return DiskUsage(index.scan(rescan))
+
+    def storage_plan(self, usage, busy=()):
+        """The actions of the retention settings (storage_*) on usage, for a preview"""
+        from storage import plan_cleanup
+        settings = self.settings
+        return plan_cleanup(usage, keep_runs=settings.get("storage_keep_runs"),
+                            final_only=settings.get("storage_final_only"),
+                            compress_days=settings.get("storage_compress_logs_days"),
+                            quota=int(settings.get("storage_quota_gb") * (1 << 30)), busy=busy)
+
+    def apply_storage(self, actions):
+        """
+        Carry a storage_plan() out. Designs whose base results were removed
+        are invalidated, so the next incremental run builds them again.
+
+        Returns:
+            tuple: (bytes freed, [error messages])
+        """
+        from dispatch import design_nickname
+        from storage import apply_cleanup
+        freed, errors = apply_cleanup(self.flow_dir, actions)
+        trimmed = {tuple(action["run"].split("/")[:2]) for action in actions
+                   if action["action"] != "compress" and action["run"].endswith("/base")}
+        for platform in {platform for platform, _ in trimmed}:
+            designs_dir = os.path.join(self.flow_dir, "designs", platform)
+            for design in sorted(os.listdir(designs_dir)) if os.path.isdir(designs_dir) else []:
+                if os.path.isfile(os.path.join(designs_dir, design, "config.mk")) \
+                        and (platform, design_nickname(self.flow_dir, platform, design)) in trimmed:
+                    self.invalidate(platform, design, "all")
+        return freed, errors
+
+    def run_make(self, args, output=None, env=None, started=None, new_session=False):
+        """
+        Run make in the flow directory and wait for it.
+
+        Parameters:
+            output (callable): Called with every output line (stdout and stderr merged).
+            started (callable): Called with the Popen once make is running.
+            new_session (bool): Start make in its own session (process group), so
+                all of its children can be signalled at once.
+
+        Returns:
+            StepResult
+        """
+        result = StepResult(" ".join(["make", *args]), self.flow_dir)
+        result.started()
+        try:
+            process = subprocess.Popen(["make", *args], cwd=self.flow_dir, env=env or self.environment(),
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       start_new_session=new_session)
+        except OSError as e:
+            result.output.append(f"make: {e}")
+            result.finished(127)
+            return result
+        if started:
+            started(process)
+        framer = LineFramer()
+        for chunk in iter(lambda: process.stdout.read1(65536), b""):
+            for line in framer.feed(chunk):
+                result.output.append(line)
+                if output:
+                    output(line)
+        rest = framer.flush()
+        if rest:
+            result.output.append(rest)
+            if output:
+                output(rest)
+        result.finished(process.wait())
+        return result
+
+    def run_step(self, platform, design, step="", incremental=True, output=None, cores=None):
+        """
+        Build a stage (or the whole flow). Incremental runs start from the earliest
+        stage whose inputs changed, cleaning it first so make cannot skip it, and
+        run nothing if the target is up to date.
+
+        Stages the artifact cache holds for the same inputs are restored from
+        it instead of run, and the stages make built are stored in it.
+
+        Returns:
+            dict: start (stage run from, None if up to date), skipped stages,
+            cached (stages restored from the artifact cache), stored (stages
+            put into it) and results (the StepResult of each make run).
+        """
+        summary = {"platform": platform, "design": design, "step": step, "start": None, "skipped": [], "cached": [],
+                   "stored": [], "results": []}
+        env = self.environment()
+        if not incremental or not (platform and design) or step not in STAGES + [""]:
+            result = self.run_make(make_args(platform, design, step, cores), output, env)
+            summary["results"].append(result)
+            if result.ok and step.startswith("clean_") and platform and design:
+                self.invalidate(platform, design, step[len("clean_"):])
+            return summary
+
+        target = step or STAGES[-1]
+        manifest = self.manifest(platform, design)
+        start, inputs, files = manifest.plan(target)
+        if start is None:
+            return summary
+        summary["start"] = start
+        summary["skipped"] = STAGES[:STAGES.index(start)]
+        summary["restored"] = manifest.restore_mtimes(inputs, files, start)
+        first, summary["cached"], keys = self.restore_stages(platform, design, start, target, inputs, output)
+        if first is not None:
+            for args in (make_args(platform, design, f"clean_{first}", cores), make_args(platform, design, step, cores)):
+                result = self.run_make(args, output, env)
+                summary["results"].append(result)
+                if not result.ok:
+                    return summary
+        manifest.save(inputs, files, target)
+        summary["stored"] = self.store_stages(platform, design, keys)
+        return summary
@@ -0,0 +1,350 @@
+import base64
+import json
+import os
+import shutil
+import socket
+import tarfile
+import tempfile
+import threading
+
+from catalog import parse_config
+from core import make_args
+from runner import StepResult
+
+PROTOCOL = 1
+DEFAULT_PORT = 7100
+CHUNK_BYTES = 256 << 10   # file data per message
+MAX_LINE = 2 * CHUNK_BYTES  # longest message accepted (a base64 chunk plus its envelope)
+CONNECT_TIMEOUT = 5.0
+ARTIFACT_DIRS = ("objects", "results", "logs", "reports")  # per-variant flow output, mirrored both ways
+
+
+class ProtocolError(Exception):
+    """The other side sent something that is not a message of this protocol"""
+
+
+class WorkerBusy(Exception):
+    """The worker has no room for the job right now; it can be offered again later"""
+
+
+def send(stream, message):
+    """Write one message (a JSON object on one line) and flush it"""
+    stream.write(json.dumps(message).encode() + b"\n")
+    stream.flush()
+
+
+def receive(stream):
+    """
+    Read one message.
+
+    Raises:
+        ConnectionError: when the connection is closed.
+        ProtocolError: for a malformed or oversized message.
+    """
+    line = stream.readline(MAX_LINE + 1)
+    if not line:
+        raise ConnectionError("connection closed")
+    if not line.endswith(b"\n"):
+        raise ProtocolError("message too long" if len(line) > MAX_LINE else "connection closed mid-message")
+    try:
+        message = json.loads(line)
+    except ValueError:
+        raise ProtocolError(f"not a message: {line[:80]!r}")
+    if not isinstance(message, dict) or "type" not in message:
+        raise ProtocolError(f"not a message: {line[:80]!r}")
+    return message
+
+
+def send_file(stream, path, header):
+    """The header message, the file in chunks and an end message"""
+    send(stream, header)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_BYTES), b""):
+            send(stream, {"type": "chunk", "data": base64.b64encode(chunk).decode()})
+    send(stream, {"type": "end"})
+
+
+def receive_file(stream, path):
+    """Write the chunks up to the end message to path. Returns the number of bytes."""
+    size = 0
+    with open(path, "wb") as file:
+        while True:
+            message = receive(stream)
+            if message["type"] == "end":
+                return size
+            if message["type"] != "chunk":
+                raise ProtocolError(f"expected file data, got {message['type']}")
+            data = base64.b64decode(message["data"])
+            file.write(data)
+            size += len(data)
+
+
+def design_nickname(flow_dir, platform, design):
+    """DESIGN_NICKNAME of a design (its results/logs directory name)"""
+    values = parse_config(os.path.join(flow_dir, "designs", platform, design, "config.mk"), flow_dir)
+    return values.get("DESIGN_NICKNAME") or values.get("DESIGN_NAME") or design
+
+
+def design_paths(platform, design):
+    return [os.path.join("designs", platform, design), os.path.join("designs", "src", design)]
+
+
+def variant_paths(platform, nickname, variant):
+    return [os.path.join(kind, platform, nickname, variant) for kind in ARTIFACT_DIRS]
+
+
+def pack(path, flow_dir, members):
+    """gzip'ed tar of the members (paths relative to flow_dir) that exist; links are followed"""
+    with tarfile.open(path, "w:gz", compresslevel=1, dereference=True) as tar:
+        for member in members:
+            if os.path.exists(os.path.join(flow_dir, member)):
+                tar.add(os.path.join(flow_dir, member), arcname=member)
+
+
+def replace(path, flow_dir, members):
+    """
+    Make the members (paths relative to flow_dir) exactly what the archive
+    holds: they are removed first, so files the other side deleted go too.
+    Archive entries outside the members are refused.
+
+    Raises:
+        ProtocolError: for an entry outside the members.
+    """
+    with tarfile.open(path, "r:gz") as tar:
+        entries = []
+        for entry in tar.getmembers():
+            name = os.path.normpath(entry.name)
+            if os.path.isabs(name) or not any(name == member or name.startswith(member + os.sep) for member in members):
+                raise ProtocolError(f"unexpected path {entry.name} in archive")
+            if entry.isfile() or entry.isdir():  # links never occur in archives made by pack()
+                entries.append(entry)
+        for member in members:
+            shutil.rmtree(os.path.join(flow_dir, member), ignore_errors=True)
+        tar.extractall(flow_dir, members=entries, **({"filter": "data"} if hasattr(tarfile, "data_filter") else {}))
+
+
+class Worker:
+    """
+    A worker agent (agent.py) at "host:port", and what it last reported:
+    cores, memory, platforms and the cores its running jobs hold. Cores and
+    memory handed out by the dispatcher since are kept as reserved until the
+    next report.
+    """
+
+    def __init__(self, address, token=""):
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            host, port = address, DEFAULT_PORT
+        self.address = address
+        self.host = host
+        self.port = int(port)
+        self.token = token
+        self.info = None
+        self.error = None
+        self.reserved_cores = 0
+        self.reserved_memory = 0
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return sock
+
+    def query(self):
+        """Ask for the worker's state. Returns True if it answered."""
+        try:
+            with self.connect() as sock, sock.makefile("rwb") as stream:
+                send(stream, {"type": "info", "protocol": PROTOCOL, "token": self.token})
+                reply = receive(stream)
+            if reply["type"] == "error":
+                raise ProtocolError(reply.get("reason", "refused"))
+            if reply["type"] != "info":
+                raise ProtocolError(f"expected info, got {reply['type']}")
+        except (OSError, ProtocolError) as e:
+            self.info, self.error = None, str(e)
+            return False
+        self.info, self.error = reply, None
+        self.reserved_cores = self.reserved_memory = 0
+        return True
+
+    @property
+    def free_cores(self):
+        return self.info["free_cores"] - self.reserved_cores if self.info else 0
+
+    @property
+    def free_memory(self):
+        return self.info["available"] - self.reserved_memory if self.info else 0
+
+    def describe(self):
+        if not self.info:
+            return f"{self.address}: unreachable ({self.error})"
+        return (f"{self.address} ({self.info['name']}): {self.free_cores}/{self.info['cores']} cores free, "
+                f"{self.free_memory >> 20} MB available, {self.info['jobs']} jobs")
+
+
+class Dispatcher:
+    """
+    Places flow jobs on worker agents.
+
+    A job goes to a worker that has its platform, at least the cores it asks
+    for (one when it takes whatever is free) and memory for it, preferring
+    the most free cores and then the most memory. What is handed out counts
+    against the worker until its next report, so a burst of jobs spreads out
+    instead of piling onto the worker that looked emptiest. The agent has the
+    final word: one that turns out to be full answers busy and the job is
+    placed again later.
+
+    Parameters:
+        addresses (list): "host:port" of the agents.
+        token (str): Shared secret the agents expect.
+    """
+
+    def __init__(self, addresses, token=""):
+        self.workers = [Worker(address, token) for address in addresses]
+
+    def refresh(self):
+        """Query every worker at once. Returns the workers that answered."""
+        threads = [threading.Thread(target=worker.query, daemon=True) for worker in self.workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [worker for worker in self.workers if worker.info]
+
+    def pick(self, platform, cores=0, memory=0):
+        """
+        Reserve room for a job.
+
+        Parameters:
+            cores (int): Cores the job needs, 0 for all free cores of the worker.
+            memory (int): Bytes of memory the job needs.
+
+        Returns:
+            tuple: (Worker, cores granted), or None if no worker fits now.
+        """
+        fits = [worker for worker in self.workers
+                if worker.info and platform in worker.info["platforms"]
+                and worker.free_cores >= max(1, cores) and worker.free_memory >= memory]
+        if not fits:
+            return None
+        worker = max(fits, key=lambda worker: (worker.free_cores, worker.free_memory))
+        granted = cores or worker.free_cores
+        worker.reserved_cores += granted
+        worker.reserved_memory += memory
+        return worker, granted
+
+    def release(self, worker, cores, memory=0):
+        worker.reserved_cores = max(0, worker.reserved_cores - cores)
+        worker.reserved_memory = max(0, worker.reserved_memory - memory)
+
+
+class RemoteRun:
+    """
+    One make run on a worker agent.
+
+    run() uploads the design (designs/<platform>/<design>, its sources and
+    the variant's current objects/results/logs/reports, so the worker
+    continues from the local state), streams the make output back while it
+    runs and then replaces the local variant directories with the worker's.
+    Make variables naming a local file (a sweep variant's SDC_FILE) are sent
+    along and pointed at the worker's copy. cancel() may be called from any
+    thread; the agent then stops the whole make process group.
+
+    Parameters:
+        worker (Worker): Where to run.
+        flow_dir (str): The local ORFS flow directory.
+        work_dir (str): Directory for the archives in transit.
+    """
+
+    def __init__(self, worker, flow_dir, work_dir, platform, design, step="", cores=None, variant="base",
+                 variables=None):
+        self.worker = worker
+        self.flow_dir = flow_dir
+        self.work_dir = work_dir
+        self.platform = platform
+        self.design = design
+        self.step = step
+        self.cores = cores
+        self.variant = variant
+        self.variables = variables or {}
+        args = make_args(platform, design, step, cores, variant, self.variables)
+        self.result = StepResult(" ".join(["make", *args]), f"{worker.address}:flow")
+        self.stream = None
+        self.lock = threading.Lock()  # run() and cancel() both write to the connection
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        # Never waits for an upload in progress: run() checks the flag once it is done
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if self.stream is not None:
+                send(self.stream, {"type": "cancel"})
+        except OSError:
+            pass  # the connection is gone, which stops the job as well
+        finally:
+            self.lock.release()
+
+    def run(self, output=None):
+        """
+        Returns:
+            StepResult: exit code of make on the worker.
+
+        Raises:
+            WorkerBusy: the worker had no room; nothing was run.
+            OSError, ProtocolError: the worker could not be reached or the
+                connection broke.
+        """
+        result = self.result
+        nickname = design_nickname(self.flow_dir, self.platform, self.design)
+        variants = variant_paths(self.platform, nickname, self.variant)
+        files = {name: value for name, value in self.variables.items()
+                 if os.path.isabs(str(value)) and os.path.isfile(value)}
+        os.makedirs(self.work_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as tmp, self.worker.connect() as sock:
+            sock.settimeout(None)  # a stage can be quiet for a long time
+            bundle = os.path.join(tmp, "bundle.tar.gz")
+            pack(bundle, self.flow_dir, design_paths(self.platform, self.design) + variants)
+            stream = sock.makefile("rwb")
+            with self.lock:
+                self.stream = stream
+                send(stream, {"type": "run", "protocol": PROTOCOL, "token": self.worker.token,
+                              "platform": self.platform, "design": self.design, "nickname": nickname,
+                              "step": self.step, "cores": self.cores, "variant": self.variant,
+                              "variables": {name: value for name, value in self.variables.items() if name not in files}})
+                reply = receive(stream)
+                if reply["type"] == "busy":
+                    raise WorkerBusy(reply.get("reason", "busy"))
+                if reply["type"] != "accepted":
+                    raise ProtocolError(reply.get("reason", f"expected accepted, got {reply['type']}"))
+                for name, path in files.items():
+                    send_file(stream, path, {"type": "input", "name": name, "filename": os.path.basename(path)})
+                send_file(stream, bundle, {"type": "bundle"})
+            if self.cancelled:
+                self.cancel()
+
+            result.started()
+            exit_code = None
+            while True:
+                message = receive(stream)
+                kind = message["type"]
+                if kind == "output":
+                    for line in message["lines"]:
+                        result.output.append(line)
+                        if output:
+                            output(line)
+                elif kind == "finished":
+                    exit_code = message["exit_code"]
+                elif kind == "artifacts":
+                    archive = os.path.join(tmp, "artifacts.tar.gz")
+                    receive_file(stream, archive)
+                    replace(archive, self.flow_dir, variants)
+                elif kind == "done":
+                    break
+                elif kind == "error":
+                    raise ProtocolError(message.get("reason", "worker error"))
+            with self.lock:
+                self.stream = None
+            stream.close()
+        result.finished(exit_code if exit_code is not None else -1)
+        return result
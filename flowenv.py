@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+
+# Variables that describe the helper shell itself rather than the flow setup
+IGNORED = {"_", "SHLVL", "PWD", "OLDPWD", "BASH_EXECUTION_STRING"}
+
+SHELL_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Binaries whose identity is part of the cache key
+TOOLS = ("openroad", "yosys", "klayout", "sta")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def tool_fingerprints(path_value):
+    """{tool: [path, size, mtime]} for the tools found on a PATH value"""
+    prints = {}
+    for tool in TOOLS:
+        found = shutil.which(tool, path=path_value)
+        if found:
+            st = os.stat(found)
+            prints[tool] = [found, st.st_size, st.st_mtime]
+    return prints
+
+
+class FlowEnvironment:
+    """
+    The environment produced by sourcing the flow's env.sh, captured once.
+
+    capture() sources env.sh in a throwaway bash and records how the
+    environment differs from ours. Values that only grew (PATH style) are kept
+    as prefix/suffix so they still apply on top of a different base
+    environment. The result is cached on disk, keyed by a hash of env.sh plus
+    the identity (path, size, mtime) of the tool binaries it puts on PATH, so
+    later sessions reuse it without running env.sh at all.
+
+    Parameters:
+        env_sh (str): Path of the flow's env.sh.
+        cache_dir (str): Directory for the cached capture.
+    """
+
+    def __init__(self, env_sh, cache_dir):
+        self.env_sh = os.path.abspath(env_sh)
+        key = hashlib.sha256(self.env_sh.encode()).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f"flowenv-{key}.json")
+        self.changes = None  # {name: ["set"|"prepend"|"append", value]}
+        self.removed = []
+        self.tools = {}
+
+    @property
+    def ready(self):
+        return self.changes is not None
+
+    def load_cached(self):
+        """Use the cached capture if env.sh and the tools are unchanged"""
+        try:
+            with open(self.cache_path, "r") as file:
+                entry = json.load(file)
+            if entry["env_sh_hash"] != file_hash(self.env_sh):
+                return False
+            for tool, (path, size, mtime) in entry["tools"].items():
+                st = os.stat(path)
+                if st.st_size != size or st.st_mtime != mtime:
+                    return False
+        except (OSError, ValueError, KeyError):
+            return False
+        self.changes = entry["changes"]
+        self.removed = entry["removed"]
+        self.tools = entry["tools"]
+        return True
+
+    def capture(self, base=None):
+        """
+        Source env.sh in a helper bash and cache the resulting changes.
+
+        Raises:
+            RuntimeError: if sourcing env.sh fails.
+        """
+        base = dict(os.environ if base is None else base)
+        env_sh_hash = file_hash(self.env_sh)
+        script = f"source {shlex.quote(self.env_sh)} >/dev/null 2>&1 || exit $?; env -0"
+        proc = subprocess.run(["bash", "--noprofile", "--norc", "-c", script],
+                              cwd=os.path.dirname(self.env_sh), env=base,
+                              capture_output=True, timeout=300)
+        if proc.returncode != 0:
+            raise RuntimeError(f"sourcing {self.env_sh} failed with exit code {proc.returncode}")
+
+        after = {}
+        for item in proc.stdout.decode(errors="replace").split("\0"):
+            name, sep, value = item.partition("=")
+            if sep and name not in IGNORED:
+                after[name] = value
+
+        changes = {}
+        for name, value in after.items():
+            old = base.get(name)
+            if old == value:
+                continue
+            if old and value.endswith(old):
+                changes[name] = ["prepend", value[:-len(old)]]
+            elif old and value.startswith(old):
+                changes[name] = ["append", value[len(old):]]
+            else:
+                changes[name] = ["set", value]
+        self.changes = changes
+        self.removed = [name for name in base if name not in after and name not in IGNORED]
+        self.tools = tool_fingerprints(after.get("PATH", ""))
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({"env_sh": self.env_sh, "env_sh_hash": env_sh_hash, "tools": self.tools,
+                       "changes": self.changes, "removed": self.removed}, file, indent=4)
+        os.replace(tmp, self.cache_path)
+
+    def apply(self, env):
+        """Returns a copy of the mapping env with the flow environment applied"""
+        env = dict(env)
+        for name in self.removed:
+            env.pop(name, None)
+        for name, (mode, value) in (self.changes or {}).items():
+            if mode == "prepend":
+                env[name] = value + env.get(name, "")
+            elif mode == "append":
+                env[name] = env.get(name, "") + value
+            else:
+                env[name] = value
+        return env
+
+    def shell_script(self):
+        """The captured changes as bash statements (for an already running shell)"""
+        lines = [f"unset {name}" for name in self.removed if SHELL_NAME_RE.match(name)]
+        for name, (mode, value) in (self.changes or {}).items():
+            if not SHELL_NAME_RE.match(name):
+                continue  # e.g. exported bash functions
+            if mode == "prepend":
+                lines.append(f"export {name}={shlex.quote(value)}\"${{{name}}}\"")
+            elif mode == "append":
+                lines.append(f"export {name}=\"${{{name}}}\"{shlex.quote(value)}")
+            else:
+                lines.append(f"export {name}={shlex.quote(value)}")
+        return "\n".join(lines) + "\n"
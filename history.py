@@ -0,0 +1,171 @@
+import os
+import re
+import sqlite3
+import time
+
+# Trailer ORFS writes at the end of every stage log, e.g.
+# Elapsed time: 0:04.26[h:]min:sec. CPU time: user 4.09 sys 0.16 (99%). Peak memory: 183924KB.
+STAGE_STATS_RE = re.compile(
+    r"Elapsed time: (?P<elapsed>[\d:.]+)\[h:\]min:sec\. "
+    r"CPU time: user (?P<user>[\d.]+) sys (?P<sys>[\d.]+) \(\d+%\)\. "
+    r"Peak memory: (?P<peak>\d+)KB\."
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    design TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    step TEXT,
+    started REAL,
+    duration REAL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    elapsed REAL,
+    cpu REAL,
+    peak_kb INTEGER,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS runs_by_design ON runs (design, platform, variant);
+"""
+
+SPARK = "▁▂▃▄▅▆▇█"
+
+
+def parse_elapsed(text):
+    """'1:02:03.5' / '2:03.5' / '3.5' -> seconds"""
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_stage_log(path):
+    """Returns (elapsed, cpu, peak_kb) from the trailer of a stage log, or None"""
+    try:
+        with open(path, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - 4096))  # the trailer is at the very end
+            tail = file.read().decode(errors="replace")
+    except OSError:
+        return None
+    matches = list(STAGE_STATS_RE.finditer(tail))
+    if not matches:
+        return None
+    match = matches[-1]
+    return (parse_elapsed(match.group("elapsed")),
+            float(match.group("user")) + float(match.group("sys")),
+            int(match.group("peak")))
+
+
+def sparkline(values):
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK[int((v - low) / span * (len(SPARK) - 1))] for v in values)
+
+
+class RunHistory:
+    """
+    SQLite store of per-stage runtime and memory of every run the GUI started.
+
+    A run is one make invocation; its stages are the ORFS stage logs under
+    flow/logs/<platform>/<nickname>/<variant>/ written during that run, where
+    nickname is the design's DESIGN_NICKNAME (its directory name unless
+    config.mk sets another).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, logs_dir, design, platform, variant="base", step="", started=None, duration=None, exit_code=None):
+        """
+        Records a run and the stage logs it produced.
+
+        Parameters:
+            logs_dir (str): flow/logs/<platform>/<nickname>/<variant> directory.
+            started (float): Run start (time.time()); older logs are ignored.
+
+        Returns:
+            int: Number of stages recorded; a run without any (nothing was
+            built, or the artifact cache restored it) is not recorded.
+        """
+        stages = []
+        if os.path.isdir(logs_dir):
+            for entry in os.scandir(logs_dir):
+                if not entry.name.endswith(".log") or not entry.is_file():
+                    continue
+                if started is not None and entry.stat().st_mtime < started - 1:
+                    continue  # left over from an earlier run
+                stats = parse_stage_log(entry.path)
+                if stats:
+                    stages.append((entry.name[:-len(".log")], *stats))
+        if not stages:
+            return 0
+
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (design, platform, variant, step, started, duration, exit_code) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (design, platform, variant, step, started or time.time(), duration, exit_code))
+            run_id = cursor.lastrowid
+            self.db.executemany("INSERT INTO stages (run_id, stage, elapsed, cpu, peak_kb) VALUES (?, ?, ?, ?, ?)",
+                                [(run_id, *stage) for stage in stages])
+        return len(stages)
+
+    def designs(self):
+        """[(design, platform)] with recorded runs, most recent first"""
+        rows = self.db.execute("SELECT design, platform, MAX(started) FROM runs GROUP BY design, platform ORDER BY 3 DESC")
+        return [(design, platform) for design, platform, _ in rows]
+
+    def stage_history(self, design, platform, variant="base", limit=20):
+        """{stage: [(started, elapsed, cpu, peak_kb)]} oldest first, last 'limit' runs per stage"""
+        rows = self.db.execute(
+            "SELECT s.stage, r.started, s.elapsed, s.cpu, s.peak_kb FROM stages s JOIN runs r ON r.id = s.run_id "
+            "WHERE r.design = ? AND r.platform = ? AND r.variant = ? ORDER BY r.started",
+            (design, platform, variant))
+        history = {}
+        for stage, *values in rows:
+            history.setdefault(stage, []).append(tuple(values))
+        return {stage: values[-limit:] for stage, values in sorted(history.items())}
+
+    def trends(self, design, platform, variant="base", window=5, threshold=25.0):
+        """
+        Latest run of every stage compared with its rolling baseline.
+
+        Parameters:
+            window (int): Number of earlier runs averaged into the baseline.
+            threshold (float): Percent slowdown over the baseline that flags a stage.
+
+        Returns:
+            list: dicts with stage, runs, latest, baseline, change (percent or
+            None), peak_kb, spark and slower (bool), in stage order.
+        """
+        trends = []
+        for stage, values in self.stage_history(design, platform, variant).items():
+            elapsed = [value[1] for value in values]
+            latest = elapsed[-1]
+            previous = elapsed[-window - 1:-1]
+            baseline = sum(previous) / len(previous) if previous else None
+            change = (latest - baseline) / baseline * 100 if baseline else None
+            trends.append({
+                "stage": stage,
+                "runs": len(values),
+                "latest": latest,
+                "baseline": baseline,
+                "change": change,
+                "peak_kb": values[-1][3],
+                "spark": sparkline(elapsed),
+                "slower": change is not None and change > threshold,
+            })
+        return trends
@@ -0,0 +1,214 @@
+import errno
+import fcntl
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+# Only RTL and constraints are needed by the flow
+DEFAULT_INCLUDE = ["*.v", "*.sv", "*.vh", "*.svh", "*.sdc"]
+# Testbenches, simulation output and tool/VCS clutter
+DEFAULT_EXCLUDE = [".git", ".svn", "sim", "simulation", "tb", "testbench", "work", "build", "obj_dir",
+                   "tb_*", "*_tb.*", "*_tb", "*_test.*", "*.vcd", "*.fst", "*.wlf", "*.ghw"]
+
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+LINK_MODES = ("reflink", "hardlink", "copy")
+
+PROGRESS_INTERVAL = 0.1  # seconds
+
+
+def compile_patterns(patterns):
+    """One regex for a list of fnmatch patterns, matched against a file name or relative path"""
+    if not patterns:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+def matches(rel, regex):
+    return bool(regex.match(os.path.basename(rel)) or regex.match(rel))
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def reflink(src, dst):
+    """Copy-on-write clone of src (btrfs, xfs, ...); raises OSError where unsupported"""
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied = 0
+        self.linked = 0  # reflinked or hardlinked, no data copied
+        self.unchanged = 0
+        self.removed = 0
+        self.bytes = 0  # bytes actually copied
+
+    def __str__(self):
+        return (f"{self.copied} copied, {self.linked} linked, {self.unchanged} unchanged, "
+                f"{self.removed} removed, {self.bytes / 1e6:.1f} MB written")
+
+
+class DesignImporter:
+    """
+    Incremental one-way sync of a design folder into the flow.
+
+    Only files matching include (and not exclude) are considered; excluded
+    directory names are not even walked. A state file remembers size, mtime and
+    hash of every synced source file and the size and mtime of its copy, so an
+    unchanged file costs two stats, a touched-but-identical one costs one hash
+    and only real changes are written; a copy changed in the destination is
+    synced again.
+    Files are cloned with a reflink when the filesystem supports it, optionally
+    hardlinked, and copied otherwise; every write goes to a temporary file that
+    is renamed into place. Files that were synced before and have since
+    disappeared from the source are removed; anything else in the destination
+    is left alone, as are the reserved paths, which another writer owns (the
+    bundle the flow reads): a source file of that name is listed in files but
+    not synced.
+
+    Parameters:
+        src (str): Selected design folder.
+        dst (str): Destination (flow/designs/src/<design>).
+        state_path (str): JSON file holding the sync state.
+        include, exclude (list): fnmatch patterns on the file name or relative path.
+        link_mode (str): "reflink" (fall back to copy), "hardlink" (reflink,
+            then hardlink, then copy) or "copy".
+        reserved (list): Destination paths, relative, never written or removed.
+    """
+
+    def __init__(self, src, dst, state_path, include=None, exclude=None, link_mode="reflink", reserved=()):
+        self.src = os.path.abspath(src)
+        self.dst = os.path.abspath(dst)
+        self.state_path = state_path
+        self.include = compile_patterns(include or DEFAULT_INCLUDE)
+        self.exclude = compile_patterns(DEFAULT_EXCLUDE if exclude is None else exclude)
+        self.link_mode = link_mode if link_mode in LINK_MODES else "reflink"
+        self.reserved = set(reserved)
+        self.files = []  # relative paths selected by the last sync
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r") as file:
+                state = json.load(file)
+            if state.get("src") == self.src and state.get("dst") == self.dst:
+                return state["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save_state(self, files):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({"src": self.src, "dst": self.dst, "files": files}, file)
+        os.replace(tmp, self.state_path)
+
+    def scan(self):
+        """Relative paths of the source files to import"""
+        selected = []
+        for dirpath, dirnames, filenames in os.walk(self.src):
+            rel_dir = os.path.relpath(dirpath, self.src)
+            rel_dir = "" if rel_dir == "." else rel_dir
+            dirnames[:] = sorted(d for d in dirnames if not matches(os.path.join(rel_dir, d), self.exclude))
+            for name in sorted(filenames):
+                rel = os.path.join(rel_dir, name)
+                if matches(rel, self.include) and not matches(rel, self.exclude):
+                    selected.append(rel)
+        return selected
+
+    def place(self, src, dst, stats, size):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.importing"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        try:
+            if self.link_mode == "copy":
+                raise OSError(errno.EOPNOTSUPP, "copy requested")
+            reflink(src, tmp)
+            shutil.copystat(src, tmp)
+            stats.linked += 1
+        except OSError:
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            try:
+                if self.link_mode != "hardlink":
+                    raise OSError(errno.EOPNOTSUPP, "hardlinks not enabled")
+                os.link(src, tmp)
+                stats.linked += 1
+            except OSError:
+                shutil.copy2(src, tmp)
+                stats.copied += 1
+                stats.bytes += size
+        os.replace(tmp, dst)
+
+    def sync(self, progress=None):
+        """
+        Brings the destination up to date.
+
+        Parameters:
+            progress (callable): progress(done, total, rel_path), called at
+                most every PROGRESS_INTERVAL seconds and for the last file.
+
+        Returns:
+            SyncStats
+        """
+        stats = SyncStats()
+        old_state = self.load_state()
+        state = {}
+        files = self.files = self.scan()
+        total = len(files)
+        reported = 0.0
+
+        for done, rel in enumerate(files, 1):
+            if rel in self.reserved:
+                continue
+            src = os.path.join(self.src, rel)
+            dst = os.path.join(self.dst, rel)
+            st = os.stat(src)
+            known = old_state.get(rel)
+            try:
+                dst_st = os.stat(dst)
+                # the copy is still what was synced last time
+                dst_ok = bool(known) and known[3:] == [dst_st.st_size, dst_st.st_mtime_ns]
+            except OSError:
+                dst_ok = False
+
+            if dst_ok and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                state[rel] = known  # stat unchanged: nothing to do
+                stats.unchanged += 1
+            else:
+                digest = file_digest(src)
+                if dst_ok and known[2] == digest:
+                    stats.unchanged += 1  # touched, same content
+                else:
+                    self.place(src, dst, stats, st.st_size)
+                    dst_st = os.stat(dst)
+                state[rel] = [st.st_size, st.st_mtime_ns, digest, dst_st.st_size, dst_st.st_mtime_ns]
+
+            now = time.monotonic()
+            if progress and (now - reported >= PROGRESS_INTERVAL or done == total):
+                reported = now
+                progress(done, total, rel)
+
+        for rel in old_state:
+            if rel not in state and rel not in self.reserved:
+                try:
+                    os.remove(os.path.join(self.dst, rel))
+                    stats.removed += 1
+                except FileNotFoundError:
+                    pass
+
+        if state != old_state:
+            self.save_state(state)
+        return stats
@@ -0,0 +1,284 @@
+"""
+Persistent queue of the GUI's local build jobs.
+
+Every job is a directory in the cache: job.json (what to run, written by the
+GUI), state.json (how it went, written by the runner) and output.log. A
+job is run by this module started as its own detached process ("python3
+jobqueue.py run DIR"), so neither closing nor a crash of the GUI stops it;
+the GUI follows output.log and, when started again, reattaches to the jobs
+still running and reports the ones that finished in the meantime.
+
+make runs in a process group of its own, so cancelling, pausing (SIGSTOP)
+and resuming (SIGCONT) reach every tool it started.
+
+Usage:
+    python3 jobqueue.py run JOB_DIR
+"""
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+FINISHED = ("done", "failed", "cancelled", "lost")
+KEEP_FINISHED = 50  # finished job directories kept (their logs are in the log store as well)
+KILL_DELAY = 5      # seconds between SIGTERM and SIGKILL when cancelling
+# Result file of each stage, in flow order: a stage is complete once it is there
+STAGE_RESULTS = (("synth", "1_synth.v"), ("floorplan", "2_floorplan.odb"), ("place", "3_place.odb"),
+                 ("cts", "4_cts.odb"), ("route", "5_route.odb"), ("finish", "6_final.gds"))
+
+
+def read_json(path):
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as file:
+        json.dump(data, file)
+    os.replace(tmp, path)
+
+
+def process_alive(pid, marker):
+    """Whether pid is running (not a zombie) with marker in its command line, so a reused pid does not count"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as file:
+            return marker.encode() in file.read()
+    except (OSError, TypeError):
+        return False
+
+
+def process_state(pid):
+    """State letter of a process (R, S, T for stopped, ...), None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            return file.read().rpartition(")")[2].split()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def process_start(pid):
+    """Start time of a process in clock ticks since boot, None if it is gone: a reused pid starts later"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            return int(file.read().rpartition(")")[2].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def last_completed_stage(flow_dir, platform, nickname, variant="base"):
+    """
+    Last stage of a variant whose result is in place, each newer than the one
+    before (an older one was left over from an earlier run). None if even
+    synthesis is not.
+    """
+    results = os.path.join(flow_dir, "results", platform, nickname, variant)
+    completed, previous = None, 0
+    for stage, name in STAGE_RESULTS:
+        try:
+            mtime = os.stat(os.path.join(results, name)).st_mtime_ns
+        except OSError:
+            break
+        if mtime < previous:
+            break
+        completed, previous = stage, mtime
+    return completed
+
+
+class JobQueue:
+    """
+    The job directories below root.
+
+    Status of a job: "queued" until it is started, then "running" (or
+    "paused" while its make is stopped) and at last "done", "failed",
+    "cancelled" or "lost" (its runner died without saying how it went:
+    killed, or the machine went down).
+
+    Parameters:
+        root (str): Directory of the job directories.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, job_id, name=""):
+        return os.path.join(self.root, job_id, name)
+
+    def create(self, spec):
+        """Record a queued job. spec is what the GUI needs to show and run it again. Returns its id."""
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        os.makedirs(self.path(job_id))
+        write_json(self.path(job_id, "job.json"), dict(spec, id=job_id, created=time.time(), owner=os.getpid(),
+                                                      owner_start=process_start(os.getpid())))
+        return job_id
+
+    def spec(self, job_id):
+        return read_json(self.path(job_id, "job.json")) or {}
+
+    def update(self, job_id, **fields):
+        spec = self.spec(job_id)
+        spec.update(fields)
+        write_json(self.path(job_id, "job.json"), spec)
+
+    def jobs(self):
+        """Ids of the recorded jobs, oldest first"""
+        try:
+            return sorted(name for name in os.listdir(self.root) if os.path.isfile(self.path(name, "job.json")))
+        except OSError:
+            return []
+
+    def start(self, job_id, commands, flow_dir, env):
+        """
+        Start the job's runner, detached from this process.
+
+        Parameters:
+            commands (list): make argument lists, run in turn while they succeed.
+
+        Returns:
+            subprocess.Popen: The runner, to be polled so it does not stay a zombie.
+        """
+        self.update(job_id, commands=commands, flow_dir=flow_dir)
+        with open(self.path(job_id, "output.log"), "ab") as log:
+            process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "run", self.path(job_id)],
+                                       cwd=flow_dir, env=env, stdin=subprocess.DEVNULL, stdout=log,
+                                       stderr=subprocess.STDOUT, start_new_session=True, close_fds=True)
+        self.update(job_id, runner_pid=process.pid)
+        return process
+
+    def status(self, job_id):
+        """
+        Returns:
+            dict: status, exit_code, started and finished (wall clock), pgid of
+            the running make.
+        """
+        spec = self.spec(job_id)
+        alive = process_alive(spec.get("runner_pid"), self.path(job_id))  # before the state: it may finish in between
+        state = read_json(self.path(job_id, "state.json")) or {}
+        if state.get("status") in FINISHED:
+            return state
+        if spec.get("runner_pid") is None:
+            return {"status": "queued"}
+        if not alive:
+            return dict(state, status="lost", exit_code=-1)
+        state = dict(state, status="running")
+        if state.get("pgid") and process_state(state["pgid"]) == "T":
+            state["status"] = "paused"
+        return state
+
+    def finish_queued(self, job_id, status):
+        """Settle a job that never started (cancelled in the queue)"""
+        write_json(self.path(job_id, "state.json"), {"status": status, "exit_code": None, "started": None,
+                                                     "finished": time.time(), "pgid": None})
+
+    def signal(self, job_id, signum):
+        """Send a signal to the job's make and everything it started. Returns False if nothing runs."""
+        pgid = self.status(job_id).get("pgid")
+        if not pgid:
+            return False
+        try:
+            if os.getpgid(pgid) != pgid:
+                return False  # make is gone and its pid taken
+            os.killpg(pgid, signum)
+        except (ProcessLookupError, PermissionError):
+            return False
+        return True
+
+    def cancel(self, job_id):
+        """Ask the runner to stop: no further commands, and make is terminated (woken up first if paused)"""
+        open(self.path(job_id, "cancel"), "w").close()
+        self.signal(job_id, signal.SIGTERM)
+        self.signal(job_id, signal.SIGCONT)
+
+    def kill(self, job_id):
+        self.signal(job_id, signal.SIGKILL)
+
+    def pause(self, job_id):
+        return self.signal(job_id, signal.SIGSTOP)
+
+    def resume(self, job_id):
+        return self.signal(job_id, signal.SIGCONT)
+
+    def claimable(self, job_id):
+        """Whether no other running instance of the app looks after the job"""
+        spec = self.spec(job_id)
+        owner, started = spec.get("owner"), spec.get("owner_start")
+        if owner == os.getpid():
+            return True
+        if started is None:  # recorded before the start time was
+            return not process_alive(owner, "python")
+        return process_start(owner) != started
+
+    def claim(self, job_id):
+        self.update(job_id, owner=os.getpid(), owner_start=process_start(os.getpid()))
+
+    def remove(self, job_id):
+        shutil.rmtree(self.path(job_id), ignore_errors=True)
+
+    def prune(self, keep=KEEP_FINISHED):
+        """Remove the oldest reported finished jobs beyond keep. Returns the number removed."""
+        finished = [job_id for job_id in self.jobs()
+                    if self.spec(job_id).get("reported") and self.status(job_id)["status"] in FINISHED]
+        for job_id in finished[:-keep or None]:
+            self.remove(job_id)
+        return max(0, len(finished) - keep)
+
+
+def run(job_dir):
+    """The runner: run the job's commands, recording the state as it goes"""
+    spec = read_json(os.path.join(job_dir, "job.json"))
+    state_path = os.path.join(job_dir, "state.json")
+    cancel_path = os.path.join(job_dir, "cancel")
+    state = {"status": "running", "exit_code": None, "started": time.time(), "finished": None, "pgid": None,
+             "command": 0}
+    write_json(state_path, state)
+    exit_code = 0
+    with open(os.path.join(job_dir, "output.log"), "ab", buffering=0) as log:
+        for index, args in enumerate(spec["commands"]):
+            if os.path.exists(cancel_path):
+                break
+            if len(spec["commands"]) > 1:
+                log.write(f"make {' '.join(args)}\n".encode())
+            try:
+                process = subprocess.Popen(["make", *args], cwd=spec["flow_dir"], stdin=subprocess.DEVNULL, stdout=log,
+                                           stderr=subprocess.STDOUT, start_new_session=True)
+            except OSError as e:
+                log.write(f"make: {e}\n".encode())
+                exit_code = 127
+                break
+            state.update(pgid=process.pid, command=index)
+            write_json(state_path, state)
+            if os.path.exists(cancel_path):
+                # cancelled before the pgid was there to be signalled: nobody else will
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            exit_code = process.wait()
+            if exit_code < 0:
+                exit_code = -1  # killed by a signal
+            state["pgid"] = None
+            write_json(state_path, state)
+            if exit_code != 0:
+                break
+    status = "cancelled" if os.path.exists(cancel_path) else "done" if exit_code == 0 else "failed"
+    state.update(status=status, exit_code=exit_code, finished=time.time())
+    write_json(state_path, state)
+    return 0
+
+
+def main(argv):
+    if len(argv) != 2 or argv[0] != "run":
+        print(__doc__.strip().rpartition("Usage:")[2], file=sys.stderr)
+        return 2
+    return run(argv[1])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,861 @@
+import bisect
+import hashlib
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import zlib
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: the tiles come out the same, only slower to draw
+    np = None
+
+TILE = 256               # pixels per tile side
+LOD_PIXELS = 3           # cell instances smaller than this are drawn as a box instead of opened up
+MAX_DEPTH = 32           # hierarchy levels opened up at most (guards against reference cycles)
+MAX_LEVELS = 16
+MIN_PIXEL_METERS = 5e-9  # the finest zoom level stops at this much per pixel
+CACHE_VERSION = 1
+CACHE_KEEP = 8           # layouts whose tiles stay in the cache
+CELLS = "cells"          # pseudo layer: instances too small to open up, DEF components
+DIE = "die"              # pseudo layer: outline of the DEF die area
+IDENTITY = (1, 0, 0, 1, 0, 0)
+FLOW_LAYOUTS = ("6_final.gds", "6_final.def")  # what ORFS leaves in results/<platform>/<design>/<variant>
+
+BACKGROUND = (20, 20, 20)
+CELL_COLOR = (85, 85, 85)
+DIE_COLOR = (220, 220, 220)
+LAYER_COLORS = [(79, 195, 247), (255, 183, 77), (129, 199, 132), (229, 115, 115), (186, 104, 200), (255, 241, 118),
+                (77, 208, 225), (240, 98, 146), (174, 213, 129), (144, 164, 174), (255, 138, 101), (121, 134, 203)]
+
+# GDSII record types
+HEADER, UNITS, ENDLIB, STRNAME, ENDSTR = 0x00, 0x03, 0x04, 0x06, 0x07
+BOUNDARY, PATH, SREF, AREF, TEXT, LAYER, DATATYPE, WIDTH, XY, ENDEL = 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F, 0x10, 0x11
+SNAME, COLROW, NODE, TEXTTYPE, STRANS, MAG, ANGLE, PATHTYPE, BOX, BOXTYPE = 0x12, 0x13, 0x15, 0x16, 0x1A, 0x1B, 0x1C, 0x21, 0x2D, 0x2E
+ELEMENTS = (BOUNDARY, PATH, SREF, AREF, TEXT, NODE, BOX)
+REFLECT = 0x8000  # STRANS bit: mirror about the x axis before rotating
+
+
+class LayoutError(Exception):
+    """The file is not a layout this module can read"""
+
+
+# Placements are affine maps (a, b, c, d, tx, ty): (x, y) -> (a*x + b*y + tx, c*x + d*y + ty)
+
+def compose(outer, inner):
+    a1, b1, c1, d1, tx1, ty1 = outer
+    a2, b2, c2, d2, tx2, ty2 = inner
+    return (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2, c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+            a1 * tx2 + b1 * ty2 + tx1, c1 * tx2 + d1 * ty2 + ty1)
+
+
+def invert(m):
+    a, b, c, d, tx, ty = m
+    det = a * d - b * c
+    ia, ib, ic, id_ = d / det, -b / det, -c / det, a / det
+    return (ia, ib, ic, id_, -(ia * tx + ib * ty), -(ic * tx + id_ * ty))
+
+
+def map_box(m, box):
+    """Bounding box of a box (x0, y0, x1, y1) after the map"""
+    a, b, c, d, tx, ty = m
+    x0, y0, x1, y1 = box
+    ax0, ax1, by0, by1 = a * x0, a * x1, b * y0, b * y1
+    cx0, cx1, dy0, dy1 = c * x0, c * x1, d * y0, d * y1
+    return (tx + min(ax0, ax1) + min(by0, by1), ty + min(cx0, cx1) + min(dy0, dy1),
+            tx + max(ax0, ax1) + max(by0, by1), ty + max(cx0, cx1) + max(dy0, dy1))
+
+
+def placement(reflect, mag, angle, x, y):
+    """The map of a GDS reference: mirror, magnify, rotate counterclockwise, move"""
+    quarter = angle / 90
+    if quarter == int(quarter):
+        cos, sin = ((1, 0), (0, 1), (-1, 0), (0, -1))[int(quarter) % 4]  # exact for the usual orientations
+    else:
+        cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    flip = -1 if reflect else 1
+    return (mag * cos, -mag * sin * flip, mag * sin, mag * cos * flip, x, y)
+
+
+# Blocks of rectangles: an (n, 4) array with numpy, a flat sequence of x0, y0, x1, y1 without
+
+def block_of(rects):
+    if np is not None:
+        return np.frombuffer(rects, dtype=np.int64).reshape(-1, 4) if len(rects) else np.empty((0, 4), np.int64)
+    return rects
+
+
+def block_rows(block, first, last):
+    return block[first:last] if np is not None else block[4 * first:4 * last]
+
+
+def block_size(block):
+    return len(block) if np is not None else len(block) // 4
+
+
+def search(keys, value, right=False):
+    if np is not None:
+        return int(np.searchsorted(keys, value, "right" if right else "left"))
+    return (bisect.bisect_right if right else bisect.bisect_left)(keys, value)
+
+
+def select(block, x0, y0, x1, y1):
+    """The rectangles of a block that overlap the window"""
+    if np is not None:
+        return block[(block[:, 0] <= x1) & (block[:, 2] >= x0) & (block[:, 1] <= y1) & (block[:, 3] >= y0)]
+    selected = []
+    for i in range(0, len(block), 4):
+        if block[i] <= x1 and block[i + 2] >= x0 and block[i + 1] <= y1 and block[i + 3] >= y0:
+            selected.extend(block[i:i + 4])
+    return selected
+
+
+def transform(block, m):
+    """Bounding boxes of the rectangles of a block after the map"""
+    if m == IDENTITY:
+        return block
+    a, b, c, d, tx, ty = m
+    if np is not None:
+        x0, y0, x1, y1 = (block[:, k].astype(float) for k in range(4))
+        ax0, ax1, by0, by1 = a * x0, a * x1, b * y0, b * y1
+        cx0, cx1, dy0, dy1 = c * x0, c * x1, d * y0, d * y1
+        return np.column_stack((tx + np.minimum(ax0, ax1) + np.minimum(by0, by1),
+                                ty + np.minimum(cx0, cx1) + np.minimum(dy0, dy1),
+                                tx + np.maximum(ax0, ax1) + np.maximum(by0, by1),
+                                ty + np.maximum(cx0, cx1) + np.maximum(dy0, dy1)))
+    mapped = []
+    for i in range(0, len(block), 4):
+        mapped.extend(map_box(m, block[i:i + 4]))
+    return mapped
+
+
+def block_extent(block):
+    """(x0, y0, x1, y1) around the rectangles of a non-empty block"""
+    if np is not None:
+        return (int(block[:, 0].min()), int(block[:, 1].min()), int(block[:, 2].max()), int(block[:, 3].max()))
+    return min(block[0::4]), min(block[1::4]), max(block[2::4]), max(block[3::4])
+
+
+def sort_rows(block, column):
+    """A block sorted by one coordinate, and that coordinate of each rectangle"""
+    if np is not None:
+        block = block[np.argsort(block[:, column], kind="stable")]
+        return block, np.ascontiguousarray(block[:, column])
+    rows = sorted((block[i:i + 4] for i in range(0, len(block), 4)), key=lambda row: row[column])
+    flat = array("q")
+    for row in rows:
+        flat.extend(row)
+    return flat, array("q", flat[column::4])
+
+
+class ShapeIndex:
+    """
+    The rectangles of one layer of one cell, split so a window finds its
+    candidates by bisection: narrow ones sorted by left edge, wide but low
+    ones (horizontal wires) sorted by bottom edge, and the few that are large
+    both ways, which are always checked.
+
+    Parameters:
+        rects (array): x0, y0, x1, y1 of each rectangle.
+        span (int): Size up to which a rectangle counts as narrow or low.
+    """
+
+    def __init__(self, rects, span):
+        self.span = span
+        if np is not None:
+            block = block_of(rects)
+            narrow = block[:, 2] - block[:, 0] <= span
+            low = block[:, 3] - block[:, 1] <= span
+            narrow, wide, large = block[narrow], block[~narrow & low], block[~narrow & ~low]
+        else:
+            narrow, wide, large = array("q"), array("q"), array("q")
+            for i in range(0, len(rects), 4):
+                x0, y0, x1, y1 = rects[i:i + 4]
+                (narrow if x1 - x0 <= span else wide if y1 - y0 <= span else large).extend((x0, y0, x1, y1))
+        self.narrow, self.narrow_keys = sort_rows(narrow, 0)
+        self.wide, self.wide_keys = sort_rows(wide, 1)
+        self.large = large
+
+    def candidates(self, x0, y0, x1, y1):
+        """Blocks holding every rectangle that may overlap the window"""
+        return [block_rows(self.narrow, search(self.narrow_keys, x0 - self.span), search(self.narrow_keys, x1, True)),
+                block_rows(self.wide, search(self.wide_keys, y0 - self.span), search(self.wide_keys, y1, True)),
+                self.large]
+
+
+class Cell:
+    """A GDS structure: rectangles per layer and placements of other cells"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rects = {}   # {layer: array of x0, y0, x1, y1} while the file is read
+        self.refs = {}    # {(child, a, b, c, d): (xs, ys)} the placements of a child in one orientation
+        self.shapes = {}  # {layer: ShapeIndex} once read
+        self.bbox = None
+
+    def add_rect(self, layer, x0, y0, x1, y1):
+        self.rects.setdefault(layer, array("q")).extend((math.floor(x0), math.floor(y0), math.ceil(x1), math.ceil(y1)))
+
+    def add_ref(self, child, m):
+        xs, ys = self.refs.setdefault((child,) + m[:4], (array("q"), array("q")))
+        xs.append(round(m[4]))
+        ys.append(round(m[5]))
+
+    def finish(self):
+        """Index the rectangles and sort the placements by x"""
+        for layer, rects in self.rects.items():
+            x0, y0, x1, y1 = block_extent(block_of(rects))
+            self.shapes[layer] = ShapeIndex(rects, max(1, max(x1 - x0, y1 - y0) // TILE))
+        self.rects = {}
+        for key, (xs, ys) in self.refs.items():
+            if np is not None:
+                xs, ys = np.frombuffer(xs, np.int64), np.frombuffer(ys, np.int64)
+                order = np.argsort(xs, kind="stable")
+                self.refs[key] = (xs[order], ys[order])
+            else:
+                order = sorted(range(len(xs)), key=xs.__getitem__)
+                self.refs[key] = (array("q", (xs[i] for i in order)), array("q", (ys[i] for i in order)))
+
+
+class Layout:
+    """
+    The cells of a layout and a renderer for windows of its top cell.
+
+    Rectangles are drawn in the order of the layers, each over the ones
+    before. Instances that come out smaller than LOD_PIXELS are drawn as a
+    box of the CELLS layer instead of with their contents, so a window of
+    the whole chip costs about as much as a window of a few cells.
+
+    Parameters:
+        cells (dict): {name: Cell}, as read.
+        dbu_meters (float): Size of a database unit.
+        layers (list): Layer names in drawing order.
+    """
+
+    def __init__(self, cells, dbu_meters, layers):
+        self.cells = cells
+        self.dbu_meters = dbu_meters
+        self.layers = layers
+        for cell in cells.values():
+            cell.finish()
+        boxes = {}
+        for name in cells:
+            self.cell_box(name, boxes, set())
+        referenced = {key[0] for cell in cells.values() for key in cell.refs}
+        tops = [cell for name, cell in cells.items() if name not in referenced and cell.bbox]
+        if not tops:
+            raise LayoutError("no geometry found")
+        # several unreferenced cells: the largest is the chip, the others are leftovers of the libraries
+        self.top = max(tops, key=lambda cell: (cell.bbox[2] - cell.bbox[0]) * (cell.bbox[3] - cell.bbox[1]))
+        self.bbox = self.top.bbox
+
+    def cell_box(self, name, boxes, visiting):
+        if name in boxes or name in visiting or name not in self.cells:
+            return boxes.get(name)
+        visiting.add(name)
+        cell = self.cells[name]
+        extents = []
+        for index in cell.shapes.values():
+            for block in (index.narrow, index.wide, index.large):
+                if block_size(block):
+                    extents.append(block_extent(block))
+        for (child, a, b, c, d), (xs, ys) in cell.refs.items():
+            box = self.cell_box(child, boxes, visiting)
+            if box is not None and len(xs):
+                x0, y0, x1, y1 = map_box((a, b, c, d, 0, 0), box)
+                extents.append((x0 + min(xs), y0 + min(ys), x1 + max(xs), y1 + max(ys)))
+        visiting.discard(name)
+        cell.bbox = boxes[name] = (min(e[0] for e in extents), min(e[1] for e in extents),
+                                   max(e[2] for e in extents), max(e[3] for e in extents)) if extents else None
+        return cell.bbox
+
+    def collect(self, cell, m, window, scale, hidden, depth, out):
+        """Add the rectangles of a placed cell that overlap the window to out ({layer: [blocks]})"""
+        lx0, ly0, lx1, ly1 = map_box(invert(m), window)  # the window in the cell's coordinates
+        for layer, index in cell.shapes.items():
+            if layer in hidden:
+                continue
+            for block in index.candidates(lx0, ly0, lx1, ly1):
+                block = select(block, lx0, ly0, lx1, ly1)
+                if block_size(block):
+                    out.setdefault(layer, []).append(transform(block, m))
+        for (name, a, b, c, d), (xs, ys) in cell.refs.items():
+            child = self.cells.get(name)
+            if child is None or child.bbox is None:
+                continue
+            ox0, oy0, ox1, oy1 = map_box((a, b, c, d, 0, 0), child.bbox)  # the child around its origin
+            first, last = search(xs, lx0 - ox1), search(xs, lx1 - ox0, True)
+            if first >= last:
+                continue
+            wx0, wy0, wx1, wy1 = map_box(m[:4] + (0, 0), (ox0, oy0, ox1, oy1))
+            if max(wx1 - wx0, wy1 - wy0) < LOD_PIXELS * scale or depth >= MAX_DEPTH:
+                if CELLS not in hidden:
+                    boxes = instance_boxes(xs, ys, first, last, (ox0, oy0, ox1, oy1), ly0, ly1)
+                    if block_size(boxes):
+                        out.setdefault(CELLS, []).append(transform(boxes, m))
+                continue
+            placed_xs, placed_ys = xs[first:last], ys[first:last]
+            if np is not None:
+                keep = (placed_ys + oy0 <= ly1) & (placed_ys + oy1 >= ly0)
+                placed_xs, placed_ys = placed_xs[keep].tolist(), placed_ys[keep].tolist()
+            for x, y in zip(placed_xs, placed_ys):
+                if y + oy0 <= ly1 and y + oy1 >= ly0:
+                    self.collect(child, compose(m, (a, b, c, d, x, y)), window, scale, hidden, depth + 1, out)
+
+    def render(self, window, scale, hidden=()):
+        """Raster of a window (x0, y0, x1, y1 in database units) at scale database units per pixel"""
+        out = {}
+        self.collect(self.top, IDENTITY, window, scale, set(hidden), 0, out)
+        raster = Raster()
+        for index, layer in enumerate(self.layers, 1):
+            for block in out.get(layer, ()):
+                raster.fill(block, window, scale, min(index, 255))
+        return raster
+
+
+def instance_boxes(xs, ys, first, last, offsets, y0, y1):
+    """Boxes of the placements first..last whose y range meets y0..y1"""
+    ox0, oy0, ox1, oy1 = offsets
+    if np is not None:
+        placed_xs, placed_ys = xs[first:last], ys[first:last]
+        keep = (placed_ys + oy0 <= y1) & (placed_ys + oy1 >= y0)
+        placed_xs, placed_ys = placed_xs[keep], placed_ys[keep]
+        return np.column_stack((placed_xs + ox0, placed_ys + oy0, placed_xs + ox1, placed_ys + oy1))
+    boxes = []
+    for x, y in zip(xs[first:last], ys[first:last]):
+        if y + oy0 <= y1 and y + oy1 >= y0:
+            boxes.extend((x + ox0, y + oy0, x + ox1, y + oy1))
+    return boxes
+
+
+class Raster:
+    """TILE x TILE palette indices of one tile, 0 where nothing is drawn"""
+
+    def __init__(self):
+        self.pixels = np.zeros((TILE, TILE), np.uint8) if np is not None else bytearray(TILE * TILE)
+
+    def fill(self, block, window, scale, index):
+        """Paint the rectangles of a block; every rectangle covers at least one pixel"""
+        left, top = window[0], window[3]
+        step = 1.0 / scale
+        if np is not None:
+            block = np.asarray(block, dtype=float)
+            x0 = np.floor((block[:, 0] - left) * step)
+            x1 = np.maximum(np.ceil((block[:, 2] - left) * step), x0 + 1)
+            y0 = np.floor((top - block[:, 3]) * step)
+            y1 = np.maximum(np.ceil((top - block[:, 1]) * step), y0 + 1)
+            x0, x1, y0, y1 = (np.clip(v, 0, TILE).astype(np.intp) for v in (x0, x1, y0, y1))
+            width, height = x1 - x0, y1 - y0
+            shown = (width > 0) & (height > 0)
+            small = shown & (width <= 4) & (height <= 4)
+            # the many small ones pixel by pixel in a few array operations, the rest one by one
+            for dy in range(4):
+                for dx in range(4):
+                    hit = small & (width > dx) & (height > dy)
+                    self.pixels[y0[hit] + dy, x0[hit] + dx] = index
+            for i in np.nonzero(shown & ~small)[0]:
+                self.pixels[y0[i]:y1[i], x0[i]:x1[i]] = index
+            return
+        pixels = self.pixels
+        for i in range(0, len(block), 4):
+            x0 = math.floor((block[i] - left) * step)
+            x1 = min(TILE, max(math.ceil((block[i + 2] - left) * step), x0 + 1))
+            y0 = math.floor((top - block[i + 3]) * step)
+            y1 = min(TILE, max(math.ceil((top - block[i + 1]) * step), y0 + 1))
+            x0, y0 = max(0, x0), max(0, y0)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            run = bytes((index,)) * (x1 - x0)
+            for y in range(y0 * TILE, y1 * TILE, TILE):
+                pixels[y + x0:y + x1] = run
+
+    def png(self, palette):
+        """The tile as an 8-bit palette PNG"""
+        if np is not None:
+            raw = np.hstack((np.zeros((TILE, 1), np.uint8), self.pixels)).tobytes()
+        else:
+            raw = b"".join(b"\0" + self.pixels[y:y + TILE] for y in range(0, TILE * TILE, TILE))
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", TILE, TILE, 8, 3, 0, 0, 0)) +
+                chunk(b"PLTE", b"".join(bytes(color) for color in palette[:256])) +
+                chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def palette(layers):
+    """Colors of the palette indices: the background, then each layer"""
+    colors = [BACKGROUND]
+    for number, layer in enumerate(layers):
+        colors.append(CELL_COLOR if layer == CELLS else DIE_COLOR if layer == DIE else
+                      LAYER_COLORS[number % len(LAYER_COLORS)])
+    return colors
+
+
+def gds_real(data, offset):
+    """8-byte GDSII real: sign, excess-64 base-16 exponent, 56-bit mantissa"""
+    value = int.from_bytes(data[offset:offset + 8], "big")
+    mantissa = (value & ((1 << 56) - 1)) / (1 << 56)
+    exponent = ((value >> 56) & 0x7F) - 64
+    return (-1 if value >> 63 else 1) * mantissa * 16.0 ** exponent
+
+
+def read_gds(path, cancelled=None):
+    """
+    Read a GDSII stream record by record from a memory map, keeping only
+    bounding boxes: polygons become their box and paths a box per segment.
+
+    Parameters:
+        cancelled (callable): Polled now and then; reading stops when it returns True.
+
+    Raises:
+        LayoutError: if the file is not a GDSII stream, or reading was cancelled.
+    """
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise LayoutError(f"{path} is empty")
+    try:
+        return parse_gds(data, path, cancelled)
+    finally:
+        data.close()
+
+
+def parse_gds(data, path, cancelled=None):
+    size = len(data)
+    if size < 4 or data[2] != HEADER:
+        raise LayoutError(f"{path} is not a GDSII stream")
+    unpack_short = struct.Struct(">h").unpack_from
+    unpack_word = struct.Struct(">H").unpack_from
+    cells = {}
+    layers = set()
+    cell = element = None
+    dbu_meters = 1e-9
+    offset = 0
+    records = 0
+    while offset + 4 <= size:
+        records += 1
+        if not records & 0xFFFF and cancelled and cancelled():
+            raise LayoutError("cancelled")
+        length, = unpack_word(data, offset)
+        record = data[offset + 2]
+        body = offset + 4
+        if length < 4:
+            if length == 0:
+                break  # padding after the end of the library
+            raise LayoutError(f"{path}: broken record at byte {offset}")
+        offset += length
+        if record == XY:
+            if element is not None:
+                element["xy"] = struct.unpack_from(f">{(length - 4) // 4}i", data, body)
+        elif record in ELEMENTS:
+            element = {"kind": record, "layer": 0, "datatype": 0, "width": 0, "pathtype": 0,
+                       "strans": 0, "mag": 1.0, "angle": 0.0}
+        elif element is None:
+            if record == STRNAME:
+                name = bytes(data[body:offset]).rstrip(b"\0").decode(errors="replace")
+                cell = cells[name] = Cell(name)
+            elif record == ENDSTR:
+                cell = None
+            elif record == UNITS:
+                dbu_meters = gds_real(data, body + 8)
+            elif record == ENDLIB:
+                break
+        elif record == ENDEL:
+            if cell is not None:
+                add_element(cell, element, layers)
+            element = None
+        elif record == LAYER:
+            element["layer"] = unpack_short(data, body)[0]
+        elif record in (DATATYPE, BOXTYPE, TEXTTYPE):
+            element["datatype"] = unpack_short(data, body)[0]
+        elif record == WIDTH:
+            element["width"] = abs(struct.unpack_from(">i", data, body)[0])  # negative: not scaled by MAG
+        elif record == PATHTYPE:
+            element["pathtype"] = unpack_short(data, body)[0]
+        elif record == SNAME:
+            element["sname"] = bytes(data[body:offset]).rstrip(b"\0").decode(errors="replace")
+        elif record == STRANS:
+            element["strans"] = unpack_word(data, body)[0]
+        elif record == MAG:
+            element["mag"] = gds_real(data, body)
+        elif record == ANGLE:
+            element["angle"] = gds_real(data, body)
+        elif record == COLROW:
+            element["colrow"] = struct.unpack_from(">hh", data, body)
+    order = sorted(layers)
+    return Layout(cells, dbu_meters, [CELLS] + [f"{layer}/{datatype}" for layer, datatype in order])
+
+
+def add_element(cell, element, layers):
+    kind, xy = element["kind"], element.get("xy")
+    if not xy or kind in (TEXT, NODE):
+        return
+    if kind in (BOUNDARY, BOX, PATH):
+        layers.add((element["layer"], element["datatype"]))
+        layer = f"{element['layer']}/{element['datatype']}"
+        if kind == PATH:
+            add_path(cell, layer, xy, element["width"] / 2, element["pathtype"] == 2)
+        else:
+            xs, ys = xy[0::2], xy[1::2]
+            cell.add_rect(layer, min(xs), min(ys), max(xs), max(ys))
+    elif kind == SREF and "sname" in element:
+        cell.add_ref(element["sname"], placement(element["strans"] & REFLECT, element["mag"], element["angle"],
+                                                 xy[0], xy[1]))
+    elif kind == AREF and "sname" in element and len(xy) >= 6:
+        columns, rows = element.get("colrow", (1, 1))
+        columns, rows = max(1, columns), max(1, rows)
+        x, y = xy[0], xy[1]
+        column_step = ((xy[2] - x) / columns, (xy[3] - y) / columns)
+        row_step = ((xy[4] - x) / rows, (xy[5] - y) / rows)
+        for row in range(rows):
+            for column in range(columns):
+                cell.add_ref(element["sname"], placement(element["strans"] & REFLECT, element["mag"], element["angle"],
+                                                         x + column * column_step[0] + row * row_step[0],
+                                                         y + column * column_step[1] + row * row_step[1]))
+
+
+def add_path(cell, layer, xy, half, extend_ends, end_extension=None):
+    """A box per segment of a wire of width 2*half; joints overlap by half a width to close the corners"""
+    points = list(zip(xy[0::2], xy[1::2]))
+    last = len(points) - 2
+    if last < 0:
+        x, y = points[0]
+        cell.add_rect(layer, x - half, y - half, x + half, y + half)
+        return
+    ends = half if extend_ends else 0
+    if end_extension is not None:
+        ends = end_extension
+    for i, ((x0, y0), (x1, y1)) in enumerate(zip(points, points[1:])):
+        start = ends if i == 0 else half
+        stop = ends if i == last else half
+        if y0 == y1:
+            if x0 > x1:
+                x0, x1, start, stop = x1, x0, stop, start
+            cell.add_rect(layer, x0 - start, y0 - half, x1 + stop, y0 + half)
+        elif x0 == x1:
+            if y0 > y1:
+                y0, y1, start, stop = y1, y0, stop, start
+            cell.add_rect(layer, x0 - half, y0 - start, x0 + half, y1 + stop)
+        else:
+            cell.add_rect(layer, min(x0, x1) - half, min(y0, y1) - half, max(x0, x1) + half, max(y0, y1) + half)
+
+
+def read_lef(paths):
+    """
+    Macro sizes and default wire widths of LEF files, in microns.
+
+    Returns:
+        tuple: ({macro: (width, height)}, {layer: width or None}), layers in
+            the order the technology LEF defines them (bottom up).
+    """
+    macros, layers = {}, {}
+    for path in paths:
+        try:
+            file = open(path, "r", errors="replace")
+        except OSError:
+            continue
+        with file:
+            kind = name = None
+            for line in file:
+                words = line.split()
+                if not words:
+                    continue
+                try:
+                    if words[0] == "MACRO" and len(words) > 1:
+                        kind, name = "macro", words[1]
+                    elif words[0] == "LAYER" and len(words) > 1 and kind is None:
+                        kind, name = "layer", words[1]
+                        layers.setdefault(name, None)
+                    elif words[0] == "END" and len(words) > 1 and words[1] == name:
+                        kind = name = None
+                    elif kind == "macro" and words[0] == "SIZE" and len(words) >= 4:
+                        macros[name] = (float(words[1]), float(words[3]))
+                    elif kind == "layer" and words[0] == "WIDTH" and len(words) > 1 and layers[name] is None:
+                        layers[name] = float(words[1])
+                except ValueError:
+                    continue
+    return macros, layers
+
+
+def def_statements(file):
+    """The statements (word lists) of a DEF file; "END SECTION", which has no semicolon, is one too"""
+    statement = []
+    for line in file:
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        for word in words:
+            if statement == ["END"]:
+                yield ["END", word]
+                statement = []
+            elif word == ";":
+                if statement:
+                    yield statement
+                statement = []
+            elif word.endswith(";"):
+                statement.append(word[:-1])
+                yield statement
+                statement = []
+            else:
+                statement.append(word)
+    if statement:
+        yield statement
+
+
+def def_points(words):
+    """Coordinates of the ( x y ) groups of a statement"""
+    numbers = [float(word) for word in words if word not in ("(", ")")]
+    return list(zip(numbers[0::2], numbers[1::2]))
+
+
+def read_def(path, lef_files=(), cancelled=None):
+    """
+    Read the die area, the placed components (as boxes of their LEF size)
+    and the routed wires of the nets and special nets of a DEF file.
+
+    Parameters:
+        lef_files (list): LEF files with the macro sizes and default wire widths.
+        cancelled (callable): Polled now and then; reading stops when it returns True.
+
+    Raises:
+        LayoutError: if the file holds nothing to draw, or reading was cancelled.
+    """
+    macros, lef_layers = read_lef(lef_files)
+    cell = Cell("DEF")
+    units = 100.0
+    section = None
+    seen = []
+    try:
+        with open(path, "r", errors="replace") as file:
+            for number, words in enumerate(def_statements(file)):
+                if not number & 0x3FFF and cancelled and cancelled():
+                    raise LayoutError("cancelled")
+                head = words[0]
+                if head == "END":
+                    section = None
+                elif head == "-":
+                    if section == "COMPONENTS":
+                        add_component(cell, words, macros, units)
+                    elif section in ("NETS", "SPECIALNETS"):
+                        add_routes(cell, words, section == "SPECIALNETS", lef_layers, units, seen)
+                elif section is None:
+                    if head == "UNITS" and len(words) >= 4:
+                        units = float(words[3])
+                    elif head == "DIEAREA":
+                        points = def_points(words[1:])
+                        if points:
+                            xs, ys = [x for x, _ in points], [y for _, y in points]
+                            x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+                            for edge in ((x0, y0, x1, y0), (x0, y1, x1, y1), (x0, y0, x0, y1), (x1, y0, x1, y1)):
+                                cell.add_rect(DIE, *edge)
+                    elif len(words) == 2 and words[1].isdigit():
+                        section = head  # COMPONENTS 123 ; ... END COMPONENTS
+    except ValueError as e:
+        raise LayoutError(f"{path}: {e}")
+    if not cell.rects:
+        raise LayoutError(f"{path} holds no die area, components or wires")
+    routing = [layer for layer in lef_layers if layer in seen] + [layer for layer in seen if layer not in lef_layers]
+    return Layout({cell.name: cell}, 1e-6 / units, [CELLS] + routing + [DIE])
+
+
+def add_component(cell, words, macros, units):
+    for i, word in enumerate(words):
+        if word in ("PLACED", "FIXED", "COVER") and i + 5 < len(words):
+            x, y, orient = float(words[i + 2]), float(words[i + 3]), words[i + 5]
+            width, height = macros.get(words[2], (1.0, 1.0))  # unknown macro: a 1 um square
+            if orient in ("E", "W", "FE", "FW"):
+                width, height = height, width
+            cell.add_rect(CELLS, x, y, x + width * units, y + height * units)
+            return
+
+
+def add_routes(cell, words, special, lef_layers, units, seen):
+    """The wires of one net: each ROUTED/NEW part is a layer, a width and a chain of points and vias"""
+    layer, half, previous = None, 0.0, None
+    i, count = 0, len(words)
+    while i < count:
+        word = words[i]
+        if word in ("ROUTED", "FIXED", "COVER", "NOSHIELD", "NEW") and i + 1 < count:
+            layer, previous = words[i + 1], None
+            i += 2
+            if layer not in seen:
+                seen.append(layer)
+            half = (lef_layers.get(layer) or 0) * units / 2
+            if special and i < count and words[i].replace(".", "", 1).isdigit():
+                half = float(words[i]) / 2
+                i += 1
+            continue
+        if word == "RECT" and i + 1 < count:
+            if words[i + 1] == "(" and previous and layer:  # ( dx0 dy0 dx1 dy1 ) around the last point
+                dx0, dy0, dx1, dy1 = (float(value) for value in words[i + 2:i + 6])
+                cell.add_rect(layer, previous[0] + dx0, previous[1] + dy0, previous[0] + dx1, previous[1] + dy1)
+                i += 7
+                continue
+            if words[i + 1] != "(":  # + RECT layer ( x0 y0 ) ( x1 y1 ) of a special net
+                (x0, y0), (x1, y1) = def_points(words[i + 2:i + 10])
+                if words[i + 1] not in seen:
+                    seen.append(words[i + 1])
+                cell.add_rect(words[i + 1], min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+                i += 10
+                continue
+        if word == "(" and layer and ")" in words[i:]:
+            close = words.index(")", i)
+            values = words[i + 1:close]
+            try:
+                x = previous[0] if values[0] == "*" and previous else float(values[0])
+                y = previous[1] if values[1] == "*" and previous else float(values[1])
+                extension = float(values[2]) if len(values) > 2 and values[2] != "*" else None
+            except (IndexError, ValueError):
+                i = close + 1  # ( component pin ) and the like
+                continue
+            if previous is not None:
+                add_path(cell, layer, (previous[0], previous[1], x, y), half, not special, extension)
+            previous = (x, y)
+            i = close + 1
+            continue
+        i += 1  # vias, SHAPE, MASK, STYLE and the rest of the net leave the chain where it is
+
+
+def prune(cache_dir, keep):
+    """Remove the tiles of all but the keep most recently opened layouts"""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_dir():
+            try:
+                used = os.stat(os.path.join(entry.path, "meta.json")).st_mtime
+            except OSError:
+                used = 0
+            entries.append((used, entry.path))
+    for _, path in sorted(entries, reverse=True)[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class LayoutPreview:
+    """
+    Tiles of one GDS or DEF file at every zoom level, kept on disk.
+
+    Level 0 shows the whole layout in one TILE x TILE tile and every level
+    doubles the resolution. A tile is drawn the first time it is asked for
+    and stored under the file's size and modification time, so reopening a
+    layout shows what was drawn before at once; the file itself is only read
+    when a tile was never drawn.
+
+    Parameters:
+        path (str): The .gds or .def file.
+        cache_dir (str): Directory for the tiles of all layouts.
+        lef_files (list): LEF files with the macro sizes and wire widths a DEF needs.
+    """
+
+    def __init__(self, path, cache_dir, lef_files=()):
+        self.path = path
+        self.lef_files = list(lef_files)
+        self.cache_dir = cache_dir
+        self.layout = None
+        self.meta = None
+        self.cancelled = False  # set from another thread to stop reading the file
+        st = os.stat(path)
+        key = f"{CACHE_VERSION}\0{os.path.realpath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+        self.dir = os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+    def open(self):
+        """
+        Load the description of the layout, from the cache or else from the file.
+
+        Returns:
+            bool: True if it came from the cache (nothing was read).
+
+        Raises:
+            LayoutError: if the file cannot be read as a layout.
+        """
+        meta_path = os.path.join(self.dir, "meta.json")
+        try:
+            with open(meta_path, "r") as file:
+                self.meta = json.load(file)
+            os.utime(meta_path)  # recently used, for prune()
+            return True
+        except (OSError, ValueError):
+            pass
+        self.read()
+        layout = self.layout
+        x0, y0, x1, y1 = layout.bbox
+        scale = max(x1 - x0, y1 - y0, 1) / TILE
+        levels = 1
+        while levels < MAX_LEVELS and scale / 2 ** levels * layout.dbu_meters >= MIN_PIXEL_METERS:
+            levels += 1
+        self.meta = {"source": self.path, "bbox": list(layout.bbox), "scale": scale, "levels": levels,
+                     "layers": layout.layers, "dbu_meters": layout.dbu_meters}
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{meta_path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.meta, file)
+        os.replace(tmp, meta_path)
+        prune(self.cache_dir, CACHE_KEEP)
+        return False
+
+    def read(self):
+        if self.path.lower().endswith(".def"):
+            self.layout = read_def(self.path, self.lef_files, lambda: self.cancelled)
+        else:
+            self.layout = read_gds(self.path, lambda: self.cancelled)
+
+    @property
+    def levels(self):
+        return self.meta["levels"]
+
+    @property
+    def layers(self):
+        return self.meta["layers"]
+
+    def scale(self, level):
+        """Database units per pixel"""
+        return self.meta["scale"] / 2 ** level
+
+    def tiles(self, level):
+        """(columns, rows) of tiles at a level"""
+        x0, y0, x1, y1 = self.meta["bbox"]
+        span = TILE * self.scale(level)
+        return max(1, math.ceil((x1 - x0) / span)), max(1, math.ceil((y1 - y0) / span))
+
+    def position(self, level, x, y):
+        """Layout coordinates in microns of pixel (x, y) at a level, counted from the top left"""
+        scale = self.scale(level)
+        microns = self.meta["dbu_meters"] * 1e6
+        return ((self.meta["bbox"][0] + x * scale) * microns, (self.meta["bbox"][3] - y * scale) * microns)
+
+    def tile(self, level, x, y, hidden=()):
+        """
+        PNG of one tile, drawn now if it is not cached, or None outside the layout.
+
+        Parameters:
+            hidden (iterable): Layers left out.
+        """
+        columns, rows = self.tiles(level)
+        if not (0 <= level < self.levels and 0 <= x < columns and 0 <= y < rows):
+            return None
+        hidden = sorted(hidden)
+        variant = hashlib.sha1("\0".join(hidden).encode()).hexdigest()[:12] if hidden else "all"
+        path = os.path.join(self.dir, variant, str(level), f"{x}_{y}.png")
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except OSError:
+            pass
+        if self.layout is None:
+            self.read()
+        scale = self.scale(level)
+        left, top = self.meta["bbox"][0] + x * TILE * scale, self.meta["bbox"][3] - y * TILE * scale
+        raster = self.layout.render((left, top - TILE * scale, left + TILE * scale, top), scale, hidden)
+        data = raster.png(palette(self.layers))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+        return data
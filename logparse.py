@@ -0,0 +1,128 @@
+import codecs
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+# Bash prints the prompt without a trailing newline (user@host:~/dir$ or # for root)
+PROMPT_RE = re.compile(r"[$#] $")
+
+# One precompiled pattern for every message format we care about:
+#   OpenROAD tools   [ERROR GRT-0116] ... / [WARNING STA-1234] ...
+#   Yosys            ERROR: ... / Warning: ...
+#   anything else    lines mentioning error/fail (the old keyword check)
+MESSAGE_RE = re.compile(
+    r"\[(?P<sev>ERROR|WARNING|CRITICAL)\s+(?P<tool>[A-Z][A-Z0-9]*)-\d+\]"
+    r"|^(?P<ysev>ERROR|Warning):"
+    r"|(?P<word>error|Error|fail|Failed)"
+)
+
+SEVERITY_COLORS = {
+    "error": "red",
+    "warning": "orange",
+}
+
+
+def classify(line):
+    """
+    Classifies a single line of tool output.
+
+    Returns:
+        tuple: (severity, tool) where severity is "error" or "warning" and tool
+        is the message prefix (e.g. "GRT", "YOSYS") or None, or None if the line
+        is not a diagnostic.
+    """
+    # Cheap substring gate first: most lines are not diagnostics and "in" is far
+    # faster than letting the regex engine try every position of the line
+    if not ("rror" in line or "RROR" in line or "fail" in line or "Fail" in line or "arn" in line or "ARN" in line or "CRIT" in line):
+        return None
+    match = MESSAGE_RE.search(line)
+    if match is None:
+        return None
+    sev = match.group("sev")
+    if sev:
+        return ("warning" if sev == "WARNING" else "error"), match.group("tool")
+    ysev = match.group("ysev")
+    if ysev:
+        return ("error" if ysev == "ERROR" else "warning"), "YOSYS"
+    return "error", None
+
+
+class LineFramer:
+    """
+    Turns a stream of raw output chunks into complete lines.
+
+    Chunks from readAllStandardOutput() can end anywhere (mid line, even mid
+    UTF-8 character), so the incomplete tail is carried over to the next feed().
+    """
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.partial = ""
+
+    def feed(self, data):
+        """Returns the complete lines contained in data plus any carried tail"""
+        text = self.partial + self.decoder.decode(data)
+        lines = text.split("\n")
+        self.partial = lines.pop()
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    def take_prompt(self):
+        """Returns and clears the carried tail if it is a shell prompt waiting for input"""
+        if self.partial and PROMPT_RE.search(self.partial):
+            prompt, self.partial = self.partial, ""
+            return prompt
+        return None
+
+    def flush(self):
+        """Returns whatever is left over (e.g. when the process exits)"""
+        rest = self.partial + self.decoder.decode(b"", final=True)
+        self.partial = ""
+        return rest
+
+
+class MessageIndex:
+    """
+    Line number -> severity/tool index of the diagnostics seen in a log.
+
+    Line numbers only ever grow, so each severity keeps a sorted list that can be
+    searched with bisect to jump to the next/previous message without rescanning.
+    """
+
+    def __init__(self):
+        self.lines = {"error": [], "warning": []}
+        self.tools = {}  # line number -> tool
+        self.counts = Counter()  # (severity, tool) -> count
+
+    def add(self, line_no, severity, tool):
+        self.lines[severity].append(line_no)
+        self.tools[line_no] = tool
+        self.counts[(severity, tool)] += 1
+
+    def total(self, severity):
+        return len(self.lines[severity])
+
+    def tool_counts(self, severity):
+        """Returns {tool: count} for one severity, most frequent first"""
+        counts = [(tool or "other", n) for (sev, tool), n in self.counts.items() if sev == severity]
+        return dict(sorted(counts, key=lambda item: -item[1]))
+
+    def next_line(self, severity, after):
+        """First message line of this severity after line 'after', wrapping around"""
+        lines = self.lines[severity]
+        if not lines:
+            return None
+        i = bisect_right(lines, after)
+        return lines[i] if i < len(lines) else lines[0]
+
+    def prev_line(self, severity, before):
+        """Last message line of this severity before line 'before', wrapping around"""
+        lines = self.lines[severity]
+        if not lines:
+            return None
+        i = bisect_left(lines, before)
+        return lines[i - 1] if i > 0 else lines[-1]
+
+    def clear(self):
+        self.lines = {"error": [], "warning": []}
+        self.tools.clear()
+        self.counts.clear()
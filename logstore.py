@@ -0,0 +1,359 @@
+import html
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from collections import OrderedDict
+
+BLOCK_LINES = 2000      # lines per compressed block
+BLOCK_BYTES = 256 << 10  # or this much text, whichever comes first
+CACHED_BLOCKS = 16      # decompressed blocks a reader keeps
+
+INDEX_RECORD = struct.Struct("<QII")   # data offset, compressed size, line count
+MESSAGE_RECORD = struct.Struct("<IB")  # line number, severity
+SEVERITY_CODES = {"error": 1, "warning": 2}
+SEVERITY_NAMES = {code: name for name, code in SEVERITY_CODES.items()}
+
+TAG_RE = re.compile(r"<[^>]+>")
+SLUG_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def html_to_text(text):
+    """Plain text of a decoText() message"""
+    return html.unescape(TAG_RE.sub("", text.replace("<br>", " ")))
+
+
+class LogWriter:
+    """
+    Appends the lines of one run to its files in the store.
+
+    Lines are buffered until a block is full and then written as one zlib
+    stream; the block is recorded in the .idx sidecar (offset, size, line
+    count) only after its data is written, so a reader, or the next session
+    after a crash, never sees a block that is not there. Lines classified as
+    errors or warnings are listed in the .msg sidecar. Only the current block
+    is held in memory, however long the run gets.
+    """
+
+    def __init__(self, store, run_id, name):
+        self.store = store
+        self.run_id = run_id
+        self.meta = {"name": name, "started": time.time(), "finished": None, "exit_code": None,
+                     "lines": 0, "errors": 0, "warnings": 0}
+        base = os.path.join(store.root, run_id)
+        self.data = open(base + ".logz", "ab")
+        self.index = open(base + ".idx", "ab")
+        self.messages = open(base + ".msg", "ab")
+        self.block = []
+        self.block_bytes = 0
+        self.block_messages = []
+        self.last_flush = time.monotonic()
+        self.closed = False
+        self.write_meta()
+
+    def write_meta(self):
+        self.store.write_meta(self.run_id, self.meta)
+
+    def append(self, line, severity=None):
+        if self.closed:
+            return
+        if severity:
+            self.block_messages.append(MESSAGE_RECORD.pack(self.meta["lines"], SEVERITY_CODES[severity]))
+            self.meta["errors" if severity == "error" else "warnings"] += 1
+        self.block.append(line)
+        self.block_bytes += len(line) + 1
+        self.meta["lines"] += 1
+        if len(self.block) >= BLOCK_LINES or self.block_bytes >= BLOCK_BYTES:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.block:
+            return
+        payload = zlib.compress(("\n".join(self.block) + "\n").encode(errors="replace"), 1)
+        offset = self.data.tell()
+        self.data.write(payload)
+        self.data.flush()
+        if self.block_messages:
+            self.messages.write(b"".join(self.block_messages))
+            self.messages.flush()
+        self.index.write(INDEX_RECORD.pack(offset, len(payload), len(self.block)))
+        self.index.flush()
+        self.block = []
+        self.block_bytes = 0
+        self.block_messages = []
+
+    def flush_if_idle(self, seconds):
+        """Flush a partial block that has been waiting for more than seconds"""
+        if self.block and time.monotonic() - self.last_flush > seconds:
+            self.flush()
+            self.write_meta()
+
+    def close(self, exit_code=None):
+        if self.closed:
+            return
+        self.flush()
+        self.meta["finished"] = time.time()
+        self.meta["exit_code"] = exit_code
+        self.write_meta()
+        for file in (self.data, self.index, self.messages):
+            file.close()
+        self.closed = True
+        self.store.writers.pop(self.run_id, None)
+
+
+class LogReader:
+    """
+    Random access to a stored run: line_count() and lines(first, count) (the
+    line source interface of the GUI's paged view), search() and messages().
+    Only the blocks that are looked at are decompressed, and a few of them are
+    kept. refresh() picks up blocks a live writer added since.
+    """
+
+    def __init__(self, store, run_id):
+        self.store = store
+        self.run_id = run_id
+        base = os.path.join(store.root, run_id)
+        self.data_path = base + ".logz"
+        self.index_path = base + ".idx"
+        self.messages_path = base + ".msg"
+        self.blocks = []  # [(offset, size, first line, line count)]
+        self.total = 0
+        self.index_read = 0
+        self.cache = OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        """Load index records written since the last call; True if there were any"""
+        try:
+            with open(self.index_path, "rb") as file:
+                file.seek(self.index_read)
+                data = file.read()
+        except OSError:
+            return False
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        for offset, size, count in INDEX_RECORD.iter_unpack(data[:usable]):
+            self.blocks.append((offset, size, self.total, count))
+            self.total += count
+        self.index_read += usable
+        return usable > 0
+
+    def line_count(self):
+        return self.total
+
+    def block_of(self, line):
+        low, high = 0, len(self.blocks) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.blocks[middle][2] <= line:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def block_lines(self, number):
+        lines = self.cache.get(number)
+        if lines is not None:
+            self.cache.move_to_end(number)
+            return lines
+        offset, size = self.blocks[number][:2]
+        with open(self.data_path, "rb") as file:
+            file.seek(offset)
+            text = zlib.decompress(file.read(size)).decode(errors="replace")
+        lines = text[:-1].split("\n") if text.endswith("\n") else text.split("\n")
+        self.cache[number] = lines
+        if len(self.cache) > CACHED_BLOCKS:
+            self.cache.popitem(last=False)
+        return lines
+
+    def lines(self, first, count):
+        out = []
+        line = first
+        end = min(first + count, self.total)
+        while line < end:
+            number = self.block_of(line)
+            block_first = self.blocks[number][2]
+            lines = self.block_lines(number)
+            take = lines[line - block_first:end - block_first]
+            out.extend(take)
+            line += len(take) or 1
+        return out
+
+    def messages(self, severity=None):
+        """Line numbers of indexed errors/warnings (all of them if severity is None)"""
+        try:
+            with open(self.messages_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return []
+        data = data[:len(data) - len(data) % MESSAGE_RECORD.size]
+        code = SEVERITY_CODES.get(severity)
+        return [line for line, sev in MESSAGE_RECORD.iter_unpack(data) if code is None or sev == code]
+
+    def search(self, regex, start=0, backwards=False):
+        """
+        Next line at or after start (or before it, backwards) matching a compiled
+        regular expression.
+
+        Returns:
+            tuple: (line, first column, last column), or None.
+        """
+        if not self.blocks or (not backwards and start >= self.total):
+            return None
+        number = self.block_of(min(start, self.total - 1))
+        step = -1 if backwards else 1
+        while 0 <= number < len(self.blocks):
+            first = self.blocks[number][2]
+            lines = self.block_lines(number)
+            rows = range(len(lines) - 1, -1, -1) if backwards else range(len(lines))
+            for row in rows:
+                line = first + row
+                if (backwards and line >= start) or (not backwards and line < start):
+                    continue
+                match = regex.search(lines[row])
+                if match:
+                    return line, match.start(), match.end()
+            number += step
+        return None
+
+    def find_all(self, regex, limit):
+        """[(line, text)] of the first limit matching lines; blocks without a match cost one regex pass"""
+        found = []
+        for number, (offset, size, first, count) in enumerate(self.blocks):
+            lines = self.block_lines(number)
+            if not regex.search("\n".join(lines)):
+                continue
+            for row, text in enumerate(lines):
+                if regex.search(text):
+                    found.append((first + row, text))
+                    if len(found) >= limit:
+                        return found
+        return found
+
+
+class LogStore:
+    """
+    Directory of per-run compressed logs (<run>.logz, .idx, .msg and .json).
+
+    Every run (the shell session, each build job) gets its own files. Old runs
+    are removed when a new one starts and there are more than max_runs of
+    them or they take more than max_bytes; runs still being written are
+    never removed.
+
+    Parameters:
+        root (str): Directory of the store.
+        max_runs (int): Runs kept.
+        max_bytes (int): Disk space the stored runs may use.
+    """
+
+    def __init__(self, root, max_runs=200, max_bytes=500 << 20):
+        self.root = root
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self.writers = {}
+        self.counter = 0
+        os.makedirs(root, exist_ok=True)
+
+    def write_meta(self, run_id, meta):
+        path = os.path.join(self.root, run_id + ".json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def open_run(self, name):
+        """Start a new run and return its LogWriter"""
+        self.counter += 1
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.counter}-{SLUG_RE.sub('_', name)[:60]}"
+        writer = LogWriter(self, run_id, name)
+        self.writers[run_id] = writer
+        self.prune()
+        return writer
+
+    def runs(self):
+        """[(run_id, meta)] newest first; runs interrupted by a crash have finished None and no writer"""
+        runs = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path, "r") as file:
+                        meta = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                run_id = entry.name[:-len(".json")]
+                writer = self.writers.get(run_id)
+                runs.append((run_id, writer.meta if writer else meta))
+        runs.sort(key=lambda run: run[1].get("started") or 0, reverse=True)
+        return runs
+
+    def run_bytes(self, run_id):
+        total = 0
+        for suffix in (".logz", ".idx", ".msg", ".json"):
+            try:
+                total += os.path.getsize(os.path.join(self.root, run_id + suffix))
+            except OSError:
+                pass
+        return total
+
+    def remove(self, run_id):
+        for suffix in (".logz", ".idx", ".msg", ".json"):
+            try:
+                os.remove(os.path.join(self.root, run_id + suffix))
+            except FileNotFoundError:
+                pass
+
+    def prune(self):
+        """Remove the oldest finished runs beyond max_runs / max_bytes. Returns the number removed."""
+        runs = self.runs()
+        sizes = {run_id: self.run_bytes(run_id) for run_id, _ in runs}
+        total = sum(sizes.values())
+        removed = 0
+        for position, (run_id, meta) in reversed(list(enumerate(runs))):
+            if position < self.max_runs and total <= self.max_bytes:
+                break
+            if run_id in self.writers:
+                continue
+            self.remove(run_id)
+            total -= sizes[run_id]
+            removed += 1
+        return removed
+
+    def flush_idle(self, seconds):
+        """Write out the partial blocks of open runs that have been quiet for a while"""
+        for writer in list(self.writers.values()):
+            writer.flush_if_idle(seconds)
+
+    def close_all(self):
+        for writer in list(self.writers.values()):
+            writer.close()
+
+    def reader(self, run_id):
+        """LogReader of a run, with what its live writer still buffers flushed first (writer's thread only)"""
+        writer = self.writers.get(run_id)
+        if writer:
+            writer.flush()
+        return LogReader(self, run_id)
+
+    def search(self, pattern, limit=1000, ignore_case=False):
+        """
+        Matching lines across all stored runs, newest run first.
+
+        Safe to run in a background thread: it only reads what the index
+        holds and leaves the live writers alone, so lines they still buffer
+        are not searched unless they were flushed (flush_idle(0)) beforehand.
+
+        Returns:
+            list: (run_id, meta, line, text) tuples, at most limit of them.
+
+        Raises:
+            re.error: for an invalid pattern.
+        """
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        found = []
+        for run_id, meta in self.runs():
+            for line, text in LogReader(self, run_id).find_all(regex, limit - len(found)):
+                found.append((run_id, meta, line, text))
+            if len(found) >= limit:
+                break
+        return found
@@ -1,15 +1,55 @@
 import sys
 import os
-import shutil
-import requests
 import re
-import json
-from PyQt6.QtWidgets import QSizePolicy,QLineEdit,QApplication,QDialog,QFileDialog,QGraphicsDropShadowEffect, QMainWindow, QTextEdit, QSplitter, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLabel, QWidget,QToolButton, QMenu
-from PyQt6.QtCore import Qt,QProcess,QProcessEnvironment  # Import Qt for alignment
-from PyQt6.QtGui import QAction
+import time
+import glob
+from functools import lru_cache
+from collections import OrderedDict, deque
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--batch"]:
+    # Batch mode (python3 main.py --batch ...) runs cli.py and never loads Qt
+    import cli
+    sys.exit(cli.main(sys.argv[2:]))
+
+from PyQt6.QtWidgets import QSizePolicy,QLineEdit,QAbstractScrollArea,QCheckBox,QDoubleSpinBox,QSpinBox,QApplication,QDialog,QFileDialog,QGraphicsDropShadowEffect, QMainWindow, QTextEdit, QPlainTextEdit, QSplitter, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QListWidgetItem, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLabel, QWidget,QToolButton, QMenu
+from PyQt6.QtCore import Qt,QObject,QFileSystemWatcher,QProcess,QProcessEnvironment,QRect,QTimer,QThread,pyqtSignal  # Import Qt for alignment
+from PyQt6.QtGui import QAction,QColor,QFont,QIcon,QPainter,QPixmap,QTextCharFormat,QTextCursor
+from catalog import DesignCatalog
+from core import CoreError, FlowProject, make_args
+from history import RunHistory
+from jobqueue import FINISHED, KILL_DELAY, JobQueue, last_completed_stage
+from mapped_file import MappedFile
+from procmon import ProcessMonitor, format_bytes
+from makevars import EVALUATION_ERRORS, flow_variables
+from logstore import LogStore, html_to_text
+from logparse import LineFramer, MessageIndex, SEVERITY_COLORS, classify
+from manifest import STAGES
+from runner import SENTINEL_RE, SHELL_SETUP, StepResult, format_duration
+from settings_store import SettingsStore
+from updates import UpdateCheck
 
 filepath = ""
 
+@lru_cache(maxsize=None)
+def linux_distribution():
+    """Name of the Linux distribution (False when /etc/os-release is missing), read once"""
+    try:
+        # with open("/etc/os-release") as f:
+        #     return any("ubuntu" in line.lower() for line in f)
+        with open("/etc/os-release") as f:
+            content = f.read().lower()  # Read all content and convert to lowercase
+
+            if "ubuntu" in content:
+                return "Ubuntu"
+            elif "centos" in content:
+                return "CentOS"
+            elif "debian" in content:
+                return "Debian"
+            else:
+                return "Unknown Linux distribution"
+    except FileNotFoundError:
+        return False
+
 def decoText(message,col="white",fsize="100%",bold="normal",underline="none",italic="none"):
     message = message.replace('\n', '<br>')
     # return f'<span style=\"color:{col};font-size: {fsize}; font-weight: {bold};text-decoration: {underline};font-style: {italic};\">{message}</span>'
@@ -65,13 +105,11 @@ class SettingsWindow(QDialog):
         self.theme_label = QLabel("Select Theme:")
         self.theme_dropdown = QComboBox()
 
-        #Load Settings from file
-        with open(filepath+"settings.json",'r') as file:
-            data = json.load(file)
+        #Settings are shared through the main window's store
+        self.settings = parent.settings
+        self.themes = list(self.settings.get("themes"))
 
-        self.themes = data["themes"]
-
-        self.theme_dropdown.addItems([theme["name"] for theme in data["themes"]])
+        self.theme_dropdown.addItems([theme["name"] for theme in self.themes])
         self.theme_dropdown.currentTextChanged.connect(self.change_theme)  # Apply theme on selection change
         # self.theme_dropdown.move(self.theme_dropdown.currentIndex(),0)
                     
@@ -119,21 +157,794 @@ class SettingsWindow(QDialog):
                 self.parent().setStyleSheet(el["data"])
                 self.parent().activeStyle = el["data"]
 
-        #Load Settings from file
-        with open(filepath+"settings.json",'w+') as file:
-            # print(data)
-
-            for el in self.themes:
-                if el["name"] == theme:
-                    sel = el
-            self.themes.insert(0,self.themes.pop(self.themes.index(sel)))
-            data = self.parent().data
-            data["themes"] = self.themes
-            json.dump(data,file,indent=4)
+        #Last used theme goes first; the store writes the file after a short delay
+        for el in self.themes:
+            if el["name"] == theme:
+                sel = el
+        self.themes.insert(0,self.themes.pop(self.themes.index(sel)))
+        self.settings.set("themes", list(self.themes))
         
         self.parent().log("Theme Applied!")
         # print("Settings Applied!")  # Debugging message
 
+# Background release lookup so the window never waits on the network
+class UpdateCheckThread(QThread):
+    found = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, checker, parent=None):
+        super().__init__(parent)
+        self.checker = checker
+
+    def run(self):
+        try:
+            self.found.emit(self.checker.latest())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+# Sources env.sh in a helper process without blocking the GUI
+class FlowEnvThread(QThread):
+    captured = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, flow_env, parent=None):
+        super().__init__(parent)
+        self.flow_env = flow_env
+
+    def run(self):
+        try:
+            self.flow_env.capture()
+            self.captured.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ImportThread(QThread):
+    progress = pyqtSignal(int, int, str)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, core, source, platform, design, parent=None):
+        super().__init__(parent)
+        self.core = core
+        self.source = source
+        self.platform = platform
+        self.design = design
+
+    def run(self):
+        try:
+            self.done.emit(self.core.import_design(self.source, self.platform, self.design, self.progress.emit))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+# Keeps the design catalog current from file system events instead of rescans
+class CatalogWatcher(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.pending = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.path_changed)
+        self.watcher.fileChanged.connect(self.path_changed)
+        # A flow run touches the results directories many times; apply in batches
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(300)
+        self.timer.timeout.connect(self.apply)
+
+    def start(self):
+        if self.catalog.load():
+            self.changed.emit()  # last session's index, before anything is checked
+        changed = self.catalog.refresh()
+        self.catalog.save()
+        self.update_watched()
+        if changed or not self.catalog.designs:
+            self.changed.emit()
+
+    def path_changed(self, path):
+        self.pending.add(path)
+        self.timer.start()
+
+    def apply(self):
+        paths, self.pending = self.pending, set()
+        catalog = self.catalog
+        changed = False
+        if any(path in (catalog.designs_dir, catalog.platforms_dir, catalog.results_dir) for path in paths):
+            changed = bool(catalog.refresh())
+        else:
+            platforms = set()
+            designs = set()
+            for path in paths:
+                platform, design = catalog.locate(path)
+                if design:
+                    designs.add((platform, design))
+                elif platform:
+                    platforms.add(platform)
+            for platform in platforms:
+                changed = catalog.refresh_platform(platform) or changed
+            for platform, design in designs:
+                if platform not in platforms:
+                    changed = catalog.refresh_design(platform, design) or changed
+        catalog.save()
+        self.update_watched()  # replaced files drop out of the watcher, new designs come in
+        if changed:
+            self.changed.emit()
+
+    def update_watched(self):
+        wanted = set(self.catalog.watch_paths())
+        current = set(self.watcher.files()) | set(self.watcher.directories())
+        if current - wanted:
+            self.watcher.removePaths(list(current - wanted))
+        if wanted - current:
+            self.watcher.addPaths(list(wanted - current))
+
+# Per-stage runtime/memory trend of one design and platform
+class HistoryWindow(QDialog):
+    COLUMNS = ["Stage", "Runs", "Latest", "Baseline", "Change", "Peak memory", "Trend"]
+
+    def __init__(self, main_window, design=None, platform=None):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.setWindowTitle("Run History")
+        self.resize(760, 420)
+        layout = QVBoxLayout()
+
+        self.design_dropdown = QComboBox()
+        self.pairs = main_window.history.designs()
+        self.design_dropdown.addItems([f"{design} / {platform}" for design, platform in self.pairs])
+        if (design, platform) in self.pairs:
+            self.design_dropdown.setCurrentIndex(self.pairs.index((design, platform)))
+        self.design_dropdown.currentIndexChanged.connect(self.refresh)
+        layout.addWidget(self.design_dropdown)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        self.table.setRowCount(0)
+        if not self.pairs:
+            self.summary.setText("No runs recorded yet")
+            return
+        design, platform = self.pairs[self.design_dropdown.currentIndex()]
+        settings = self.main_window.settings
+        threshold = settings.get("history_slowdown_percent")
+        trends = self.main_window.history.trends(design, platform, window=settings.get("history_baseline_runs"),
+                                                 threshold=threshold)
+        for row, trend in enumerate(trends):
+            change = trend["change"]
+            cells = [trend["stage"], str(trend["runs"]), format_duration(trend["latest"]),
+                     format_duration(trend["baseline"]), "-" if change is None else f"{change:+.1f}%",
+                     f"{trend['peak_kb'] / 1024:.0f} MB", trend["spark"]]
+            self.table.insertRow(row)
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if trend["slower"]:
+                    item.setForeground(QColor("red"))
+                self.table.setItem(row, column, item)
+        slower = [trend["stage"] for trend in trends if trend["slower"]]
+        self.summary.setText(f"Slower than baseline by more than {threshold}%: {', '.join(slower)}" if slower
+                             else "All stages within baseline")
+
+# Runs a function off the GUI thread and hands back its result
+class TaskThread(QThread):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, fn, parent=None):
+        super().__init__(parent)
+        self.fn = fn
+
+    def run(self):
+        try:
+            self.done.emit(self.fn())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+# Draws only the visible lines of a line source (anything with line_count() and lines(first, count))
+class PagedView(QAbstractScrollArea):
+    MAX_CHARS = 4000  # longer lines are cut off when drawn
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.highlight = None  # (line, first column, last column) of the current match
+        self.widest = 0
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.setFont(font)
+        self.update_range()
+
+    def page_lines(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def update_range(self):
+        lines = self.source.line_count()
+        page = self.page_lines()
+        self.verticalScrollBar().setRange(0, max(0, lines - page + 1))
+        self.verticalScrollBar().setPageStep(page)
+        self.horizontalScrollBar().setRange(0, max(0, self.widest - self.viewport().width() // 2))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_range()
+
+    def scroll_to_line(self, line):
+        self.verticalScrollBar().setValue(max(0, line - self.page_lines() // 3))
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        height = metrics.height()
+        char_width = metrics.horizontalAdvance("M")
+        first = self.verticalScrollBar().value()
+        lines = self.source.lines(first, self.page_lines() + 1)
+        gutter = char_width * (len(str(first + len(lines))) + 2)
+        x = gutter - self.horizontalScrollBar().value()
+
+        painter.setClipRect(gutter, 0, self.viewport().width() - gutter, self.viewport().height())
+        for row, text in enumerate(lines):
+            text = text[:self.MAX_CHARS].expandtabs(8)
+            self.widest = max(self.widest, len(text) * char_width)
+            if self.highlight and self.highlight[0] == first + row:
+                _, start, end = self.highlight
+                painter.fillRect(x + start * char_width, row * height, max(1, end - start) * char_width, height,
+                                 QColor(255, 200, 0, 120))
+            painter.drawText(x, row * height + metrics.ascent(), text)
+
+        painter.setClipping(False)
+        painter.fillRect(0, 0, gutter - char_width // 2, self.viewport().height(), self.palette().alternateBase())
+        painter.setPen(QColor("gray"))
+        for row in range(len(lines)):
+            painter.drawText(0, row * height + metrics.ascent(), f"{first + row + 1:>{len(str(first + len(lines)))}}")
+        painter.end()
+
+# Read-only tab for files too large for the editor, memory-mapped and indexed in the background
+class FileViewer(QWidget):
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.mapped = MappedFile(path)
+        self.pattern = None
+        self.match = None  # (start, end) byte offsets of the current match
+        self.pending_match = None  # match found beyond the indexed part
+
+        layout = QVBoxLayout()
+        bar = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Regular expression")
+        self.search_edit.returnPressed.connect(lambda: self.find(False))
+        self.case_box = QCheckBox("Aa")
+        self.case_box.setToolTip("Match case")
+        self.case_box.setChecked(True)
+        previous_button = QPushButton("▲")
+        previous_button.setToolTip("Find previous")
+        previous_button.clicked.connect(lambda: self.find(True))
+        next_button = QPushButton("▼")
+        next_button.setToolTip("Find next")
+        next_button.clicked.connect(lambda: self.find(False))
+        self.status_label = QLabel()
+        bar.addWidget(self.search_edit,6)
+        bar.addWidget(self.case_box,1)
+        bar.addWidget(previous_button,1)
+        bar.addWidget(next_button,1)
+        bar.addWidget(self.status_label,4)
+        layout.addLayout(bar)
+        self.view = PagedView(self.mapped)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+
+        # Lines become visible as the index grows; the view is polled, not signalled per chunk
+        self.index_thread = TaskThread(self.mapped.build_index, self)
+        self.index_thread.finished.connect(self.poll)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(200)
+        self.poll_timer.timeout.connect(self.poll)
+        self.index_thread.start()
+        self.poll_timer.start()
+        self.poll()
+
+    def poll(self):
+        mapped = self.mapped
+        self.view.update_range()
+        self.view.viewport().update()
+        if mapped.complete:
+            self.poll_timer.stop()
+            self.status_label.setText(f"{mapped.line_count():,} lines, {mapped.size / 1e6:.1f} MB (read-only)")
+        else:
+            self.status_label.setText(f"Indexing {mapped.indexed * 100 // max(1, mapped.size)}%, "
+                                      f"{mapped.line_count():,} lines so far")
+        if self.pending_match and mapped.line_of(self.pending_match[0]) is not None:
+            self.show_match(self.pending_match)
+
+    def find(self, backwards):
+        pattern = self.search_edit.text()
+        if not pattern:
+            return
+        if pattern != self.pattern:
+            self.pattern = pattern
+            self.match = None  # a new expression starts from the top
+        if self.match is None:
+            start = self.mapped.size if backwards else 0
+        elif backwards:
+            start = self.match[0]
+        else:
+            start = max(self.match[1], self.match[0] + 1)  # step over empty matches
+        try:
+            match = self.mapped.search(pattern, start, backwards, not self.case_box.isChecked())
+        except re.error as e:
+            self.status_label.setText(f"Invalid expression: {e}")
+            return
+        if match is None:
+            self.status_label.setText("No more matches" if self.match else "No match")
+            return
+        self.show_match(match)
+
+    def show_match(self, match):
+        start, end = match
+        line = self.mapped.line_of(start)
+        if line is None:
+            self.pending_match = match
+            self.status_label.setText("Match is past the indexed part, indexing…")
+            return
+        self.pending_match = None
+        self.match = match
+        first = self.mapped.column_of(start, line)
+        self.view.highlight = (line, first, first + len(self.mapped.map[start:end].decode(errors="replace")))
+        self.view.scroll_to_line(line)
+        self.status_label.setText(f"Line {line + 1:,}")
+
+    def close_file(self):
+        self.poll_timer.stop()
+        self.mapped.cancelled = True
+        self.index_thread.wait()
+        self.mapped.close()
+
+# Pans and zooms over the tiles of a LayoutPreview; tiles are drawn in the background as they come into view
+class LayoutView(QWidget):
+    BATCH = 6           # tiles per background task, so a view that moved on is noticed soon
+    MAX_PIXMAPS = 512   # tiles kept in memory
+
+    moved = pyqtSignal(str)   # layout coordinates under the mouse
+    failed = pyqtSignal(str)
+
+    def __init__(self, preview, parent=None):
+        super().__init__(parent)
+        self.preview = preview
+        self.hidden = ()
+        self.level = 0
+        self.left = self.top = 0  # layout pixel at the top left corner of the view, at the current level
+        self.pixmaps = OrderedDict()  # {(hidden, level, x, y): QPixmap}, least recently drawn first
+        self.thread = None
+        self.drawing = False
+        self.pending = False  # look for missing tiles again once the running task is done
+        self.error = None
+        self.drag = None
+        self.setMouseTracking(True)
+        self.setMinimumSize(200, 200)
+
+    def fit(self):
+        """The whole layout, as large as it fits"""
+        if self.preview.meta is None:
+            return
+        x0, y0, x1, y1 = self.preview.meta["bbox"]
+        self.level = 0
+        while (self.level + 1 < self.preview.levels and (x1 - x0) / self.preview.scale(self.level + 1) <= self.width()
+               and (y1 - y0) / self.preview.scale(self.level + 1) <= self.height()):
+            self.level += 1
+        scale = self.preview.scale(self.level)
+        self.left = int((x1 - x0) / scale - self.width()) // 2
+        self.top = int((y1 - y0) / scale - self.height()) // 2
+        self.update()
+
+    def set_hidden(self, hidden):
+        self.hidden = tuple(sorted(hidden))
+        self.update()
+
+    def zoom(self, steps, x, y):
+        """Zoom in (steps > 0) or out keeping the layout point under (x, y) in place"""
+        level = max(0, min(self.preview.levels - 1, self.level + steps))
+        factor = 2 ** (level - self.level)
+        self.left = int((self.left + x) * factor - x)
+        self.top = int((self.top + y) * factor - y)
+        self.level = level
+        self.update()
+
+    def paintEvent(self, event):
+        from layout_preview import BACKGROUND, TILE
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(*BACKGROUND))
+        if self.preview.meta is None:
+            painter.end()
+            return
+        tile = TILE
+        columns, rows = self.preview.tiles(self.level)
+        missing = []
+        for y in range(max(0, self.top // tile), min(rows, (self.top + self.height()) // tile + 1)):
+            for x in range(max(0, self.left // tile), min(columns, (self.left + self.width()) // tile + 1)):
+                target = QRect(x * tile - self.left, y * tile - self.top, tile, tile)
+                key = (self.hidden, self.level, x, y)
+                pixmap = self.pixmaps.get(key)
+                if pixmap is not None:
+                    self.pixmaps.move_to_end(key)
+                    painter.drawPixmap(target.topLeft(), pixmap)
+                    continue
+                missing.append((x, y))
+                # meanwhile a coarser tile stretched over its place
+                for up in range(1, self.level + 1):
+                    coarse = self.pixmaps.get((self.hidden, self.level - up, x >> up, y >> up))
+                    if coarse is not None:
+                        part = tile >> up
+                        painter.drawPixmap(target, coarse, QRect((x - (x >> up << up)) * part, (y - (y >> up << up)) * part,
+                                                                 max(1, part), max(1, part)))
+                        break
+        painter.end()
+        if missing and self.error is None:
+            self.fetch(missing)
+
+    def fetch(self, missing):
+        from layout_preview import TILE
+        if self.drawing:
+            self.pending = True
+            return
+        self.drawing = True
+        center_x, center_y = (self.left + self.width() / 2) / TILE, (self.top + self.height() / 2) / TILE
+        missing.sort(key=lambda tile: (tile[0] + 0.5 - center_x) ** 2 + (tile[1] + 0.5 - center_y) ** 2)
+        keys = [(self.level, x, y) for x, y in missing[:self.BATCH]]
+        preview, hidden = self.preview, self.hidden
+
+        def draw():
+            return [(key, preview.tile(*key, hidden)) for key in keys]
+
+        if self.thread is not None:
+            self.thread.deleteLater()
+        self.thread = TaskThread(draw, self)
+        self.thread.done.connect(lambda tiles: self.tiles_drawn(hidden, tiles))
+        self.thread.failed.connect(self.draw_failed)
+        self.thread.finished.connect(self.fetch_finished)
+        self.thread.start()
+
+    def fetch_finished(self):
+        self.drawing = False
+        if self.pending:
+            self.pending = False
+            self.update()  # painting asks for what is still missing
+
+    def tiles_drawn(self, hidden, tiles):
+        for (level, x, y), data in tiles:
+            pixmap = QPixmap()
+            if data is not None and pixmap.loadFromData(data, "PNG"):
+                self.pixmaps[(hidden, level, x, y)] = pixmap
+        while len(self.pixmaps) > self.MAX_PIXMAPS:
+            self.pixmaps.popitem(last=False)
+        self.update()
+
+    def draw_failed(self, message):
+        self.error = message
+        self.failed.emit(message)
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.wait()
+
+    def wheelEvent(self, event):
+        if self.preview.meta is not None and event.angleDelta().y():
+            self.zoom(1 if event.angleDelta().y() > 0 else -1, int(event.position().x()), int(event.position().y()))
+
+    def mouseDoubleClickEvent(self, event):
+        if self.preview.meta is not None:
+            self.zoom(1, int(event.position().x()), int(event.position().y()))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag = (event.position(), self.left, self.top)
+
+    def mouseReleaseEvent(self, event):
+        self.drag = None
+
+    def mouseMoveEvent(self, event):
+        position = event.position()
+        if self.drag is not None:
+            start, left, top = self.drag
+            self.left = int(left - (position.x() - start.x()))
+            self.top = int(top - (position.y() - start.y()))
+            self.update()
+        if self.preview.meta is not None:
+            x, y = self.preview.position(self.level, self.left + position.x(), self.top + position.y())
+            self.moved.emit(f"x {x:.3f}  y {y:.3f} um")
+
+# Tab previewing a GDS or DEF layout without starting the OpenROAD GUI
+class LayoutViewer(QWidget):
+    def __init__(self, path, cache_dir, lef_files=(), parent=None):
+        super().__init__(parent)
+        from layout_preview import LayoutPreview
+        self.path = path
+        self.preview = LayoutPreview(path, cache_dir, lef_files)
+
+        layout = QVBoxLayout()
+        bar = QHBoxLayout()
+        fit_button = QPushButton("Fit")
+        fit_button.setToolTip("Show the whole layout (wheel or double click zooms, drag pans)")
+        self.status_label = QLabel(f"Reading {os.path.basename(path)}…")
+        self.position_label = QLabel()
+        bar.addWidget(fit_button,1)
+        bar.addWidget(self.status_label,6)
+        bar.addWidget(self.position_label,3)
+        layout.addLayout(bar)
+        body = QHBoxLayout()
+        self.view = LayoutView(self.preview)
+        self.view.moved.connect(self.position_label.setText)
+        self.view.failed.connect(lambda message: self.status_label.setText(f"Cannot draw {os.path.basename(path)}: {message}"))
+        fit_button.clicked.connect(self.view.fit)
+        self.layer_list = QListWidget()
+        self.layer_list.setMaximumWidth(150)
+        self.layer_list.setToolTip("Layers drawn, each over the ones above it in the list")
+        self.layer_list.itemChanged.connect(self.layers_changed)
+        body.addWidget(self.view,1)
+        body.addWidget(self.layer_list)
+        layout.addLayout(body,1)
+        self.setLayout(layout)
+
+        # Reading a large GDS takes a while; a cached one only needs its description
+        self.started = time.time()
+        self.open_thread = TaskThread(self.preview.open, self)
+        self.open_thread.done.connect(self.opened)
+        self.open_thread.failed.connect(lambda message: self.status_label.setText(f"Cannot read {os.path.basename(path)}: {message}"))
+        self.open_thread.start()
+
+    def opened(self, cached):
+        from layout_preview import palette
+        preview = self.preview
+        self.layer_list.blockSignals(True)
+        for layer, color in zip(preview.layers, palette(preview.layers)[1:]):
+            icon = QPixmap(12, 12)
+            icon.fill(QColor(*color))
+            item = QListWidgetItem(QIcon(icon), layer)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.layer_list.addItem(item)
+        self.layer_list.blockSignals(False)
+        x0, y0, x1, y1 = preview.meta["bbox"]
+        microns = preview.meta["dbu_meters"] * 1e6
+        how = "tiles cached" if cached else f"read in {format_duration(time.time() - self.started)}"
+        self.status_label.setText(f"{os.path.basename(self.path)}: {(x1 - x0) * microns:.1f} x {(y1 - y0) * microns:.1f} um, "
+                                  f"{preview.levels} zoom levels, {how}")
+        self.view.fit()
+
+    def layers_changed(self):
+        hidden = [self.layer_list.item(row).text() for row in range(self.layer_list.count())
+                  if self.layer_list.item(row).checkState() != Qt.CheckState.Checked]
+        self.view.set_hidden(hidden)
+
+    def close_file(self):
+        self.preview.cancelled = True
+        self.open_thread.wait()
+        self.view.wait()
+
+# Line source of a view with nothing to show
+class EmptySource:
+    def line_count(self):
+        return 0
+
+    def lines(self, first, count):
+        return []
+
+# Stored run logs: pick a run, page through it, search it or every run
+class LogBrowser(QDialog):
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Stored Logs")
+        self.resize(1100, 650)
+        self.store = store
+        self.reader = None
+        self.pattern = None
+        self.search_thread = None
+
+        layout = QVBoxLayout()
+        bar = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Regular expression")
+        self.search_edit.returnPressed.connect(lambda: self.find(False))
+        self.case_box = QCheckBox("Aa")
+        self.case_box.setToolTip("Match case")
+        self.case_box.setChecked(True)
+        previous_button = QPushButton("▲")
+        previous_button.setToolTip("Find previous in this run")
+        previous_button.clicked.connect(lambda: self.find(True))
+        next_button = QPushButton("▼")
+        next_button.setToolTip("Find next in this run")
+        next_button.clicked.connect(lambda: self.find(False))
+        self.all_button = QPushButton("Search All Runs")
+        self.all_button.clicked.connect(self.search_all)
+        bar.addWidget(self.search_edit,6)
+        bar.addWidget(self.case_box,1)
+        bar.addWidget(previous_button,1)
+        bar.addWidget(next_button,1)
+        bar.addWidget(self.all_button,2)
+        layout.addLayout(bar)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        lists = QSplitter(Qt.Orientation.Vertical)
+        self.run_list = QListWidget()
+        self.run_list.currentItemChanged.connect(lambda item, _: item and self.open_run(item.data(Qt.ItemDataRole.UserRole)))
+        self.hit_list = QListWidget()
+        self.hit_list.itemActivated.connect(self.open_hit)
+        self.hit_list.itemClicked.connect(self.open_hit)
+        lists.addWidget(self.run_list)
+        lists.addWidget(self.hit_list)
+        splitter.addWidget(lists)
+
+        right = QWidget()
+        right_layout = QVBoxLayout()
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        nav = QHBoxLayout()
+        for text, severity, forward in (("◀ Error", "error", False), ("Error ▶", "error", True),
+                                        ("◀ Warning", "warning", False), ("Warning ▶", "warning", True)):
+            button = QPushButton(text)
+            button.clicked.connect(lambda _, s=severity, f=forward: self.jump(s, f))
+            nav.addWidget(button)
+        self.status_label = QLabel()
+        nav.addWidget(self.status_label,1)
+        right_layout.addLayout(nav)
+        self.view = PagedView(EmptySource())
+        right_layout.addWidget(self.view)
+        right.setLayout(right_layout)
+        splitter.addWidget(right)
+        splitter.setSizes([350, 750])
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        # A run that is still being written grows while it is shown
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(1000)
+        self.poll_timer.timeout.connect(self.poll)
+        self.poll_timer.start()
+        self.populate_runs()
+
+    def populate_runs(self):
+        self.run_list.clear()
+        for run_id, meta in self.store.runs():
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(meta["started"]))
+            if run_id in self.store.writers:
+                state = "running"
+            elif meta.get("finished") is None:
+                state = "interrupted"
+            else:
+                state = f"exit {meta['exit_code']}" if meta.get("exit_code") is not None else "closed"
+            item = QListWidgetItem(f"{started}  {meta['name']}  ({meta['lines']:,} lines, "
+                                   f"{meta['errors']} errors, {meta['warnings']} warnings, {state})")
+            item.setData(Qt.ItemDataRole.UserRole, run_id)
+            if meta["errors"]:
+                item.setForeground(QColor(SEVERITY_COLORS["error"]))
+            self.run_list.addItem(item)
+
+    def open_run(self, run_id):
+        if self.reader is not None and self.reader.run_id == run_id:
+            return
+        self.reader = self.store.reader(run_id)
+        self.pattern = None
+        self.view.source = self.reader
+        self.view.highlight = None
+        self.view.widest = 0
+        self.view.verticalScrollBar().setValue(0)
+        self.poll()
+
+    def poll(self):
+        if self.reader is None:
+            return
+        if self.reader.refresh() or not self.status_label.text():
+            self.view.update_range()
+            self.view.viewport().update()
+            self.status_label.setText(f"{self.reader.line_count():,} lines")
+
+    def show_line(self, line, first=None, last=None):
+        if first is None:
+            text = self.reader.lines(line, 1)
+            first, last = 0, len(text[0]) if text else 0
+        self.view.highlight = (line, first, last)
+        self.view.update_range()
+        self.view.scroll_to_line(line)
+        self.status_label.setText(f"Line {line + 1:,} of {self.reader.line_count():,}")
+
+    def compile(self):
+        pattern = self.search_edit.text()
+        if not pattern:
+            return None
+        try:
+            return re.compile(pattern, 0 if self.case_box.isChecked() else re.IGNORECASE)
+        except re.error as e:
+            self.status_label.setText(f"Invalid expression: {e}")
+            return None
+
+    def find(self, backwards):
+        regex = self.compile()
+        if regex is None or self.reader is None:
+            return
+        current = self.view.highlight
+        if regex.pattern != self.pattern or current is None:
+            self.pattern = regex.pattern
+            start = self.reader.line_count() if backwards else 0
+        else:
+            start = current[0] if backwards else current[0] + 1
+        match = self.reader.search(regex, start, backwards)
+        if match is None:
+            self.status_label.setText("No more matches" if current else "No match")
+            return
+        self.show_line(*match)
+
+    def jump(self, severity, forward):
+        if self.reader is None:
+            return
+        current = self.view.highlight[0] if self.view.highlight else (-1 if forward else self.reader.line_count())
+        lines = self.reader.messages(severity)
+        if forward:
+            found = next((line for line in lines if line > current), None)
+        else:
+            found = next((line for line in reversed(lines) if line < current), None)
+        if found is None:
+            self.status_label.setText(f"No more {severity}s" if lines else f"No {severity}s")
+            return
+        self.show_line(found)
+
+    def search_all(self):
+        regex = self.compile()
+        if regex is None or (self.search_thread and self.search_thread.isRunning()):
+            return
+        self.all_button.setEnabled(False)
+        self.hit_list.clear()
+        self.hit_list.addItem("Searching…")
+        self.store.flush_idle(0)  # here: the writers belong to this thread, not the search's
+        self.search_thread = TaskThread(lambda: self.store.search(regex.pattern, ignore_case=bool(regex.flags & re.IGNORECASE)), self)
+        self.search_thread.done.connect(self.show_hits)
+        self.search_thread.failed.connect(lambda error: self.hit_list.item(0).setText(f"Search failed: {error}"))
+        self.search_thread.finished.connect(lambda: self.all_button.setEnabled(True))
+        self.search_thread.start()
+
+    def show_hits(self, hits):
+        self.hit_list.clear()
+        for run_id, meta, line, text in hits:
+            item = QListWidgetItem(f"{meta['name']}:{line + 1}  {text.strip()[:200]}")
+            item.setData(Qt.ItemDataRole.UserRole, (run_id, line))
+            self.hit_list.addItem(item)
+        if not hits:
+            self.hit_list.addItem("No match")
+
+    def open_hit(self, item):
+        hit = item.data(Qt.ItemDataRole.UserRole)
+        if not hit:
+            return
+        run_id, line = hit
+        for row in range(self.run_list.count()):
+            if self.run_list.item(row).data(Qt.ItemDataRole.UserRole) == run_id:
+                self.run_list.blockSignals(True)
+                self.run_list.setCurrentRow(row)
+                self.run_list.blockSignals(False)
+                break
+        self.open_run(run_id)
+        self.pattern = self.search_edit.text()
+        regex = self.compile()
+        match = self.reader.search(regex, line) if regex else None
+        if match and match[0] == line:
+            self.show_line(*match)
+        else:
+            self.show_line(line)
+
+    def done(self, result):
+        self.poll_timer.stop()
+        if self.search_thread:
+            self.search_thread.wait()
+        super().done(result)
+
 class ColorBox(QLabel):
     def __init__(self):
         super().__init__()
@@ -144,6 +955,184 @@ class ColorBox(QLabel):
     def setColor(self,col = "white"):
         self.setStyleSheet(f"background-color: {col}; border: 1px solid black;")
 
+# Buffered log view
+class LogView(QPlainTextEdit):
+    """
+    Read-only log view fed through a queue.
+
+    Lines are queued by enqueue()/enqueue_html() and written to the document in
+    batches by a timer running at a fixed frame rate, so a flood of shell output
+    costs one document edit per frame instead of one per line. The document keeps
+    at most max_lines blocks (oldest are dropped in one cut per flush, which is far
+    cheaper than QPlainTextEdit's own maximumBlockCount trimming), and so does the
+    pending queue, since anything older would be trimmed on the next flush anyway.
+
+    Every queued line gets an absolute line number (enqueued count), and shell
+    output lines are classified on the way in so errors/warnings end up in a
+    MessageIndex that can be used to jump between them.
+
+    When store is set (a logstore.LogWriter), every line is also written to
+    the run's compressed log on disk, which keeps what the ring buffer drops.
+    """
+
+    MAX_LINES = 20000
+    FLUSH_INTERVAL_MS = 33  # ~30 frames per second
+
+    def __init__(self, max_lines=MAX_LINES, flush_ms=FLUSH_INTERVAL_MS):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.max_lines = max_lines
+
+        self.pending = deque(maxlen=max_lines)  # (is_html, text, col, bold)
+        self.formats = {}
+        self.enqueued = 0  # absolute number of lines queued so far
+        self.index = MessageIndex()
+        self.store = None
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(flush_ms)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def queue(self, is_html, text, col, bold):
+        self.pending.append((is_html, text, col, bold))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+        self.enqueued += 1
+        return self.enqueued - 1
+
+    def enqueue(self, text, col=None, bold=False):
+        """Queue one plain text line (shown verbatim, never parsed as HTML)"""
+        if self.store:
+            self.store.append(text)
+        return self.queue(False, text, col, bold)
+
+    def enqueue_html(self, html):
+        """Queue one rich text message (e.g. built with decoText)"""
+        if self.store:
+            self.store.append(html_to_text(html))
+        return self.queue(True, html, None, False)
+
+    def enqueue_output(self, line):
+        """Queue one line of tool output, coloring and indexing diagnostics"""
+        hit = classify(line)
+        if self.store:
+            self.store.append(line, hit[0] if hit else None)
+        if hit is None:
+            return self.queue(False, line, None, False)
+        severity, tool = hit
+        line_no = self.queue(False, line, SEVERITY_COLORS[severity], False)
+        self.index.add(line_no, severity, tool)
+        return line_no
+
+    def first_line(self):
+        """Absolute line number of the first block still in the document"""
+        return self.enqueued - len(self.pending) - self.document().blockCount()
+
+    def current_line(self):
+        return self.first_line() + self.textCursor().blockNumber()
+
+    def scroll_to_line(self, line_no):
+        """Select and center an absolute line; False if it was already trimmed"""
+        self.flush()
+        block = self.document().findBlockByNumber(line_no - self.first_line())
+        if line_no < self.first_line() or not block.isValid():
+            return False
+        cursor = QTextCursor(block)
+        cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.centerCursor()
+        return True
+
+    def jump(self, severity, forward=True):
+        """Move to the next (or previous) indexed message still visible in the view"""
+        index = self.index
+        line_no = self.current_line()
+        for _ in range(index.total(severity)):
+            if forward:
+                line_no = index.next_line(severity, line_no)
+            else:
+                line_no = index.prev_line(severity, line_no)
+            if line_no is None or line_no >= self.first_line():
+                break
+        if line_no is not None:
+            self.scroll_to_line(line_no)
+        return line_no
+
+    def char_format(self, col, bold):
+        key = (col, bold)
+        fmt = self.formats.get(key)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            if col:
+                fmt.setForeground(QColor(col))
+            if bold:
+                fmt.setFontWeight(QFont.Weight.Bold)
+            self.formats[key] = fmt
+        return fmt
+
+    def flush(self):
+        """Write everything queued so far to the document in one edit block"""
+        if not self.pending:
+            self.flush_timer.stop()
+            return
+
+        batch = list(self.pending)
+        self.pending.clear()
+
+        bar = self.verticalScrollBar()
+        follow = bar.value() >= bar.maximum() - 4  # only auto-scroll when already at the bottom
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        first = self.document().isEmpty()
+
+        # Consecutive plain lines with the same format are inserted as one string
+        run = []
+        run_key = None
+        for is_html, text, col, bold in batch:
+            key = None if is_html else (col, bold)
+            if run and key != run_key:
+                first = self.insert_run(cursor, run, run_key, first)
+                run = []
+            run_key = key
+            run.append(text)
+        if run:
+            self.insert_run(cursor, run, run_key, first)
+
+        # Ring buffer: cut the oldest blocks in a single removal
+        document = self.document()
+        extra = document.blockCount() - self.max_lines
+        if extra > 0:
+            cursor.movePosition(QTextCursor.MoveOperation.Start)
+            cursor.setPosition(document.findBlockByNumber(extra).position(), QTextCursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
+
+        cursor.endEditBlock()
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def insert_run(self, cursor, run, key, first):
+        if key is None:
+            for html in run:
+                if not first:
+                    cursor.insertBlock()
+                cursor.insertHtml(html)
+                first = False
+        else:
+            if not first:
+                cursor.insertBlock()
+            cursor.insertText("\n".join(run), self.char_format(*key))
+        return False
+
+    def clear(self):
+        self.pending.clear()
+        self.index.clear()
+        self.enqueued = 0
+        super().clear()
+
 # Widget to display log messages
 class LogWidget(QWidget):
     def __init__(self,main_window):
@@ -154,11 +1143,36 @@ class LogWidget(QWidget):
         # self.main_window = main_window
         self.layout = QVBoxLayout()
         # Text area for log messages
-        self.log_display = QTextEdit()
-        self.log_display.setReadOnly(True)  # Make it read-only
+        settings = main_window.settings
+        self.log_display = LogView(settings.get("log_max_lines"), settings.get("log_flush_ms"))
         
         self.layout.addWidget(self.log_display)
 
+        # Error/Warning navigation and live per-tool counts
+        nav_layout = QHBoxLayout()
+        self.prev_error_button = QPushButton("◀ Error")
+        self.prev_error_button.clicked.connect(lambda: self.log_display.jump("error", forward=False))
+        self.next_error_button = QPushButton("Error ▶")
+        self.next_error_button.clicked.connect(lambda: self.log_display.jump("error"))
+        self.next_error_button.setToolTip("Jump to the next error in the log")
+        self.prev_warning_button = QPushButton("◀ Warning")
+        self.prev_warning_button.clicked.connect(lambda: self.log_display.jump("warning", forward=False))
+        self.next_warning_button = QPushButton("Warning ▶")
+        self.next_warning_button.clicked.connect(lambda: self.log_display.jump("warning"))
+        self.next_warning_button.setToolTip("Jump to the next warning in the log")
+        self.counts_label = QLabel()
+        self.stored_logs_button = QPushButton("Stored Logs")
+        self.stored_logs_button.setToolTip("Browse and search the logs of this and earlier sessions")
+        self.stored_logs_button.clicked.connect(self.main_window.open_log_browser)
+        nav_layout.addWidget(self.prev_error_button)
+        nav_layout.addWidget(self.next_error_button)
+        nav_layout.addWidget(self.prev_warning_button)
+        nav_layout.addWidget(self.next_warning_button)
+        nav_layout.addWidget(self.counts_label,1)
+        nav_layout.addWidget(self.stored_logs_button)
+        self.layout.addLayout(nav_layout)
+        self.update_counts()
+
         # Horizontal layout for input and button
         # Input field and Run button
         input_layout = QHBoxLayout()
@@ -194,7 +1208,1261 @@ class LogWidget(QWidget):
         
     # Method to append log messages
     def append_log(self, message):
-        self.log_display.append(message)
+        self.log_display.enqueue_html(message)
+
+    # Method to append raw shell output lines
+    def append_line(self, line, col=None, bold=False):
+        return self.log_display.enqueue(line, col, bold)
+
+    # Method to append tool output lines (classified and indexed)
+    def append_output(self, line):
+        return self.log_display.enqueue_output(line)
+
+    def update_counts(self):
+        index = self.log_display.index
+        warnings = ", ".join(f"{tool} {n}" for tool, n in index.tool_counts("warning").items())
+        text = f"Errors: {index.total('error')}  Warnings: {index.total('warning')}"
+        if warnings:
+            text += f" ({warnings})"
+        self.counts_label.setText(text)
+
+# Runs one command in its own process and reports a StepResult
+class CommandRunner(QObject):
+    output = pyqtSignal(str)
+    finished = pyqtSignal(object)
+
+    def __init__(self, program, args, cwd, env, parent=None):
+        super().__init__(parent)
+        self.result = StepResult(" ".join([program, *args]), cwd)
+        self.framer = LineFramer()
+        self.process = QProcess(self)
+        self.process.setProcessEnvironment(env)
+        self.process.setWorkingDirectory(cwd)
+        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.process.started.connect(self.result.started)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+        self.program = program
+        self.args = args
+
+    def start(self):
+        self.process.start(self.program, self.args)
+
+    def terminate(self):
+        self.process.terminate()
+        QTimer.singleShot(5000, self.kill)
+
+    def kill(self):
+        if self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.kill()
+
+    def emit_line(self, line):
+        self.result.output.append(line)
+        self.output.emit(line)
+
+    def read_output(self):
+        for line in self.framer.feed(self.process.readAllStandardOutput().data()):
+            self.emit_line(line)
+
+    def process_finished(self, exit_code, exit_status):
+        rest = self.framer.flush()
+        if rest:
+            self.emit_line(rest)
+        if exit_status == QProcess.ExitStatus.CrashExit and exit_code == 0:
+            exit_code = -1  # killed by a signal
+        self.result.finished(exit_code)
+        self.finished.emit(self.result)
+
+    def process_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.emit_line(f"{self.program}: {self.process.errorString()}")
+            self.result.finished(127)
+            self.finished.emit(self.result)
+
+# Runs a build job as a detached process that outlives the app (jobqueue.py) and follows its
+# output.log, with the interface of CommandRunner; without commands it reattaches to a started job
+class DetachedRunner(QObject):
+    output = pyqtSignal(str)
+    finished = pyqtSignal(object)
+
+    POLL_MS = 250
+    READ_BYTES = 4 << 20  # most of the log read per poll
+
+    def __init__(self, store, job_id, commands=None, flow_dir=None, env=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.job_id = job_id
+        self.commands = commands
+        self.flow_dir = flow_dir
+        self.env = env
+        spec = store.spec(job_id)
+        self.result = StepResult(" ".join(["make", *(commands or spec.get("commands") or [[]])[-1]]),
+                                 flow_dir or spec.get("flow_dir"))
+        self.framer = LineFramer()
+        self.offset = 0
+        self.process = None  # the runner, when started by this session
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.POLL_MS)
+        self.timer.timeout.connect(self.poll)
+        self.kill_timer = QTimer(self)
+        self.kill_timer.setSingleShot(True)
+        self.kill_timer.setInterval(KILL_DELAY * 1000)
+        self.kill_timer.timeout.connect(lambda: self.store.kill(self.job_id))
+
+    def start(self):
+        if self.commands is not None:
+            try:
+                self.process = self.store.start(self.job_id, self.commands, self.flow_dir, self.env)
+            except OSError as e:
+                self.emit_line(f"jobqueue: {e}")
+                self.store.finish_queued(self.job_id, "failed")
+        self.result.started()
+        self.timer.start()
+        self.poll()
+
+    def process_id(self):
+        return self.store.spec(self.job_id).get("runner_pid")
+
+    def terminate(self):
+        self.store.cancel(self.job_id)
+        self.kill_timer.start()
+
+    def kill(self):
+        self.store.kill(self.job_id)
+
+    def pause(self, paused):
+        return self.store.pause(self.job_id) if paused else self.store.resume(self.job_id)
+
+    def emit_line(self, line):
+        self.result.output.append(line)
+        self.output.emit(line)
+
+    def read_output(self):
+        try:
+            with open(self.store.path(self.job_id, "output.log"), "rb") as file:
+                file.seek(self.offset)
+                data = file.read(self.READ_BYTES)
+        except OSError:
+            return
+        self.offset += len(data)
+        for line in self.framer.feed(data):
+            self.emit_line(line)
+
+    def poll(self):
+        if self.process is not None:
+            self.process.poll()  # reaped, so it does not linger as a zombie
+        state = self.store.status(self.job_id)
+        self.read_output()
+        if state["status"] not in FINISHED:
+            return
+        self.timer.stop()
+        self.kill_timer.stop()
+        while True:  # the rest of the log
+            offset = self.offset
+            self.read_output()
+            if self.offset == offset:
+                break
+        rest = self.framer.flush()
+        if rest:
+            self.emit_line(rest)
+        if state["status"] == "lost":
+            self.store.kill(self.job_id)  # make may have outlived its runner
+            self.emit_line("The job's runner ended without reporting how make finished (killed, or the machine went down)")
+        self.result.finished(state["exit_code"] if state.get("exit_code") is not None else -1)
+        if state.get("started") and state.get("finished"):
+            # a reattached job started before this session
+            self.result.start_time, self.result.end_time = state["started"], state["finished"]
+            self.result.duration = state["finished"] - state["started"]
+        self.finished.emit(self.result)
+
+# Runs one job on a worker agent, with the interface of CommandRunner
+class RemoteRunner(QObject):
+    output = pyqtSignal(str)
+    finished = pyqtSignal(object)
+    busy = pyqtSignal(str)  # the worker had no room after all; nothing was run
+
+    def __init__(self, remote, parent=None):
+        super().__init__(parent)
+        self.remote = remote
+        self.result = remote.result
+        self.busy_reason = None
+        self.thread = TaskThread(self.work, self)
+        self.thread.failed.connect(self.work_failed)
+        self.thread.finished.connect(self.report)  # the pool deletes the runner, so only once the thread is done
+
+    def work(self):
+        from dispatch import WorkerBusy
+        try:
+            self.remote.run(self.output.emit)
+        except WorkerBusy as e:
+            self.busy_reason = str(e)
+
+    def start(self):
+        self.thread.start()
+
+    def terminate(self):
+        self.remote.cancel()
+
+    def work_failed(self, error):
+        line = f"{self.remote.worker.address}: {error}"
+        self.result.output.append(line)
+        self.output.emit(line)
+        if self.result.exit_code is None:
+            self.result.finished(-1)
+
+    def report(self):
+        if self.busy_reason is not None:
+            self.busy.emit(self.busy_reason)
+        else:
+            self.finished.emit(self.result)
+
+# One make invocation of the build pool
+class BuildJob:
+    STATUS_COLORS = {"queued": "white", "running": "yellow", "done": "lime", "failed": "red", "cancelled": "gray"}
+    SPEC_FIELDS = ("pdk", "design", "step", "variant", "variables", "resume_from")
+
+    def __init__(self, pdk, design, step="", on_finished=None, variant="base", variables=None):
+        self.pdk = pdk
+        self.design = design  # None runs the Makefile's default design
+        self.step = step
+        self.variant = variant  # FLOW_VARIANT, the results/logs subdirectory
+        self.variables = variables or {}  # extra make variables (override config.mk)
+        self.status = "queued"
+        self.cores = None
+        self.worker = None  # dispatch.Worker running it, None for a local job
+        self.runner = None
+        self.result = None  # StepResult once started
+        self.callbacks = [on_finished] if on_finished else []
+        self.view = None
+        self.resume_from = None  # stage to clean and run again first (resuming a failed run)
+        self.record = None  # id in the persistent JobQueue
+        self.paused = False
+
+    @classmethod
+    def from_spec(cls, spec):
+        job = cls(spec["pdk"], spec["design"], spec["step"], variant=spec["variant"], variables=spec["variables"])
+        job.resume_from = spec["resume_from"]
+        job.record = spec["id"]
+        return job
+
+    def spec(self):
+        return {"name": self.name, **{field: getattr(self, field) for field in self.SPEC_FIELDS}}
+
+    @property
+    def name(self):
+        variant = f" [{self.variant}]" if self.variant != "base" else ""
+        resumed = f" from {self.resume_from}" if self.resume_from else ""
+        return f"{self.design or 'default'}/{self.pdk or '-'}{variant} {self.step or 'all'}{resumed}"
+
+    @property
+    def key(self):
+        # Jobs on the same design, platform and variant share flow/results, so they never overlap
+        return (self.pdk, self.design, self.variant)
+
+    def make_args(self):
+        return make_args(self.pdk, self.design, self.step, self.cores, self.variant, self.variables)
+
+    def commands(self):
+        """make argument lists the job runs in turn"""
+        if self.resume_from:
+            clean = make_args(self.pdk, self.design, f"clean_{self.resume_from}", None, self.variant, self.variables)
+            return [clean, self.make_args()]
+        return [self.make_args()]
+
+# WNS/TNS, utilization, instance and DRC count per stage, read from the reports while a job runs
+class QoRPanel(QWidget):
+    COLUMNS = [("WNS", "wns", "{:.3f}"), ("TNS", "tns", "{:.3f}"), ("Util %", "utilization", "{:.1f}"),
+               ("Instances", "instances", "{:d}"), ("DRC", "drc", "{:d}")]
+
+    alarm = pyqtSignal(str, float)  # stage, WNS: timing is failing at or after CTS
+
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.tailer = None
+        self.polling = False
+        self.pending = False  # poll again once the running one is done
+        self.alarmed = None
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _, _ in self.COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setMaximumHeight(150)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.hide()  # until the first value shows up
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(settings.get("qor_poll_ms"))
+        self.timer.timeout.connect(self.poll)
+
+    def follow(self, dirs, since):
+        from qor import QoRTailer
+        self.tailer = QoRTailer(dirs, since)
+        self.timer.start()
+        self.poll()
+
+    def stop(self):
+        """One last look once the job is over (a remote job's reports only arrive then)"""
+        self.timer.stop()
+        self.poll()
+
+    def poll(self):
+        if self.tailer is None:
+            return
+        if self.polling:
+            self.pending = True
+            return
+        self.polling = True
+        tailer = self.tailer
+
+        def read():
+            tailer.poll()
+            return tailer.table()
+
+        thread = TaskThread(read, self)
+        thread.done.connect(self.display)
+        thread.finished.connect(self.poll_finished)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def poll_finished(self):
+        self.polling = False
+        if self.pending:
+            self.pending = False
+            self.poll()
+
+    def display(self, table):
+        from qor import timing_alarm
+        if not table:
+            return
+        self.show()
+        self.table.setRowCount(len(table))
+        self.table.setVerticalHeaderLabels([stage for stage, _ in table])
+        for row, (stage, values) in enumerate(table):
+            for column, (_, metric, fmt) in enumerate(self.COLUMNS):
+                value = values.get(metric)
+                item = QTableWidgetItem("" if value is None else fmt.format(value))
+                if (metric in ("wns", "tns") and value is not None and value < 0) or (metric == "drc" and value):
+                    item.setForeground(QColor("red"))
+                self.table.setItem(row, column, item)
+        alarm = timing_alarm(table, self.settings.get("qor_alarm_wns"))
+        if alarm and alarm[0] != self.alarmed:
+            self.alarmed = alarm[0]
+            self.alarm.emit(*alarm)
+
+# Log and status of one build job (a tab next to the shell log)
+class JobView(QWidget):
+    def __init__(self, job, pool, settings):
+        super().__init__()
+        self.job = job
+        layout = QVBoxLayout()
+
+        header = QHBoxLayout()
+        self.indicator = ColorBox()
+        self.status_label = QLabel()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(lambda: pool.cancel(job))
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setToolTip("Stop make and its tools (SIGSTOP) until continued")
+        self.pause_button.clicked.connect(lambda: pool.set_paused(job, not job.paused))
+        self.resume_button = QPushButton("Resume")
+        self.resume_button.setToolTip("Run again from the stage after the last one completed")
+        self.resume_button.clicked.connect(lambda: pool.main_window.resume_job(job))
+        header.addWidget(self.indicator,1)
+        header.addWidget(self.status_label,8)
+        header.addWidget(self.pause_button,1)
+        header.addWidget(self.cancel_button,1)
+        header.addWidget(self.resume_button,1)
+        layout.addLayout(header)
+
+        self.qor = QoRPanel(settings)
+        layout.addWidget(self.qor)
+        self.log_display = LogView(settings.get("log_max_lines"), settings.get("log_flush_ms"))
+        layout.addWidget(self.log_display,1)
+        self.setLayout(layout)
+        self.update_status()
+
+    def update_status(self):
+        job = self.job
+        self.indicator.setColor("orange" if job.paused else BuildJob.STATUS_COLORS[job.status])
+        cores = f", {job.cores} cores" if job.cores else ""
+        if job.worker is not None:
+            cores += f" on {job.worker.address}"
+        timing = ""
+        if job.result is not None and job.result.exit_code is not None:
+            timing = f", exit code {job.result.exit_code}, {format_duration(job.result.duration)}"
+        status = "paused" if job.paused else job.status
+        self.status_label.setText(f"{job.name}: {status}{cores}{timing}  make {' '.join(job.make_args())}")
+        self.cancel_button.setEnabled(job.status in ("queued", "running"))
+        self.pause_button.setText("Continue" if job.paused else "Pause")
+        self.pause_button.setEnabled(job.status == "running" and isinstance(job.runner, DetachedRunner))
+        self.resume_button.setEnabled(job.status in ("failed", "cancelled") and bool(job.design and job.pdk)
+                                      and job.step in STAGES + [""])
+
+class BuildPool(QObject):
+    """
+    Runs queued make jobs in their own processes, a bounded number at a time.
+
+    The concurrency limit comes from the max_parallel_jobs setting (0 picks one
+    from the CPU count) and the cores are split evenly between the slots, so
+    NUM_CORES of all running jobs together never exceeds the machine. Jobs for
+    the same design and platform are started one after the other.
+
+    With worker agents in the workers setting, jobs of a design run on them
+    instead: the dispatcher places each on a worker with room for
+    worker_job_cores cores and worker_job_memory_mb of memory, from the state
+    the workers reported at most WORKER_REFRESH seconds ago. Jobs nothing has
+    room for wait in the queue.
+
+    Jobs are recorded in a JobQueue in the cache directory, and local ones run
+    as detached processes: they keep running when the app closes or crashes,
+    and restore() picks the queue and the running jobs up again on the next
+    start. Jobs on worker agents are only recorded while they are queued.
+    """
+
+    WORKER_REFRESH = 5
+
+    job_started = pyqtSignal(object)
+    job_finished = pyqtSignal(object)
+    changed = pyqtSignal()
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.queue = []
+        self.running = []
+        self.dispatcher = None
+        self.refreshing = False
+        self.refreshed = 0.0
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.setInterval(self.WORKER_REFRESH * 1000)
+        self.retry_timer.timeout.connect(self.schedule)
+        self.store = JobQueue(main_window.settings.cache_dir("jobs"))
+
+    @property
+    def limit(self):
+        limit = self.main_window.settings.get("max_parallel_jobs")
+        if not limit:
+            limit = max(1, min(4, (os.cpu_count() or 1) // 8))
+        return limit
+
+    def cores_per_job(self):
+        return max(1, (os.cpu_count() or 1) // self.limit)
+
+    def submit(self, job):
+        if job.record is None:
+            job.record = self.store.create(job.spec())
+        self.queue.append(job)
+        self.changed.emit()
+        self.schedule()
+        return job
+
+    def schedule(self):
+        settings = self.main_window.settings
+        workers = settings.get("workers")
+        if workers and (self.dispatcher is None or [worker.address for worker in self.dispatcher.workers] != workers):
+            from dispatch import Dispatcher  # only when there are workers to dispatch to
+            self.dispatcher = Dispatcher(workers, settings.get("worker_token"))
+            self.refreshed = 0.0
+        if workers and any(job.design and job.pdk for job in self.queue) \
+                and time.monotonic() - self.refreshed > self.WORKER_REFRESH:
+            self.refresh_workers()  # schedules again once the workers answered
+
+        busy = {job.key for job in self.running}
+        local = sum(1 for job in self.running if job.worker is None)
+        for job in list(self.queue):
+            if job.key in busy:
+                continue
+            if workers and job.design and job.pdk and not job.resume_from:  # a worker runs one make only
+                if self.refreshing:
+                    continue
+                placed = self.dispatcher.pick(job.pdk, settings.get("worker_job_cores"),
+                                              settings.get("worker_job_memory_mb") << 20)
+                if placed is None:
+                    continue
+                self.queue.remove(job)
+                busy.add(job.key)
+                self.start_remote(job, *placed)
+            elif local < self.limit:
+                self.queue.remove(job)
+                busy.add(job.key)
+                local += 1
+                self.start(job)
+        if workers and self.queue:
+            self.retry_timer.start()
+        self.changed.emit()
+
+    def refresh_workers(self):
+        if self.refreshing:
+            return
+        self.refreshing = True
+        dispatcher = self.dispatcher
+
+        def refreshed(reachable):
+            self.refreshing = False
+            self.refreshed = time.monotonic()
+            if dispatcher is self.dispatcher:
+                if not reachable:
+                    self.main_window.log(decoText("No worker agent reachable: "
+                                                  + "; ".join(worker.describe() for worker in dispatcher.workers),col='orange'))
+                self.schedule()
+
+        thread = TaskThread(dispatcher.refresh, self)
+        thread.done.connect(refreshed)
+        thread.failed.connect(lambda error: refreshed([]))
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def start(self, job):
+        job.cores = self.cores_per_job()
+        self.store.update(job.record, cores=job.cores)
+        env = self.main_window.process_environment()
+        job.runner = DetachedRunner(self.store, job.record, job.commands(), self.main_window.flow_dir,
+                                    {name: env.value(name) for name in env.keys()}, self)
+        self.launch(job)
+
+    def attach(self, job):
+        """Follow a job started by an earlier session of the app"""
+        job.cores = self.store.spec(job.record).get("cores")
+        job.runner = DetachedRunner(self.store, job.record, parent=self)
+        self.launch(job)
+
+    def restore(self):
+        """
+        Jobs of earlier sessions no running instance of the app looks after:
+        those still queued, and those started, running or finished since, to
+        attach(). Returns ([queued jobs], [started jobs]).
+        """
+        queued, started = [], []
+        for job_id in self.store.jobs():
+            spec = self.store.spec(job_id)
+            if spec.get("reported") or not self.store.claimable(job_id):
+                continue
+            self.store.claim(job_id)
+            job = BuildJob.from_spec(spec)
+            (queued if self.store.status(job_id)["status"] == "queued" else started).append(job)
+        return queued, started
+
+    def set_paused(self, job, paused):
+        """Stop (SIGSTOP) or continue (SIGCONT) a running local job with everything it started"""
+        if job.status != "running" or not isinstance(job.runner, DetachedRunner):
+            return
+        if job.runner.pause(paused):
+            job.paused = paused
+            job.view.update_status()
+            self.changed.emit()
+
+    def start_remote(self, job, worker, cores):
+        from dispatch import RemoteRun
+        if job.record is not None:
+            self.store.remove(job.record)  # runs on the worker, not to be restored here
+            job.record = None
+        settings = self.main_window.settings
+        job.cores = cores
+        job.worker = worker
+        remote = RemoteRun(worker, self.main_window.flow_dir, settings.cache_dir("dispatch"), job.pdk, job.design,
+                           job.step, cores, job.variant, job.variables)
+        job.runner = RemoteRunner(remote, self)
+        job.runner.busy.connect(lambda reason: self.requeue(job, reason))
+        self.launch(job)
+
+    def launch(self, job):
+        job.status = "running"
+        job.result = job.runner.result
+        job.view.log_display.store = self.main_window.log_store.open_run(job.name)
+        job.runner.output.connect(job.view.log_display.enqueue_output)
+        job.runner.finished.connect(lambda result: self.finished(job, result))
+        self.running.append(job)
+        job.runner.start()
+        self.job_started.emit(job)
+
+    def finished(self, job, result):
+        if job.record is not None and self.store.status(job.record)["status"] == "cancelled":
+            job.status = "cancelled"  # also when cancelled by an earlier session
+        if job.status != "cancelled":
+            job.status = "done" if result.ok else "failed"
+        job.paused = False
+        if job.record is not None:
+            self.store.update(job.record, reported=True)
+            self.store.prune()
+        self.running.remove(job)
+        job.view.log_display.store.close(result.exit_code)
+        job.view.log_display.store = None
+        job.runner.deleteLater()
+        job.runner = None
+        if job.worker is not None:
+            self.refreshed = 0.0  # the worker's load changed
+        for callback in job.callbacks:
+            callback(job)
+        self.job_finished.emit(job)
+        self.schedule()
+
+    def requeue(self, job, reason):
+        """A worker turned the job down; it goes back to the front of the queue"""
+        job.view.log_display.enqueue_output(f"{job.worker.address} is busy ({reason}), waiting for a worker")
+        self.running.remove(job)
+        job.view.log_display.store.close(None)
+        job.view.log_display.store = None
+        job.runner.deleteLater()
+        job.runner = None
+        job.worker = None
+        job.result = None
+        self.refreshed = 0.0
+        if job.status == "cancelled":
+            self.job_finished.emit(job)
+        else:
+            job.status = "queued"
+            self.queue.insert(0, job)
+            self.job_started.emit(job)
+        self.schedule()
+
+    def cancel(self, job):
+        if job in self.queue:
+            self.queue.remove(job)
+            job.status = "cancelled"
+            if job.record is not None:
+                self.store.finish_queued(job.record, "cancelled")
+                self.store.update(job.record, reported=True)
+            self.job_finished.emit(job)
+            self.changed.emit()
+        elif job.runner is not None:
+            job.status = "cancelled"
+            job.runner.terminate()
+
+# Small line plot of one per-tool value over the monitor's sample history
+class UsagePlot(QWidget):
+    TOOL_COLORS = {"openroad": "#4fc3f7", "yosys": "#ffb74d", "klayout": "#ba68c8", "make": "#81c784", "other": "#9e9e9e"}
+
+    def __init__(self, monitor, field, title, fmt, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.field = field  # index into Snapshot.tools values
+        self.title = title
+        self.fmt = fmt
+        self.setMinimumHeight(60)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        width, height = self.width(), self.height()
+        painter.fillRect(0, 0, width, height, QColor(20, 20, 20))
+        history = list(self.monitor.history)
+        tools = sorted({tool for snapshot in history for tool in snapshot.tools})
+        top = max([snapshot.tools[tool][self.field] for snapshot in history for tool in snapshot.tools] + [1])
+        step = width / max(1, self.monitor.history.maxlen - 1)
+        offset = width - step * (len(history) - 1)
+        for tool in tools:
+            painter.setPen(QColor(self.TOOL_COLORS[tool]))
+            points = [(offset + i * step, height - 2 - (height - 16) * snapshot.tools.get(tool, (0,) * 5)[self.field] / top)
+                      for i, snapshot in enumerate(history)]
+            for (x1, y1), (x2, y2) in zip(points, points[1:]):
+                painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+        painter.setPen(QColor("lightgray"))
+        painter.drawText(4, 12, f"{self.title} (max {self.fmt(top)})")
+        painter.end()
+
+# CPU, memory and I/O of the shell's and the build jobs' process trees, sampled from /proc
+class ResourceMonitor(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.monitor = ProcessMonitor()
+        self.low_memory = False
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.plots = [UsagePlot(self.monitor, 0, "CPU", lambda value: f"{value:.0f}%"),
+                      UsagePlot(self.monitor, 1, "RSS", format_bytes),
+                      UsagePlot(self.monitor, 2, "Read", lambda value: format_bytes(value) + "/s"),
+                      UsagePlot(self.monitor, 3, "Write", lambda value: format_bytes(value) + "/s")]
+        for plot in self.plots:
+            layout.addWidget(plot,2)
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label,3)
+        self.setLayout(layout)
+        self.setMaximumHeight(80)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(main_window.settings.get("monitor_interval_ms"))
+        self.timer.timeout.connect(self.sample)
+
+    def roots(self):
+        pids = [self.main_window.process.processId()]
+        pids += [job.runner.process_id() for job in self.main_window.build_pool.running
+                 if job.runner and job.worker is None]
+        return [pid for pid in pids if pid]
+
+    def sample(self):
+        snapshot = self.monitor.sample(self.roots())
+        for stage in self.monitor.finished:
+            self.main_window.log(decoText(f"Peak memory of {stage}: {format_bytes(self.monitor.peaks[stage])}",col='yellow'))
+
+        # Warn once per dip below the threshold; re-armed when twice the threshold is free again
+        threshold = self.main_window.settings.get("monitor_min_free_mb") << 20
+        if snapshot.total and snapshot.available < threshold and not self.low_memory:
+            self.low_memory = True
+            self.main_window.log(decoText(f"Low memory: {format_bytes(snapshot.available)} of {format_bytes(snapshot.total)} "
+                                          f"available, flow processes use {format_bytes(snapshot.rss)}",col='red',bold='bold'))
+        elif snapshot.available > 2 * threshold:
+            self.low_memory = False
+
+        busy = [(tool, values) for tool, values in sorted(snapshot.tools.items()) if tool not in ("make", "other")]
+        text = "  ".join(f"{tool} {values[0]:.0f}% {format_bytes(values[1])}" for tool, values in busy) or "No flow tools running"
+        self.summary_label.setText(f"{text}\nFree {format_bytes(snapshot.available)} of {format_bytes(snapshot.total)}")
+        self.summary_label.setStyleSheet("color: red;" if self.low_memory else "")
+        peaks = "\n".join(f"{stage}: {format_bytes(peak)}" for stage, peak in self.monitor.peaks.items())
+        self.summary_label.setToolTip("Peak memory per stage\n" + peaks if peaks else "")
+        for plot in self.plots:
+            plot.update()
+
+# Scatter plot of two metrics of the sweep variants, the Pareto front joined up
+class ParetoPlot(QWidget):
+    STATUS_COLORS = {"done": "white", "pruned": "gray", "failed": "red", "cancelled": "gray", "running": "yellow", "pending": "yellow"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.points = []  # (name, x, y, on front, status)
+        self.labels = ("", "")
+        self.setMinimumHeight(220)
+
+    def set_points(self, points, x_label, y_label):
+        self.points = points
+        self.labels = (x_label, y_label)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(20, 20, 20))
+        painter.setPen(QColor("lightgray"))
+        margin = 40
+        width, height = self.width() - 2 * margin, self.height() - 2 * margin
+        painter.drawText(margin, self.height() - 8, f"{self.labels[0]} →")
+        painter.drawText(4, 14, f"↑ {self.labels[1]}")
+        if not self.points:
+            painter.drawText(margin, margin, "No results yet")
+            painter.end()
+            return
+        xs = [x for _, x, _, _, _ in self.points]
+        ys = [y for _, _, y, _, _ in self.points]
+        x_low, x_span = min(xs), (max(xs) - min(xs)) or 1
+        y_low, y_span = min(ys), (max(ys) - min(ys)) or 1
+        position = lambda x, y: (int(margin + (x - x_low) / x_span * width), int(margin + height - (y - y_low) / y_span * height))
+        painter.drawText(margin, margin + height + 14, f"{x_low:g}")
+        painter.drawText(margin + width - 40, margin + height + 14, f"{x_low + x_span:g}")
+        painter.drawText(4, margin + height, f"{y_low:g}")
+        painter.drawText(4, margin + 10, f"{y_low + y_span:g}")
+
+        front = sorted((x, y) for _, x, y, on_front, _ in self.points if on_front)
+        painter.setPen(QColor("lime"))
+        for (x1, y1), (x2, y2) in zip(front, front[1:]):
+            painter.drawLine(*position(x1, y1), *position(x2, y2))
+        for name, x, y, on_front, status in self.points:
+            px, py = position(x, y)
+            color = QColor("lime" if on_front else self.STATUS_COLORS.get(status, "white"))
+            painter.setPen(color)
+            painter.setBrush(color)
+            radius = 5 if on_front else 3
+            painter.drawEllipse(px - radius, py - radius, 2 * radius, 2 * radius)
+            if on_front:
+                painter.drawText(px + 6, py - 6, name.rsplit("_", 1)[-1])
+        painter.end()
+
+# Parameter sweep: every combination of the swept config.mk values built as its own FLOW_VARIANT
+class SweepWindow(QDialog):
+    RESULT_COLUMNS = ["wns", "tns", "area", "power", "runtime"]
+
+    def __init__(self, main_window, design=None, platform=None):
+        from sweep import METRICS, SWEEP_VARIABLES
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.design = design
+        self.platform = platform
+        self.run = None
+        self.jobs = {}  # {variant: BuildJob in flight}
+        self.setWindowTitle("Parameter Sweep")
+        self.resize(1000, 720)
+        layout = QVBoxLayout()
+
+        self.parameter_table = QTableWidget(len(SWEEP_VARIABLES), 2)
+        self.parameter_table.setHorizontalHeaderLabels(["Variable", "Values (start:stop:step or a, b, c)"])
+        self.parameter_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        for row, name in enumerate(SWEEP_VARIABLES):
+            self.parameter_table.setItem(row, 0, QTableWidgetItem(name))
+            self.parameter_table.setItem(row, 1, QTableWidgetItem(""))
+        self.parameter_table.setMaximumHeight(140)
+        layout.addWidget(self.parameter_table)
+
+        options = QHBoxLayout()
+        add_button = QPushButton("Add Variable")
+        add_button.clicked.connect(lambda: self.parameter_table.insertRow(self.parameter_table.rowCount()))
+        self.name_edit = QLineEdit(time.strftime("sweep_%m%d_%H%M"))
+        self.name_edit.setToolTip("Sweep name; variants are <name>_001, <name>_002, ...")
+        self.checkpoint_dropdown = QComboBox()
+        self.checkpoint_dropdown.addItems(STAGES[1:-1])
+        self.checkpoint_dropdown.setToolTip("Compare variants from this stage on and stop the clearly dominated ones")
+        self.margin_spin = QDoubleSpinBox()
+        self.margin_spin.setRange(0, 100)
+        self.margin_spin.setValue(5)
+        self.margin_spin.setSuffix(" %")
+        self.margin_spin.setToolTip("How much better another variant must be before one is stopped")
+        self.target_dropdown = QComboBox()
+        self.target_dropdown.addItems(STAGES)
+        self.target_dropdown.setCurrentText(STAGES[-1])
+        self.start_button = QPushButton("Start")
+        self.start_button.clicked.connect(self.start)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop)
+        self.previous_dropdown = QComboBox()
+        self.previous_dropdown.setToolTip("Results of earlier sweeps")
+        self.previous_dropdown.activated.connect(lambda index: self.load(self.previous_dropdown.itemText(index)))
+        options.addWidget(add_button)
+        options.addWidget(QLabel("Name"))
+        options.addWidget(self.name_edit,2)
+        options.addWidget(QLabel("Prune after"))
+        options.addWidget(self.checkpoint_dropdown)
+        options.addWidget(self.margin_spin)
+        options.addWidget(QLabel("Up to"))
+        options.addWidget(self.target_dropdown)
+        options.addWidget(self.start_button)
+        options.addWidget(self.stop_button)
+        options.addWidget(self.previous_dropdown,2)
+        layout.addLayout(options)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.results_table = QTableWidget(0, 0)
+        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.results_table.setSortingEnabled(True)
+        self.results_table.cellDoubleClicked.connect(self.show_job)
+        splitter.addWidget(self.results_table)
+        plot_panel = QWidget()
+        plot_layout = QVBoxLayout()
+        plot_layout.setContentsMargins(0, 0, 0, 0)
+        axes = QHBoxLayout()
+        self.x_dropdown = QComboBox()
+        self.x_dropdown.addItems(METRICS)
+        self.x_dropdown.setCurrentText("area")
+        self.y_dropdown = QComboBox()
+        self.y_dropdown.addItems(METRICS)
+        self.y_dropdown.setCurrentText("wns")
+        self.x_dropdown.currentIndexChanged.connect(self.update_plot)
+        self.y_dropdown.currentIndexChanged.connect(self.update_plot)
+        axes.addWidget(QLabel("Pareto view: x"))
+        axes.addWidget(self.x_dropdown)
+        axes.addWidget(QLabel("y"))
+        axes.addWidget(self.y_dropdown)
+        axes.addStretch(1)
+        plot_layout.addLayout(axes)
+        self.plot = ParetoPlot()
+        plot_layout.addWidget(self.plot)
+        plot_panel.setLayout(plot_layout)
+        splitter.addWidget(plot_panel)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+        self.list_previous()
+        self.update_buttons()
+
+    def sweeps_dir(self):
+        return self.main_window.settings.cache_dir("sweeps")
+
+    def list_previous(self):
+        self.previous_dropdown.clear()
+        names = sorted((name[:-len(".json")] for name in os.listdir(self.sweeps_dir()) if name.endswith(".json")), reverse=True)
+        self.previous_dropdown.addItems(names)
+        self.previous_dropdown.setCurrentIndex(-1)
+
+    def update_buttons(self):
+        unfinished = self.run is not None and any(self.run.next_stage(variant) for variant in self.run.variants)
+        self.start_button.setText("Resume" if unfinished and not self.jobs else "Start")
+        self.start_button.setEnabled(not self.jobs)
+        self.stop_button.setEnabled(bool(self.jobs))
+
+    def load(self, name):
+        if self.jobs:
+            self.status_label.setText("Stop the running sweep first")
+            return
+        try:
+            from sweep import SweepRun
+            self.run = SweepRun(os.path.join(self.sweeps_dir(), name + ".json")).load()
+        except (OSError, ValueError, KeyError) as e:
+            self.status_label.setText(f"Cannot load {name}: {e}")
+            return
+        self.name_edit.setText(name)
+        self.refresh()
+
+    def parameters(self):
+        from sweep import parse_values
+        parameters = {}
+        for row in range(self.parameter_table.rowCount()):
+            name_item, values_item = self.parameter_table.item(row, 0), self.parameter_table.item(row, 1)
+            name = name_item.text().strip() if name_item else ""
+            text = values_item.text().strip() if values_item else ""
+            if name and text:
+                parameters[name] = parse_values(text)
+        return parameters
+
+    def start(self):
+        run = self.run
+        if run is None or run.name != self.name_edit.text().strip() or not any(run.next_stage(v) for v in run.variants):
+            run = self.create()
+            if run is None:
+                return
+            run.save()
+            self.list_previous()
+        self.run = run
+        for variant in run.variants:
+            if variant["name"] not in self.jobs:
+                self.submit(variant)
+        run.save()
+        self.refresh()
+
+    def create(self):
+        from sweep import SweepRun
+        design = self.design or self.main_window.config_widget.imported_design
+        platform = self.platform or self.main_window.config_widget.pdk
+        name = self.name_edit.text().strip()
+        if not design or not platform:
+            self.status_label.setText("Import or select a design first")
+            return None
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+            self.status_label.setText("The sweep name may only contain letters, digits, '_', '.' and '-'")
+            return None
+        path = os.path.join(self.sweeps_dir(), name + ".json")
+        if os.path.exists(path):
+            self.status_label.setText(f"A sweep named {name} exists already")
+            return None
+        try:
+            parameters = self.parameters()
+        except ValueError as e:
+            self.status_label.setText(f"Invalid values: {e}")
+            return None
+        if not parameters:
+            self.status_label.setText("Give values for at least one variable")
+            return None
+        entry = self.main_window.catalog.designs.get(platform, {}).get(design, {})
+        run = SweepRun.create(path, platform, design, entry.get("nickname", design), parameters,
+                              self.checkpoint_dropdown.currentText(), self.margin_spin.value() / 100,
+                              self.target_dropdown.currentText())
+        self.main_window.log(decoText(f"Sweep {name}: {len(run.variants)} variants of {design}/{platform}",col='yellow'))
+        return run
+
+    def submit(self, variant):
+        run = self.run
+        stage = run.next_stage(variant)
+        if stage is None:
+            return
+        try:
+            variables = run.make_variables(self.main_window.flow_dir, variant)
+        except (OSError, ValueError) as e:
+            variant["status"] = "failed"
+            self.main_window.log(decoText(f"{variant['name']}: {e}",col='red'))
+            return
+        if variant["status"] == "pending":
+            variant["status"] = "running"
+        job = BuildJob(run.platform, run.design, stage, on_finished=self.stage_done, variant=variant["name"], variables=variables)
+        self.jobs[variant["name"]] = job
+        self.main_window.submit_job(job, show=False)
+
+    def stage_done(self, job):
+        from sweep import read_metrics
+        run = self.run
+        self.jobs.pop(job.variant, None)
+        variant = run.variant(job.variant)
+        if job.status == "cancelled":
+            if variant["status"] != "pruned":
+                variant["status"] = "cancelled"
+        else:
+            metrics = read_metrics(run.logs_dir(self.main_window.flow_dir, variant))
+            for name in run.stage_finished(job.variant, job.step, job.status == "done", metrics):
+                pruned = run.variant(name)
+                self.main_window.log(decoText(f"Sweep {run.name}: stopping {name}, dominated by {pruned['pruned_by']} "
+                                              f"after {job.step}",col='orange'))
+                self.cancel(name)
+            self.submit(variant)
+        run.save()
+        self.refresh()
+        if not self.jobs:
+            front = run.pareto()
+            self.main_window.log(decoText(f"Sweep {run.name} finished, Pareto front: {', '.join(front) or 'none'}",col='lime'))
+
+    def cancel(self, name):
+        job = self.jobs.get(name)
+        if job is None:
+            return
+        if job.runner is None:
+            self.jobs.pop(name)  # still queued: the pool drops it without calling back
+        self.main_window.build_pool.cancel(job)
+
+    def stop(self):
+        for name in list(self.jobs):
+            variant = self.run.variant(name)
+            if variant["status"] in ("pending", "running"):
+                variant["status"] = "cancelled"
+            self.cancel(name)
+        self.run.save()
+        self.refresh()
+
+    def show_job(self, row, column):
+        job = self.jobs.get(self.results_table.item(row, 0).text())
+        if job is None:
+            return
+        tabs = self.main_window.log_tabs
+        if tabs.indexOf(job.view) < 0:
+            tabs.addTab(job.view, job.name)
+        tabs.setCurrentWidget(job.view)
+
+    def refresh(self):
+        run = self.run
+        if run is None:
+            return
+        front = set(run.pareto())
+        names = list(run.parameters)
+        headers = ["Variant", *names, "Status", "Stage", "WNS", "TNS", "Area", "Power", "Runtime (s)", "Pareto"]
+        table = self.results_table
+        table.setSortingEnabled(False)
+        table.clear()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setRowCount(len(run.variants))
+        for row, variant in enumerate(run.variants):
+            status = variant["status"]
+            if variant["name"] in self.jobs:
+                status += f" ({self.jobs[variant['name']].step})"
+            elif variant["pruned_by"]:
+                status += f" by {variant['pruned_by']}"
+            cells = [variant["name"], *(variant["values"].get(name, "") for name in names), status, variant["stage"] or "-"]
+            for metric in self.RESULT_COLUMNS:
+                value = variant["metrics"].get(metric)
+                # numbers, not text, so the columns sort by value
+                cells.append("" if value is None else round(value) if metric == "runtime" else float(f"{value:.4g}"))
+            cells.append("★" if variant["name"] in front else "")
+            for column, value in enumerate(cells):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                if variant["name"] in front:
+                    item.setForeground(QColor("lime"))
+                elif variant["status"] in ("pruned", "failed", "cancelled"):
+                    item.setForeground(QColor("gray"))
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        counts = {}
+        for variant in run.variants:
+            counts[variant["status"]] = counts.get(variant["status"], 0) + 1
+        self.status_label.setText(f"{run.name}: {run.design}/{run.platform}, " + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+        self.update_plot()
+        self.update_buttons()
+
+    def update_plot(self):
+        if self.run is None:
+            return
+        x_metric, y_metric = self.x_dropdown.currentText(), self.y_dropdown.currentText()
+        front = set(self.run.pareto([x_metric, y_metric]))
+        points = [(variant["name"], variant["metrics"][x_metric], variant["metrics"][y_metric], variant["name"] in front, variant["status"])
+                  for variant in self.run.variants if x_metric in variant["metrics"] and y_metric in variant["metrics"]]
+        self.plot.set_points(points, x_metric, y_metric)
+
+# Disk usage of the flow outputs; retention is previewed and only what the preview lists is removed
+class StorageWindow(QDialog):
+    ACTION_COLUMNS = ["Action", "Run", "Frees", "Reason"]
+
+    def __init__(self, main_window):
+        from storage import LEVELS
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.usage = None
+        self.actions = []
+        self.working = False
+        self.setWindowTitle("Disk Usage")
+        self.resize(900, 680)
+        settings = main_window.settings
+        layout = QVBoxLayout()
+
+        top = QHBoxLayout()
+        self.level_dropdown = QComboBox()
+        self.level_dropdown.addItems(LEVELS)
+        self.level_dropdown.setCurrentText("design")
+        self.level_dropdown.currentIndexChanged.connect(self.show_usage)
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.setToolTip("Walk every file again instead of trusting the size index")
+        self.rescan_button.clicked.connect(lambda: self.scan(True))
+        self.total_label = QLabel()
+        top.addWidget(QLabel("Group by"))
+        top.addWidget(self.level_dropdown)
+        top.addWidget(self.total_label,1)
+        top.addWidget(self.rescan_button)
+        layout.addLayout(top)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.usage_table = QTableWidget(0, 3)
+        self.usage_table.setHorizontalHeaderLabels(["Name", "Size", "Share"])
+        self.files_table = QTableWidget(0, 2)
+        self.files_table.setHorizontalHeaderLabels(["Largest files", "Size"])
+        for table in (self.usage_table, self.files_table):
+            table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+            table.verticalHeader().setVisible(False)
+            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            splitter.addWidget(table)
+        layout.addWidget(splitter,2)
+
+        policies = QHBoxLayout()
+        self.keep_spin = QSpinBox()
+        self.keep_spin.setRange(0, 1000)
+        self.keep_spin.setSpecialValueText("all")
+        self.keep_spin.setValue(settings.get("storage_keep_runs"))
+        self.keep_spin.setToolTip("Sweep variants kept per design besides base, newest first")
+        self.keep_spin.valueChanged.connect(lambda value: self.policy_changed("storage_keep_runs", value))
+        self.final_check = QCheckBox("Final GDS only")
+        self.final_check.setChecked(settings.get("storage_final_only"))
+        self.final_check.setToolTip("Of finished runs keep only 6_final.gds of the results and objects; logs and reports stay")
+        self.final_check.toggled.connect(lambda checked: self.policy_changed("storage_final_only", checked))
+        self.compress_spin = QSpinBox()
+        self.compress_spin.setRange(0, 3650)
+        self.compress_spin.setSpecialValueText("never")
+        self.compress_spin.setSuffix(" days")
+        self.compress_spin.setValue(settings.get("storage_compress_logs_days"))
+        self.compress_spin.setToolTip("gzip logs not written for this long")
+        self.compress_spin.valueChanged.connect(lambda value: self.policy_changed("storage_compress_logs_days", value))
+        self.quota_spin = QDoubleSpinBox()
+        self.quota_spin.setRange(0, 1 << 20)
+        self.quota_spin.setSpecialValueText("none")
+        self.quota_spin.setSuffix(" GB")
+        self.quota_spin.setValue(settings.get("storage_quota_gb"))
+        self.quota_spin.setToolTip("Over this the oldest variants are removed, then the oldest finished runs trimmed")
+        self.quota_spin.valueChanged.connect(lambda value: self.policy_changed("storage_quota_gb", value))
+        self.preview_button = QPushButton("Preview")
+        self.preview_button.clicked.connect(self.preview)
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.setToolTip("Carry out exactly what the preview lists")
+        self.apply_button.clicked.connect(self.apply)
+        policies.addWidget(QLabel("Keep runs"))
+        policies.addWidget(self.keep_spin)
+        policies.addWidget(self.final_check)
+        policies.addWidget(QLabel("Compress logs after"))
+        policies.addWidget(self.compress_spin)
+        policies.addWidget(QLabel("Quota"))
+        policies.addWidget(self.quota_spin)
+        policies.addStretch(1)
+        policies.addWidget(self.preview_button)
+        policies.addWidget(self.apply_button)
+        layout.addLayout(policies)
+
+        self.actions_table = QTableWidget(0, len(self.ACTION_COLUMNS))
+        self.actions_table.setHorizontalHeaderLabels(self.ACTION_COLUMNS)
+        self.actions_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.actions_table.verticalHeader().setVisible(False)
+        self.actions_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.actions_table,1)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+        self.update_buttons()
+        self.scan(False)
+
+    def update_buttons(self):
+        self.rescan_button.setEnabled(not self.working)
+        self.preview_button.setEnabled(not self.working and self.usage is not None)
+        self.apply_button.setEnabled(not self.working and bool(self.actions))
+
+    def policy_changed(self, key, value):
+        self.main_window.settings.set(key, value)
+        self.set_actions([])  # the preview no longer matches the policies
+
+    def run_task(self, fn, done, message):
+        self.working = True
+        self.status_label.setText(message)
+        self.update_buttons()
+
+        def finished(result):
+            self.working = False
+            done(result)
+            self.update_buttons()
+
+        def failed(error):
+            self.working = False
+            self.status_label.setText(f"Failed: {error}")
+            self.update_buttons()
+
+        thread = TaskThread(fn, self)
+        thread.done.connect(finished)
+        thread.failed.connect(failed)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def scan(self, rescan, note=""):
+        def scanned(usage):
+            self.usage = usage
+            self.status_label.setText(f"{note}{len(usage.files)} files")
+            self.show_usage()
+
+        self.set_actions([])
+        self.run_task(lambda: self.main_window.core.storage_usage(rescan), scanned, "Scanning the flow outputs...")
+
+    def show_usage(self):
+        usage = self.usage
+        if usage is None:
+            return
+        self.total_label.setText(f"Flow outputs: {format_bytes(usage.total)}")
+        totals = usage.totals(self.level_dropdown.currentText())
+        self.fill(self.usage_table, [(name, format_bytes(size), f"{100 * size / max(1, usage.total):.1f}%")
+                                     for name, size in totals])
+        self.fill(self.files_table, [(path, format_bytes(size)) for path, size in usage.largest(50)])
+
+    def fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, cells in enumerate(rows):
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column and text.endswith(("B", "%")):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
+        table.resizeColumnToContents(1)
+
+    def set_actions(self, actions):
+        self.actions = actions
+        self.fill(self.actions_table, [(action["action"], action["run"], format_bytes(action["bytes"]), action["reason"])
+                                       for action in actions])
+        self.update_buttons()
+
+    def busy_runs(self):
+        """Runs of the queued and running jobs, which retention must leave alone"""
+        pool = self.main_window.build_pool
+        designs = self.main_window.catalog.designs
+        return {f"{job.pdk}/{designs.get(job.pdk, {}).get(job.design, {}).get('nickname', job.design)}/{job.variant}"
+                for job in pool.queue + pool.running if job.pdk and job.design}
+
+    def preview(self):
+        actions = self.main_window.core.storage_plan(self.usage, self.busy_runs())
+        self.set_actions(actions)
+        self.status_label.setText(f"Dry run: {len(actions)} actions would free {format_bytes(sum(a['bytes'] for a in actions))}"
+                                  if actions else "The retention settings leave everything as it is")
+
+    def apply(self):
+        if not self.actions or self.working:
+            return
+        actions = self.actions
+        busy = self.busy_runs()
+        actions = [action for action in actions if action["run"] not in busy]  # started since the preview
+
+        def applied(result):
+            freed, errors = result
+            self.main_window.log(decoText(f"Disk cleanup freed {format_bytes(freed)}",col='lime'))
+            for error in errors:
+                self.main_window.log(decoText(f"Disk cleanup: {error}",col='red'))
+            self.set_actions([])
+            self.scan(False, f"Freed {format_bytes(freed)}" + (f", {len(errors)} errors (see the log)" if errors else "") + "; ")
+
+        self.run_task(lambda: self.main_window.core.apply_storage(actions), applied, "Cleaning up...")
 
 # Widget for configuration controls
 class ConfigWidget(QWidget):
@@ -209,21 +2477,14 @@ class ConfigWidget(QWidget):
         self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         repo_name = "BattusaiKuroKame/OpenROAD_HelperGUI"
-        with open(filepath+"settings.json","r") as file:
-            data = json.load(file)
-            self.version = data["version"]
-
-        aVersion = self.check_latest_version(repo_name, self.version)
+        self.version = main_window.settings.get("version")
 
-        if self.version != aVersion:
-            comm = f"\nnewer version {aVersion} is available"
-        else:
-            comm = ""
-
-        # Version
-        self.versionLabel = QLabel(f"{self.version}{comm}")
+        # Version (updated once the background release check answers)
+        self.versionLabel = QLabel(f"{self.version}")
         self.versionLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.addWidget(self.versionLabel)
+
+        self.repo_name = repo_name  # update check starts after the first paint
         
         # Settings Button
         self.settings_button = QPushButton("⚙ Settings")
@@ -237,13 +2498,24 @@ class ConfigWidget(QWidget):
         # Select PDK (Dropdown)
         self.pdk_label = QLabel("Select PDK:")
         self.pdk_dropdown = QComboBox()
-        self.populate_pdk_dropdown()
+        # Items are filled in by deferred_startup() once the window is on screen
         self.pdk_dropdown.currentTextChanged.connect(self.pdk_changed)
         self.pdk_dropdown.setToolTip("Select one from available PDKs")
         self.layout.addWidget(self.pdk_label)
         self.layout.addWidget(self.pdk_dropdown)
 
         self.pdk = self.pdk_dropdown.currentText()
+
+        # Designs of the selected PDK, from the design catalog
+        self.design_filter = QLineEdit()
+        self.design_filter.setPlaceholderText("Filter designs")
+        self.design_filter.textChanged.connect(self.populate_design_list)
+        self.layout.addWidget(self.design_filter)
+        self.design_list = QListWidget()
+        self.design_list.setMaximumHeight(150)
+        self.design_list.setToolTip("Designs of the selected PDK (✔ final results, … partial results)")
+        self.design_list.itemClicked.connect(self.select_design)
+        self.layout.addWidget(self.design_list)
         
         # Imported Design Label
         self.imported_design_label = QLabel("Imported Design: None")
@@ -376,6 +2648,34 @@ class ConfigWidget(QWidget):
         self.openGui_button.setToolTip("Open Generated GDSII File")
         self.layout.addWidget(self.openGui_button)
 
+        # Quick look at the final layout without starting OpenROAD
+        self.layout_button = QPushButton("Layout Preview")
+        self.layout_button.clicked.connect(self.open_layout)
+        self.layout_button.setToolTip("Draw the final GDS (or DEF) of the design in tiles, without loading the OpenROAD GUI")
+        self.layout.addWidget(self.layout_button)
+
+        # Stage runtime/memory history
+        self.history_button = QPushButton("Run History")
+        self.history_button.clicked.connect(self.open_history)
+        self.history_button.setToolTip("Runtime and memory of every stage across runs")
+        self.layout.addWidget(self.history_button)
+
+        # Design space exploration over config.mk variables
+        self.sweep_button = QPushButton("Parameter Sweep")
+        self.sweep_button.clicked.connect(self.open_sweep)
+        self.sweep_button.setToolTip("Build every combination of config.mk values as its own FLOW_VARIANT and compare the results")
+        self.layout.addWidget(self.sweep_button)
+
+        self.storage_button = QPushButton("Disk Usage")
+        self.storage_button.clicked.connect(self.open_storage)
+        self.storage_button.setToolTip("Space taken by results, logs and objects per design, run and stage, and retention cleanup")
+        self.layout.addWidget(self.storage_button)
+
+        self.open_file_button = QPushButton("Open File")
+        self.open_file_button.clicked.connect(self.open_file)
+        self.open_file_button.setToolTip("View a netlist, DEF, SPEF or log; large files open read-only")
+        self.layout.addWidget(self.open_file_button)
+
         # Run make clean
         # self.openGui_button = QPushButton("Make clean")
         # self.openGui_button.clicked.connect(self.makeClean)
@@ -429,6 +2729,20 @@ class ConfigWidget(QWidget):
         self.text_edit = QTextEdit()
         self.text_edit.setVisible(False)
         self.layout.addWidget(self.text_edit)
+
+        # Effective flow variables of the config.mk being edited and where each one is set
+        self.variables_table = QTableWidget(0, 3)
+        self.variables_table.setHorizontalHeaderLabels(["Variable", "Value", "Set in"])
+        self.variables_table.verticalHeader().setVisible(False)
+        self.variables_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.variables_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.variables_table.setVisible(False)
+        self.layout.addWidget(self.variables_table)
+        self.variables_timer = QTimer(self)
+        self.variables_timer.setSingleShot(True)
+        self.variables_timer.setInterval(300)  # re-evaluated while typing, once typing pauses
+        self.variables_timer.timeout.connect(self.update_variables)
+        self.text_edit.textChanged.connect(self.variables_timer.start)
         
         self.save_button = QPushButton("Save File")
         self.save_button.setVisible(False)
@@ -438,60 +2752,92 @@ class ConfigWidget(QWidget):
         self.setLayout(self.layout)
     
     def is_ubuntu(self):
-        try:
-            # with open("/etc/os-release") as f:
-            #     return any("ubuntu" in line.lower() for line in f)
-            with open("/etc/os-release") as f:
-                content = f.read().lower()  # Read all content and convert to lowercase
-
-                if "ubuntu" in content:
-                    return "Ubuntu"
-                elif "centos" in content:
-                    return "CentOS"
-                elif "debian" in content:
-                    return "Debian"
-                else:
-                    return "Unknown Linux distribution"
-        except FileNotFoundError:
-            return False
+        return linux_distribution()
 
 
+    def deferred_startup(self):
+        """Work that is not needed for the first paint (design scan, network)"""
+        self.main_window.catalog_watcher.changed.connect(self.catalog_changed)
+        self.main_window.catalog_watcher.start()
+        self.check_latest_version(self.repo_name, self.version)
+
+    def catalog_changed(self):
+        self.populate_pdk_dropdown()
+        self.populate_design_list()
+
     def populate_pdk_dropdown(self):
-        pdk_path = "../flow/designs"
-        if os.path.exists(pdk_path):
-            items = [item for item in os.listdir(pdk_path) if item != 'src']
+        items = self.main_window.catalog.design_platforms()
+        if items != [self.pdk_dropdown.itemText(i) for i in range(self.pdk_dropdown.count())]:
+            current = self.pdk_dropdown.currentText()
+            self.pdk_dropdown.blockSignals(True)  # not a user change, don't log it
+            self.pdk_dropdown.clear()
             self.pdk_dropdown.addItems(items)
+            if current in items:
+                self.pdk_dropdown.setCurrentText(current)
+            self.pdk_dropdown.blockSignals(False)
+            self.pdk = self.pdk_dropdown.currentText()
             # self.pdk_dropdown.addItems(os.listdir(pdk_path))
 
+    def populate_design_list(self):
+        marks = {"final": " ✔", "partial": " …", "none": ""}
+        self.design_list.clear()
+        for design, entry in self.main_window.catalog.filter(self.pdk, self.design_filter.text()):
+            item = QListWidgetItem(design + marks.get(entry["results"], ""))
+            item.setData(Qt.ItemDataRole.UserRole, design)
+            clock = f"{entry['clock_period']}" if entry["clock_period"] is not None else "-"
+            utilization = entry["core_utilization"] if entry["core_utilization"] is not None else "-"
+            item.setToolTip(f"DESIGN_NAME: {entry['design_name']}\nClock period: {clock}\n"
+                            f"CORE_UTILIZATION: {utilization}\nResults: {entry['results']}")
+            self.design_list.addItem(item)
+            if design == self.imported_design:
+                self.design_list.setCurrentItem(item)
+
+    def select_design(self, item):
+        self.imported_design = item.data(Qt.ItemDataRole.UserRole)
+        self.imported_design_label.setText(f"Imported Design: {self.imported_design}")
+        self.log(decoText(f"Design changed to: {self.imported_design}",col='yellow',underline='underline'))
+
     def check_latest_version(self,repo: str, current_version: str = None):
         """
-        Checks the latest release version of a GitHub repository.
+        Checks the latest release version of a GitHub repository in the background.
+        versionLabel is updated when the answer arrives.
 
         Parameters:
             repo (str): GitHub repository in "owner/repo" format.
             current_version (str): (Optional) Your currently installed version.
-
-        Returns:
-            str: The latest version tag name.
         """
-        url = f"https://api.github.com/repos/{repo}/releases/latest"
+        settings = self.main_window.settings
+        checker = UpdateCheck(repo,
+                              base_url=settings.get("update_api_url"),
+                              cache_path=os.path.join(settings.cache_dir(), "latest_release.json"),
+                              ttl=settings.get("update_check_ttl"))
 
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+        def found(latest_version):
+            if current_version and latest_version != current_version:
+                self.versionLabel.setText(f"{current_version}\nnewer version {latest_version} is available")
 
-            latest_release = response.json()
-            latest_version = latest_release["tag_name"]
+        self.update_thread = UpdateCheckThread(checker, self)
+        self.update_thread.found.connect(found)
+        self.update_thread.failed.connect(lambda error: self.log(f"Error checking for updates: {error}"))
+        self.update_thread.start()
 
-            # print(f"Latest version on GitHub: {latest_version}")
+    
+    # Button action methods
+    def open_history(self):
+        self.history_window = HistoryWindow(self.main_window, self.imported_design, self.pdk)
+        self.history_window.exec()
 
-            return latest_version
+    def open_sweep(self):
+        # Kept and only shown again: it owns the callbacks of the sweep's running jobs
+        if getattr(self, "sweep_window", None) is None:
+            self.sweep_window = SweepWindow(self.main_window)
+        self.sweep_window.show()
+        self.sweep_window.raise_()
 
-        except requests.exceptions.RequestException as e:
-            self.log("Error checking for updates:", e)
+    def open_storage(self):
+        self.storage_window = StorageWindow(self.main_window)
+        self.storage_window.exec()
 
-    
-    # Button action methods
     def open_settings(self):
         # self.log("Settings button clicked")
         # self.settings_window = SettingsWindow(self)
@@ -502,13 +2848,14 @@ class ConfigWidget(QWidget):
         # self.log(f"PDK changed to: {text}")
         self.pdk = text
         self.main_window.log(decoText(f"PDK changed to: {self.pdk}",col='yellow',underline='underline'))
+        self.populate_design_list()
         # self.imported_design_label.setText(f"Imported Design: {self.imported_design}")
         
     
     def source_env(self):
         # self.log("Source Env button clicked")
         if self.is_ubuntu():
-            self.srun("cd .. && source ./env.sh && cd OpenROAD_HelperGUI")
+            self.main_window.source_flow_env()
             self.log(decoText(".env sourcing",col='yellow',underline='underline'))
         else:
             self.log("NOT UBUNTU")
@@ -518,37 +2865,6 @@ class ConfigWidget(QWidget):
         self.imported_design = None
         self.imported_design_label.setText(f"Imported Design: {self.imported_design}")
         
-    def combine_verilog_files(self,input_dir, output_dir,name):
-        """
-        Combines all .v files in the given directory into a single .v file.
-
-        Parameters:
-        input_dir (str): Path to the directory containing .v files.
-        output_file (str): Path to the output .v file to be created.
-        """
-        if not os.path.isdir(input_dir):
-            raise ValueError(f"The path '{input_dir}' is not a valid directory.")
-
-        verilog_files = sorted(
-        [f for f in os.listdir(input_dir) if f.endswith(".v")],
-        key=lambda x: x.lower()
-        )
-
-        if not verilog_files:
-            raise FileNotFoundError("No .v files found in the specified directory.")
-        
-        filepath = output_dir + "/" + name
-
-        with open(filepath, "w") as outfile:
-            for filename in verilog_files:
-                file_path = os.path.join(input_dir, filename)
-                with open(file_path, "r") as infile:
-                    outfile.write(f"// --- Start of {filename} ---\n")
-                    outfile.write(infile.read())
-                    # outfile.write(f"\n// --- End of {filename} ---\n\n")
-
-        self.log(f"Combined {len(verilog_files)} files into '{filepath}'.")
-    
     def import_design(self):
         # self.log("Import Design button clicked")
         design_folder = QFileDialog.getExistingDirectory(self, "Select Design Folder")
@@ -556,77 +2872,90 @@ class ConfigWidget(QWidget):
             self.imported_design = os.path.basename(design_folder)
             self.imported_design_label.setText(f"Imported Design: {self.imported_design}")
             selected_pdk = self.pdk_dropdown.currentText()
-            dest_src = f"../flow/designs/src/{self.imported_design}"
-            dest_pdk = f"../flow/designs/{selected_pdk}/{self.imported_design}"
-            
-            shutil.copytree(design_folder, dest_src, dirs_exist_ok=True)
+
+            # shutil.copytree(design_folder, dest_src, dirs_exist_ok=True)
             # shutil.copytree(design_folder, dest_pdk, dirs_exist_ok=True)
-            os.makedirs(dest_pdk, exist_ok=True)
-            
-            self.combine_verilog_files(input_dir=design_folder, output_dir = dest_src ,name = self.imported_design + ".v")
-            
-            self.reset_config()
-            self.reset_constraint()
-
-            # shutil.copy("defaultConstraints.txt", f"{dest_pdk}/constraint.sdc")
-            # shutil.copy("defaultConfig.txt", f"{dest_pdk}/config.mk")
-            self.log(decoText(f"Imported {self.imported_design} into {dest_pdk} and {dest_src}",col='yellow',underline='underline'))
+            # Only changed RTL/constraint files are written, off the GUI thread
+            self.import_design_button.setEnabled(False)
+            self.log(decoText(f"Importing {self.imported_design} from {design_folder}",col='yellow'))
+            self.import_thread = ImportThread(self.main_window.core, design_folder, selected_pdk,
+                                              self.imported_design, self)
+            self.import_thread.progress.connect(self.import_progress)
+            self.import_thread.done.connect(self.import_finished)
+            self.import_thread.failed.connect(self.import_failed)
+            self.import_thread.start()
+
+    def import_progress(self, done, total, rel):
+        self.main_window.statusBar().showMessage(f"Importing {self.imported_design}: {done}/{total} {rel}", 2000)
+
+    def import_finished(self, result):
+        self.import_design_button.setEnabled(True)
+        bundle = result.bundle
+        self.log(f"Synced {result.src_dir}: {result.stats}")
+
+        if not bundle.units:
+            self.log(decoText("No Verilog modules found in the imported design",col='red'))
+        elif not bundle.top_found:
+            self.log(decoText(f"Top module {self.imported_design} not found, bundled every module",col='orange'))
+        for name, kept, ignored in bundle.duplicates:
+            self.log(decoText(f"Module {name} is defined in {kept} and {ignored}, using {kept}",col='orange'))
+        for name in sorted(set(bundle.unresolved)):
+            self.log(decoText(f"`include \"{name}\" not found",col='orange'))
+        self.log(f"Bundled {bundle} into '{bundle.path}'.")
+
+        # config.mk and constraint.sdc were reset from gcd by the import
+        for warning in result.warnings:
+            self.log(warning)
+        self.reload_design_files()
+
+        # shutil.copy("defaultConstraints.txt", f"{dest_pdk}/constraint.sdc")
+        # shutil.copy("defaultConfig.txt", f"{dest_pdk}/config.mk")
+        self.log(decoText(f"Imported {self.imported_design} into {result.design_dir} and {result.src_dir}",col='yellow',underline='underline'))
+
+    def import_failed(self, error):
+        self.import_design_button.setEnabled(True)
+        self.log(decoText(f"Import of {self.imported_design} failed: {error}",col='red'))
     
+    def reload_design_files(self, *names):
+        """Reload the editor if it shows one of the design's files"""
+        selected_pdk = self.pdk_dropdown.currentText()
+        for name in names or ("config.mk", "constraint.sdc"):
+            if self.current_file == f"../flow/designs/{selected_pdk}/{self.imported_design}/{name}":
+                self.edit_file(name)
+
     def reset_config(self):
         # self.log("Reset config.mk button clicked")
-        selected_pdk = self.pdk_dropdown.currentText()
         # shutil.copy("defaultConfig.txt", f"../flow/design/{selected_pdk}/{self.imported_design}/config.mk")
-
-        path = f"../flow/designs/{selected_pdk}/gcd/config.mk"
-
-        if self.imported_design and selected_pdk and os.path.exists(path):
-            with open(path, "r") as file:
-                    makefile_data = (file.read().replace("gcd",self.imported_design))
-                    with open(f"../flow/designs/{selected_pdk}/{self.imported_design}/config.mk", "w") as file:
-                        file.write(makefile_data)
-
-            if self.current_file == f"../flow/designs/{selected_pdk}/{self.imported_design}/config.mk":
-                self.edit_file("config.mk")
-            self.log(decoText("Reset config.mk",col='yellow',underline='underline'))
-        else:
-            if os.path.exists(path):
-                self.log("SELECT DESIGN AND PDK FIRST")
-            else:
-                self.log("gcd constraint and config file missing\nUnable to copy reference content")
+        try:
+            self.main_window.core.reset_config(self.pdk_dropdown.currentText(), self.imported_design)
+        except (CoreError, OSError) as e:
+            self.log(str(e))
+            return
+        self.reload_design_files("config.mk")
+        self.log(decoText("Reset config.mk",col='yellow',underline='underline'))
     
     def reset_constraint(self):
         # self.log("Reset constraint.sdc button clicked")
-        selected_pdk = self.pdk_dropdown.currentText()
         # shutil.copy("defaultconstraint.txt", f"../flow/design/{selected_pdk}/{self.imported_design}/constraint.sdc")
-
-        path = f"../flow/designs/{selected_pdk}/gcd/constraint.sdc"
-
-        if self.imported_design and selected_pdk and os.path.exists(path):
-            with open(path, "r") as file:
-                    makefile_data = (file.read().replace("gcd",self.imported_design))
-                    with open(f"../flow/designs/{selected_pdk}/{self.imported_design}/constraint.sdc", "w") as file:
-                        file.write(makefile_data)
-
-            if self.current_file == f"../flow/designs/{selected_pdk}/{self.imported_design}/constraint.sdc":
-                self.edit_file("constraint.sdc")
-            self.log(decoText("Reset constraint.sdc",col='yellow',underline='underline'))
-        else:
-            if os.path.exists(path):
-                self.log("SELECT DESIGN AND PDK FIRST")
-            else:
-                self.log("gcd constraint and constraint file missing\nUnable to copy reference content")
+        try:
+            self.main_window.core.reset_constraint(self.pdk_dropdown.currentText(), self.imported_design)
+        except (CoreError, OSError) as e:
+            self.log(str(e))
+            return
+        self.reload_design_files("constraint.sdc")
+        self.log(decoText("Reset constraint.sdc",col='yellow',underline='underline'))
     
     def set_makefile(self):
         # self.log("Set Makefile button clicked")
-        path = "../flow/"
-        if self.imported_design:
-            with open("defaultMakefile.txt", "r") as file:
-                makefile_data = file.read().replace("DESIGN_CONFIG ?= ./designs/nangate45/gcd/config.mk", "DESIGN_CONFIG ?= ./designs/"+self.pdk_dropdown.currentText()+"/"+self.imported_design+"/config.mk")
-            with open(path+"Makefile", "w") as file:
-                file.write(makefile_data)
+        try:
+            changed = self.main_window.core.set_makefile(self.pdk_dropdown.currentText(), self.imported_design)
+        except (CoreError, OSError) as e:
+            self.log(str(e))
+            return
+        if changed:
             self.log(decoText("Makefile updated",col='yellow',underline='underline'))
         else:
-            self.log("No design has been imported yet.")
+            self.log(decoText("Makefile already up to date",col='yellow',underline='underline'))
     
     
     def run_make_step(self,step=""):
@@ -639,23 +2968,45 @@ class ConfigWidget(QWidget):
             # print(decoText(temp,col='yellow',underline='underline'))
 
             if self.imported_design and self.pdk:
-                self.main_window.log(temp)
-                self.srun(f"cd .. && cd flow && make DESIGN_CONFIG=./designs/{self.pdk}/{self.imported_design}/config.mk {step}"+f' && cd .. && cd OpenROAD_HelperGUI;echo {temp}')
+                if step in STAGES or step == "":
+                    # Only re-run from the earliest stage whose inputs really changed
+                    self.main_window.submit_incremental(self.pdk, self.imported_design, step)
+                    return
+                job = BuildJob(self.pdk, self.imported_design, step)
+                if step.startswith("clean_"):
+                    job.callbacks.append(self.main_window.stage_cleaned)
             else:
                 # self.log("SELECT DESIGN AND PDK FIRST")
                 self.main_window.log(decoText('\nDEFAULT design',col='yellow',underline='underline'))
-                self.srun(f"cd .. && cd flow && make {step}"+f' && cd .. && cd OpenROAD_HelperGUI')
-            self.log(decoText(f"Running make {step}...",col='yellow',underline='underline'))
+                job = BuildJob(None, None, step)
+            self.main_window.submit_job(job)
+            self.log(decoText(f"Queued make {step}...",col='yellow',underline='underline'))
         else:
             self.log("NOT UBUNTU")
 
     def openGui(self):
         if self.is_ubuntu():
-            self.srun('cd .. && cd flow && make gui_final && cd .. && cd OpenROAD_HelperGUI')
+            self.main_window.launch("make", ["gui_final"])
             self.log(decoText("Opening OpenROAD GUI",col='yellow',underline='underline'))
         else:
             self.log("NOT UBUNTU")
 
+    def open_layout(self):
+        from layout_preview import FLOW_LAYOUTS
+        directory = self.main_window.flow_dir
+        if self.imported_design and self.pdk:
+            nickname = self.main_window.catalog.designs.get(self.pdk, {}).get(self.imported_design, {}).get("nickname", self.imported_design)
+            directory = os.path.join(self.main_window.flow_dir, "results", self.pdk, nickname, "base")
+            for name in FLOW_LAYOUTS:
+                if os.path.isfile(os.path.join(directory, name)):
+                    self.main_window.open_layout(os.path.join(directory, name), self.pdk)
+                    return
+            self.log(decoText(f"No {' or '.join(FLOW_LAYOUTS)} in {directory}",col='orange'))
+        file_path, _ = QFileDialog.getOpenFileName(self, "Layout Preview", directory if os.path.isdir(directory) else self.main_window.flow_dir,
+                                                   "Layouts (*.gds *.gds2 *.GDS *.def *.DEF)")
+        if file_path:
+            self.main_window.open_layout(file_path, self.pdk)
+
     def makeClean(self):
         if self.is_ubuntu():
             self.srun('make clean')
@@ -666,18 +3017,38 @@ class ConfigWidget(QWidget):
         self.main_window.run("cd "+ self.main_window.path)
         self.main_window.run(cmd)
 
+    def open_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open File", self.main_window.flow_dir)
+        if not file_path:
+            return
+        if file_path.lower().endswith((".gds", ".gds2")):
+            self.main_window.open_layout(file_path, self.pdk)  # binary, nothing to read in an editor
+        elif os.path.getsize(file_path) > self.main_window.settings.get("editor_max_bytes"):
+            self.main_window.open_viewer(file_path)
+        else:
+            self.current_file = file_path
+            with open(file_path, "r", errors="replace") as file:
+                self.text_edit.setText(file.read())
+            self.text_edit.setVisible(True)
+            self.save_button.setVisible(True)
+            self.variables_table.setVisible(False)
+
     def edit_file(self, file_name):
         selected_pdk = self.pdk_dropdown.currentText()
 
         if self.imported_design and selected_pdk:
             file_path = f"../flow/designs/{selected_pdk}/{self.imported_design}/{file_name}"
-            if os.path.exists(file_path):
+            if os.path.exists(file_path) and os.path.getsize(file_path) > self.main_window.settings.get("editor_max_bytes"):
+                self.main_window.open_viewer(file_path)
+            elif os.path.exists(file_path):
                 self.current_file = file_path
                 
                 with open(file_path, "r") as file:
                     self.text_edit.setText(file.read())
                 self.text_edit.setVisible(True)
                 self.save_button.setVisible(True)
+                self.variables_table.setVisible(file_name == "config.mk")
+                self.update_variables()
         else:
             self.log(decoText("SELECT DESIGN AND PDK FIRST",col='orange',underline='underline',bold='bold'))
     
@@ -688,38 +3059,428 @@ class ConfigWidget(QWidget):
                 file.write(self.text_edit.toPlainText())
             self.text_edit.setVisible(False)
             self.save_button.setVisible(False)
+            self.variables_table.setVisible(False)
             self.log(decoText(f"Saved {self.current_file}",col='yellow',underline='underline'))
+
+    def update_variables(self):
+        """Fill the variables table from the editor content, evaluated like make would"""
+        if not self.variables_table.isVisible() or not self.imported_design:
+            return
+        main_window = self.main_window
+        environment = main_window.flow_env.apply(os.environ) if main_window.flow_env.ready else os.environ
+        try:
+            evaluator = flow_variables(main_window.flow_dir, self.pdk_dropdown.currentText(), self.imported_design,
+                                       environment, config_text=self.text_edit.toPlainText())
+            rows = [(name, variable, evaluator.value(name)) for name, variable in sorted(evaluator.variables.items())
+                    if variable.origin != "environment"]
+        except EVALUATION_ERRORS as e:
+            # a half typed expression; the table keeps the last values that could be evaluated
+            self.variables_table.setToolTip(f"config.mk cannot be evaluated: {e}")
+            return
+        self.variables_table.setToolTip("")
+        self.variables_table.setRowCount(len(rows))
+        for row, (name, variable, value) in enumerate(rows):
+            applied = [entry for entry in variable.history if entry.applied]
+            # the last plain assignment sets the value, later += only append to it
+            base = max((i for i, entry in enumerate(applied) if entry.op != "+="), default=0)
+            where = applied[base].where(main_window.flow_dir) if applied else variable.origin
+            if len(applied) > base + 1:
+                where += " + " + ", ".join(entry.where(main_window.flow_dir) for entry in applied[base + 1:])
+            if base:
+                where += f" (overrides {', '.join(entry.where(main_window.flow_dir) for entry in applied[:base])})"
+            history = "\n".join(f"{entry.where(main_window.flow_dir)}: {name} {entry.op} {entry.value}"
+                                 + ("" if entry.applied else f"  [ignored: {entry.note}]")
+                                 for entry in variable.history)
+            for column, text in enumerate((name, value, where)):
+                item = QTableWidgetItem(text)
+                item.setToolTip(history if column != 1 else value)
+                self.variables_table.setItem(row, column, item)
         
 # Main application window
 class SimpleMainWindow(QMainWindow):
 
     path = ""
+    first_painted = pyqtSignal()
+    shell_ready = pyqtSignal()  # first prompt of the persistent shell
+    command_finished = pyqtSignal(object)  # StepResult of a command run in the shell
 
     def restart_app(self):
         print("Restarting...")
         python = sys.executable
         os.execl(python, python, *sys.argv)  # Relaunch with same args
 
-    def __init__(self,data,activeStyle):
-        self.data = data
+    def __init__(self,settings,activeStyle):
+        self.settings = settings
 
         super().__init__()
+
+        # Coalesce settings changes into one atomic write after a quiet period
+        self.settings_timer = QTimer(self)
+        self.settings_timer.setSingleShot(True)
+        self.settings_timer.setInterval(settings.get("settings_save_delay_ms"))
+        self.settings_timer.timeout.connect(self.settings.save)
+        self.settings.listeners.append(lambda key, value: self.settings_timer.start())
         self.activeStyle = activeStyle
+
+        # Every run's output is also kept on disk, compressed; partial blocks are written once output pauses
+        self.log_store = LogStore(settings.cache_dir("logs"), settings.get("log_store_max_runs"),
+                                  settings.get("log_store_max_mb") << 20)
+        self.log_store_timer = QTimer(self)
+        self.log_store_timer.setInterval(1000)
+        self.log_store_timer.timeout.connect(lambda: self.log_store.flush_idle(1))
+        self.log_store_timer.start()
         self.initUI()
         self.process = QProcess(self)  # Persistent shell process
-        env = QProcessEnvironment.systemEnvironment()
-        env.insert("TERM", "dumb")
-        self.process.setProcessEnvironment(env)
+        self.framer = LineFramer()  # Carries partial lines between output chunks
         self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
         self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.started.connect(self.write_pending_commands)
         self.path = os.path.dirname(os.path.abspath(__file__))
+        self.flow_dir = os.path.join(os.path.dirname(self.path), "flow")
         self.log("Current Directory:\n"+self.path)
 
-        # Start a persistent bash shell
-        self.process.start("bash", ["-i"])
+        # The operations behind the buttons, shared with the command line (cli.py)
+        self.core = FlowProject(self.path, settings)
+        # env.sh is sourced once in a helper process and the result cached on disk;
+        # every process started by the app gets it through process_environment()
+        self.flow_env = self.core.flow_env
+        self.shell_has_flow_env = False
+        self.launched = []  # processes started with launch()
+        self.history = RunHistory(os.path.join(settings.cache_dir(), "history.sqlite"))
+        self.catalog = DesignCatalog(self.flow_dir, settings.cache_dir())
+        self.catalog_watcher = CatalogWatcher(self.catalog, self)
+
+        # The persistent bash shell (and its rc files) is started after the first paint;
+        # commands sent before it is running are queued
+        self.pending_commands = []
+        self.shell_commands = deque()  # StepResults of commands sent and not finished yet
+        self.painted = False
+        self.is_shell_ready = False
         
         self.setWindowTitle("OpenROAD HelperGUI")  # Set window title
         self.setGeometry(100, 100, 600, 300)  # Set window size and position
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
+            QTimer.singleShot(0, self.deferred_startup)
+
+    def deferred_startup(self):
+        if self.flow_env.load_cached():
+            self.log(decoText("Flow environment loaded from cache",col='yellow',underline='underline'))
+            self.shell_has_flow_env = True
+
+        # Start a persistent bash shell
+        self.process.setProcessEnvironment(self.process_environment())
+        self.process.errorOccurred.connect(self.shell_error)
+        # (no line editing: readline would echo, and mangle, every command line we write)
+        self.process.start("bash", ["--noediting", "-i"])
+        self.resource_monitor.timer.start()
+        self.config_widget.deferred_startup()
+        self.restore_jobs()
+
+    def restore_jobs(self):
+        """Show the jobs an earlier session left running or queued, and those that finished since"""
+        queued, started = self.build_pool.restore()
+        for job in started:
+            job.view = JobView(job, self.build_pool, self.settings)
+            self.log_tabs.addTab(job.view, job.name)
+            self.build_pool.attach(job)
+        for job in queued:
+            self.submit_job(job)
+        if queued or started:
+            self.log(decoText(f"Restored {len(started)} started and {len(queued)} queued jobs of the last session",col='yellow'))
+
+    def shell_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.log("Error Occured")
+            self.log(f"Error type: {error}")
+            self.log(f"Error details: {self.process.errorString()}")
+
+    def process_environment(self):
+        """Environment for every process the app starts, with the flow environment once known"""
+        base = self.flow_env.apply(os.environ) if self.flow_env.ready else os.environ
+        env = QProcessEnvironment()
+        for name, value in base.items():
+            env.insert(name, value)
+        env.insert("TERM", "dumb")
+        return env
+
+    def source_flow_env(self):
+        """Make the flow environment available, capturing it only if the cache is stale"""
+        if not os.path.exists(self.flow_env.env_sh):
+            self.log(decoText(f"{self.flow_env.env_sh} not found",col='orange',underline='underline',bold='bold'))
+            return
+        if self.flow_env.load_cached():
+            self.apply_flow_env_to_shell()
+            return
+
+        self.log_widget.indicator.setColor("red")
+        self.flow_env_thread = FlowEnvThread(self.flow_env, self)
+        self.flow_env_thread.captured.connect(self.flow_env_captured)
+        self.flow_env_thread.failed.connect(lambda error: self.log(decoText(f"Sourcing env.sh failed: {error}",col='red')))
+        self.flow_env_thread.start()
+
+    def flow_env_captured(self):
+        self.log(decoText(f"Flow environment captured ({len(self.flow_env.changes)} variables)",col='yellow',underline='underline'))
+        self.shell_has_flow_env = False  # the capture may differ from what the shell has
+        self.apply_flow_env_to_shell()
+
+    def apply_flow_env_to_shell(self):
+        """Bring the already running persistent shell up to date with the captured environment"""
+        if self.shell_has_flow_env:
+            return
+        script = os.path.join(os.path.dirname(self.flow_env.cache_path), "flowenv.sh")
+        with open(script, "w") as file:
+            file.write(self.flow_env.shell_script())
+        self.run(f"source '{script}'")
+        self.shell_has_flow_env = True
+
+    def launch(self, program, args, cwd=None):
+        """Start a separate process with the flow environment; its output goes to the log"""
+        runner = CommandRunner(program, args, cwd or self.flow_dir, self.process_environment(), self)
+
+        def finished(result):
+            self.log_widget.update_counts()
+            self.log(decoText(result.summary(),col='yellow' if result.ok else 'red'))
+            self.launched.remove(runner)
+            runner.deleteLater()
+
+        runner.output.connect(self.log_widget.append_output)
+        runner.finished.connect(finished)
+        self.launched.append(runner)
+        runner.start()
+        return runner
+
+    def flow_manifest(self, pdk, design):
+        return self.core.manifest(pdk, design)
+
+    def submit_incremental(self, pdk, design, step):
+        """
+        Hash the stage inputs in the background, then run make only from the
+        earliest stage that is out of date (cleaning that stage first so make
+        cannot skip it), or nothing at all if the target is still valid.
+        Stages the artifact cache holds for the same inputs are restored from
+        it first, and the ones built are stored in it afterwards.
+        """
+        target = step or STAGES[-1]
+        manifest = self.flow_manifest(pdk, design)
+        self.log(decoText(f"Checking inputs of {design}/{pdk}...",col='yellow'))
+
+        def planned(plan):
+            start, inputs, files = plan
+            if start is None:
+                self.log(decoText(f"{design}/{pdk} {target} is up to date, nothing to run",col='lime'))
+                return
+            restored = manifest.restore_mtimes(inputs, files, start)
+            skipped = STAGES[:STAGES.index(start)]
+            self.log(decoText(f"{design}/{pdk}: running from {start}"
+                              + (f", skipping {', '.join(skipped)}" if skipped else "")
+                              + (f" ({restored} unchanged files keep their timestamps)" if restored else ""),col='yellow'))
+
+            def build_from(first, keys):
+                def built(job):
+                    if job.status == "done":
+                        manifest.save(inputs, files, target)
+                        self.store_artifacts(pdk, design, keys)
+
+                def cleaned(job):
+                    if job.status == "done":
+                        self.submit_job(BuildJob(pdk, design, step, on_finished=built))
+
+                self.submit_job(BuildJob(pdk, design, f"clean_{first}", on_finished=cleaned))
+
+            def fetched(result):
+                first, cached, keys = result
+                if cached:
+                    self.log(decoText(f"{design}/{pdk}: restored {', '.join(cached)} from the artifact cache",col='lime'))
+                if first is None:
+                    manifest.save(inputs, files, target)
+                    self.log(decoText(f"{design}/{pdk} {target} is up to date, nothing to run",col='lime'))
+                    return
+                build_from(first, keys)
+
+            def fetch_failed(error):
+                self.log(decoText(f"Artifact cache unusable, building: {error}",col='red'))
+                build_from(start, {})
+
+            if self.core.artifact_cache() is None:
+                build_from(start, {})
+                return
+            self.log(decoText(f"Looking up {design}/{pdk} in the artifact cache...",col='yellow'))
+            fetch = TaskThread(lambda: self.core.restore_stages(pdk, design, start, target, inputs), self)
+            fetch.done.connect(fetched)
+            fetch.failed.connect(fetch_failed)
+            fetch.finished.connect(fetch.deleteLater)
+            fetch.start()
+
+        thread = TaskThread(lambda: manifest.plan(target), self)
+        thread.done.connect(planned)
+        thread.failed.connect(lambda error: self.log(decoText(f"Input check failed: {error}",col='red')))
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def store_artifacts(self, pdk, design, keys):
+        """Copy what a build produced into the artifact cache in the background"""
+        if not keys:
+            return
+
+        def stored(stages):
+            if stages:
+                self.log(decoText(f"{design}/{pdk}: stored {', '.join(stages)} in the artifact cache",col='lime'))
+
+        thread = TaskThread(lambda: self.core.store_stages(pdk, design, keys), self)
+        thread.done.connect(stored)
+        thread.failed.connect(lambda error: self.log(decoText(f"Storing in the artifact cache failed: {error}",col='red')))
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def stage_cleaned(self, job):
+        if job.status == "done":
+            self.core.invalidate(job.pdk, job.design, job.step[len("clean_"):])
+
+    def resume_job(self, job):
+        """Run a failed or cancelled job again, from the stage after the last one it completed"""
+        target = job.step or STAGES[-1]
+        nickname = self.catalog.designs.get(job.pdk, {}).get(job.design, {}).get("nickname", job.design)
+        completed = last_completed_stage(self.flow_dir, job.pdk, nickname, job.variant)
+        first = STAGES[STAGES.index(completed) + 1] if completed in STAGES[:-1] else None if completed else STAGES[0]
+        if first is None or STAGES.index(first) > STAGES.index(target):
+            self.log(decoText(f"{job.name}: {target} is already complete, nothing to resume",col='lime'))
+            return
+        resumed = BuildJob(job.pdk, job.design, job.step, variant=job.variant, variables=job.variables)
+        resumed.resume_from = first
+        self.log(decoText(f"Resuming {job.name} from {first}" + (f", {completed} was completed" if completed else ""),col='yellow'))
+        self.submit_job(resumed)
+
+    def submit_job(self, job, show=True):
+        job.view = JobView(job, self.build_pool, self.settings)
+        if show:
+            self.log_tabs.addTab(job.view, job.name)
+            self.log_tabs.setCurrentWidget(job.view)
+        self.build_pool.submit(job)
+
+    def job_changed(self, job):
+        job.view.update_status()
+        if job.status == "running" and job.design and job.pdk and self.log_tabs.indexOf(job.view) >= 0:
+            self.follow_qor(job)
+        if job.status in ("done", "failed", "cancelled"):
+            if job.view.qor.tailer is not None:
+                job.view.qor.stop()
+            timing = f" (exit code {job.result.exit_code}, {format_duration(job.result.duration)})" if job.result else ""
+            self.log(decoText(f"{job.name}: {job.status}{timing}",col=BuildJob.STATUS_COLORS[job.status]))
+            if job.design and job.pdk and job.result and job.result.start_time:
+                self.record_history(job)
+
+    def follow_qor(self, job):
+        """Show the QoR of a running job as its reports appear"""
+        nickname = self.catalog.designs.get(job.pdk, {}).get(job.design, {}).get("nickname", job.design)
+        dirs = [os.path.join(self.flow_dir, kind, job.pdk, nickname, job.variant) for kind in ("logs", "reports")]
+
+        def alarm(stage, wns):
+            self.log(decoText(f"{job.name}: WNS {wns:.3f} after {stage}, timing is failing",col='red'))
+            if self.settings.get("qor_alarm_cancel") and job.status == "running":
+                self.log(decoText(f"Cancelling {job.name}",col='red'))
+                self.build_pool.cancel(job)
+
+        if job.view.qor.tailer is None:
+            job.view.qor.alarm.connect(alarm)
+        job.view.qor.follow(dirs, job.result.start_time if job.result and job.result.start_time else time.time())
+
+    def record_history(self, job):
+        """Store the stage logs of a finished job and warn about stages that got slower"""
+        if job.step.startswith("clean_"):
+            return
+        nickname = self.catalog.designs.get(job.pdk, {}).get(job.design, {}).get("nickname", job.design)
+        logs_dir = os.path.join(self.flow_dir, "logs", job.pdk, nickname, job.variant)
+        result = job.result
+        if not self.history.ingest(logs_dir, job.design, job.pdk, job.variant, step=job.step, started=result.start_time,
+                                   duration=result.duration, exit_code=result.exit_code):
+            return
+        if job.variant != "base":
+            return  # sweep variants are not compared with the design's own baseline
+        threshold = self.settings.get("history_slowdown_percent")
+        for trend in self.history.trends(job.design, job.pdk, window=self.settings.get("history_baseline_runs"),
+                                         threshold=threshold):
+            if trend["slower"]:
+                self.log(decoText(f"{job.design}/{job.pdk} {trend['stage']} took {format_duration(trend['latest'])}, "
+                                  f"{trend['change']:+.0f}% over its baseline of {format_duration(trend['baseline'])}",col='orange'))
+
+    def update_jobs_status(self):
+        pool = self.build_pool
+        if self.settings.get("workers") and pool.dispatcher is not None:
+            reachable = sum(1 for worker in pool.dispatcher.workers if worker.info)
+            where = f"on {reachable}/{len(pool.dispatcher.workers)} workers"
+        else:
+            where = f"limit {pool.limit}, {pool.cores_per_job()} cores each"
+        self.statusBar().showMessage(f"Jobs: {len(pool.running)} running, {len(pool.queue)} queued ({where})")
+
+    def close_job_tab(self, index):
+        view = self.log_tabs.widget(index)
+        if view is self.log_widget:
+            return
+        if isinstance(view, (FileViewer, LayoutViewer)):
+            view.close_file()
+        elif view.job.status in ("queued", "running"):
+            self.build_pool.cancel(view.job)
+        self.log_tabs.removeTab(index)
+
+    def open_log_browser(self):
+        browser = LogBrowser(self.log_store, self)
+        browser.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        browser.show()
+
+    def open_viewer(self, path):
+        viewer = FileViewer(path)
+        self.log_tabs.addTab(viewer, os.path.basename(path))
+        self.log_tabs.setCurrentWidget(viewer)
+        self.log(decoText(f"Opened {path} read-only ({os.path.getsize(path) / 1e6:.1f} MB)",col='yellow'))
+
+    def open_layout(self, path, pdk=None):
+        lef_files = []
+        if path.lower().endswith(".def") and pdk:
+            # macro sizes and wire widths; the technology LEF first, it orders the layers
+            lef_files = sorted(glob.glob(os.path.join(self.flow_dir, "platforms", pdk, "**", "*.lef"), recursive=True),
+                               key=lambda lef: (not lef.endswith("tech.lef"), lef))
+        viewer = LayoutViewer(path, self.settings.cache_dir("layout"), lef_files)
+        self.log_tabs.addTab(viewer, os.path.basename(path))
+        self.log_tabs.setCurrentWidget(viewer)
+        self.log(decoText(f"Previewing {path} ({os.path.getsize(path) / 1e6:.1f} MB)",col='yellow'))
+
+    def write_pending_commands(self):
+        # Every prompt is preceded by a sentinel line with the last exit status
+        self.send(SHELL_SETUP, hidden=True)
+        for cmd in self.pending_commands:
+            self.send(cmd)
+        self.pending_commands = []
+
+    def send(self, cmd, hidden=False):
+        """Write one command line to the running shell and track it until its sentinel"""
+        result = StepResult(cmd, keep_lines=self.settings.get("log_max_lines"))
+        result.hidden = hidden
+        if not self.shell_commands:
+            result.started()  # otherwise it starts when the command before it finishes
+        self.shell_commands.append(result)
+        if not hidden:
+            self.log_widget.append_line(cmd)
+        self.log_widget.indicator.setColor("yellow")
+        self.process.write(f"{cmd}\n".encode())
+
+    def shell_command_finished(self, exit_code):
+        if not self.shell_commands:
+            return  # a prompt we did not ask for (e.g. an empty line)
+        result = self.shell_commands.popleft()
+        result.finished(exit_code)
+        if self.shell_commands:
+            self.shell_commands[0].started()
+        if not result.hidden:
+            if not result.ok:
+                self.log(decoText(result.summary(),col='red'))
+            self.command_finished.emit(result)
+        if not self.shell_commands:
+            self.log_widget.indicator.setColor("lime" if result.ok else "red")
         
     def initUI(self):
         self.central_widget = QWidget()
@@ -731,10 +3492,21 @@ class SimpleMainWindow(QMainWindow):
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
         
 
-        # Log widget to display application logs
+        # Log widget to display application logs, build jobs get a tab each
         #LEFT
         self.log_widget = LogWidget(self)
-        self.splitter.addWidget(self.log_widget)
+        self.log_widget.log_display.store = self.log_store.open_run("shell")
+        self.log_tabs = QTabWidget()
+        self.log_tabs.setTabsClosable(True)
+        self.log_tabs.tabCloseRequested.connect(self.close_job_tab)
+        self.log_tabs.addTab(self.log_widget, "Shell")
+        self.log_tabs.tabBar().setTabButton(0, self.log_tabs.tabBar().ButtonPosition.RightSide, None)
+        self.splitter.addWidget(self.log_tabs)
+
+        self.build_pool = BuildPool(self)
+        self.build_pool.job_started.connect(self.job_changed)
+        self.build_pool.job_finished.connect(self.job_changed)
+        self.build_pool.changed.connect(self.update_jobs_status)
         
         # Config widget where most of the buttons exist
         #RIGHT
@@ -742,6 +3514,8 @@ class SimpleMainWindow(QMainWindow):
         self.splitter.addWidget(self.config_widget)
         
         self.layout.addWidget(self.splitter)
+        self.resource_monitor = ResourceMonitor(self)
+        self.layout.addWidget(self.resource_monitor)
         
         self.central_widget.setLayout(self.layout)
         
@@ -749,65 +3523,48 @@ class SimpleMainWindow(QMainWindow):
         # self.log("Path is "+ self.path)  # Log initial message
 
     def is_ubuntu(self):
-        try:
-            # with open("/etc/os-release") as f:
-            #     return any("ubuntu" in line.lower() for line in f)
-            with open("/etc/os-release") as f:
-                content = f.read().lower()  # Read all content and convert to lowercase
-
-                if "ubuntu" in content:
-                    return "Ubuntu"
-                elif "centos" in content:
-                    return "CentOS"
-                elif "debian" in content:
-                    return "Debian"
-                else:
-                    return "Unknown Linux distribution"
-        except FileNotFoundError:
-            return False
+        return linux_distribution()
 
     def run(self, cmd ):
         if not(self.is_ubuntu() == False):
             """Send a command to the persistent shell"""
             if cmd:     #self.run_command(cmd = "ls")
-                # self.log_widget.indicator.setColor("red")
-
-                #Wrapper to encase the command into
-                wrapper = f"{cmd}\n"
+                if self.process.state() != QProcess.ProcessState.Running:
+                    # Shell not started yet: sent from write_pending_commands()
+                    self.pending_commands.append(cmd)
+                    return
 
-                self.process.write((wrapper).encode())
-                if not self.process.waitForStarted():
-                    error_type = self.process.error()             # e.g., QProcess.FailedToStart
-                    error_string = self.process.errorString()     # e.g., "Process failed to start"
-                    
-                    self.log("Error Occured")
-                    self.log(f"Error type: {error_type}")
-                    self.log(f"Error details: {error_string}")
-                    
-                    # self.log_widget.indicator.setColor("lime")
+                # Completion (exit code, duration) is reported through command_finished
+                self.send(cmd)
         else:
             self.log("Windows cannot run bash commands")
     
     def read_output(self):
-        """Read the output from the shell and clean it."""
-        output = self.process.readAllStandardOutput().data().decode()
-
-        if output.endswith("$ "):
-            self.log_widget.indicator.setColor("lime")#"green")
-        else:
-            self.log_widget.indicator.setColor("red")
+        """Read the output from the shell and queue it for the log view."""
+        lines = self.framer.feed(self.process.readAllStandardOutput().data())
+        prompt = self.framer.take_prompt()
 
-        lines = output.splitlines()  # Keep '\n'
+        index = self.log_widget.log_display.index
+        seen = len(index.tools)
+        append_output = self.log_widget.append_output
         for line in lines:
-            if line.endswith("$ "):
-                self.log(decoText(line,col='cyan',bold='bold'))# 'lightblue' 'lime' 'blue'
+            sentinel = SENTINEL_RE.search(line)
+            if sentinel is not None:
+                line = line[:sentinel.start()]  # output that did not end with a newline
+                if line:
+                    append_output(line)
+                self.shell_command_finished(int(sentinel.group(1)))
             else:
-                words = ['error', 'Error', 'fail','Failed']
-
-                if any(word in line for word in words):
-                    self.log(line,col='red')
-                else:
-                    self.log(line,col=None)
+                append_output(line)
+        if len(index.tools) != seen:
+            self.log_widget.update_counts()
+
+        if prompt is not None:
+            self.log_widget.append_line(prompt,col='cyan',bold=True)# 'lightblue' 'lime' 'blue'
+            if not self.is_shell_ready:
+                self.is_shell_ready = True
+                self.log_widget.indicator.setColor("lime")#"green")
+                self.shell_ready.emit()
     
     # Method to log messages to the log widget
     def log(self, message,col=None):
@@ -816,14 +3573,23 @@ class SimpleMainWindow(QMainWindow):
         else:
             self.log_widget.append_log(message)
 
+    def closeEvent(self, event):
+        # Don't lose a change that is still waiting for the debounce timer
+        self.settings_timer.stop()
+        self.settings.save()
+        for index in range(self.log_tabs.count()):
+            if isinstance(self.log_tabs.widget(index), (FileViewer, LayoutViewer)):
+                self.log_tabs.widget(index).close_file()  # stop background indexing and drawing
+        self.log_store.close_all()
+        self.resource_monitor.timer.stop()
+        super().closeEvent(event)
+
 # Entry point of the application
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    with open(filepath+"settings.json") as file:
-        data = json.load(file)
-        themes = data["themes"]
-        last_theme = themes[0]["data"]
+    settings = SettingsStore(filepath+"settings.json")
+    last_theme = settings.get("themes")[0]["data"]
     app.setStyleSheet(last_theme)#dark_stylesheet)
-    window = SimpleMainWindow(data,last_theme)
+    window = SimpleMainWindow(settings,last_theme)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,676 @@
+import glob
+import os
+import re
+
+# Statements of the make subset ORFS config files use
+ASSIGN_RE = re.compile(r"^(?P<mods>(?:(?:export|override|private)\s+)*)(?P<name>[^\s:#=?+!]+)\s*"
+                       r"(?P<op>:::=|::=|:=|\?=|\+=|!=|=)\s*(?P<value>.*)$")
+INCLUDE_RE = re.compile(r"^(?P<optional>-|s)?include\s+(?P<paths>.*)$")
+CONDITIONAL_RE = re.compile(r"^(?P<kind>ifeq|ifneq|ifdef|ifndef)\b\s*(?P<args>.*)$")
+ELSE_RE = re.compile(r"^else\b\s*(?P<rest>.*)$")
+EXPORT_RE = re.compile(r"^(?P<kind>export|unexport)(?:\s+(?P<names>[^=]*))?$")
+DEFINE_RE = re.compile(r"^(?P<mods>(?:(?:export|override)\s+)*)define\s+(?P<name>[^\s=]+)\s*(?P<op>:=|::=|\?=|\+=|=)?\s*$")
+
+MAX_DEPTH = 64  # nested expansions before a recursive definition is given up on
+# What evaluating a makefile the functions below do not foresee may still raise
+EVALUATION_ERRORS = (ValueError, TypeError, IndexError, KeyError, RecursionError)
+
+_parsed = {}  # path -> (mtime_ns, size, statements)
+
+
+class Assignment:
+    """One place a variable was assigned; applied is False when the assignment had no effect"""
+
+    def __init__(self, path, line, op, value, applied=True, note=""):
+        self.path = path
+        self.line = line
+        self.op = op
+        self.value = value
+        self.applied = applied
+        self.note = note
+
+    def where(self, root=None):
+        path = os.path.relpath(self.path, root) if root and self.path and os.path.isabs(self.path) else self.path
+        return f"{path}:{self.line}" if self.line else (path or "")
+
+    def __repr__(self):
+        return f"Assignment({self.where()!r}, {self.op!r}, {self.value!r}, applied={self.applied})"
+
+
+class Variable:
+    def __init__(self, name, value, flavor="recursive", origin="file"):
+        self.name = name
+        self.value = value      # raw text for recursive variables, expanded text for simple ones
+        self.flavor = flavor    # "recursive" or "simple"
+        self.origin = origin    # "default", "environment", "file", "command line" or "override"
+        self.exported = False
+        self.history = []       # [Assignment] in evaluation order
+
+
+def logical_lines(text):
+    """(first line number, text) of every logical line, backslash continuations joined"""
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        start = i
+        line = lines[i]
+        while line.endswith("\\") and not line.endswith("\\\\") and i + 1 < len(lines):
+            i += 1
+            line = line[:-1].rstrip() + " " + lines[i].lstrip()
+        yield start + 1, line
+        i += 1
+
+
+def strip_comment(line):
+    """Drop a trailing # comment (an escaped \\# is kept as #)"""
+    if "#" not in line:
+        return line
+    out = []
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if c == "\\" and i + 1 < len(line) and line[i + 1] == "#":
+            out.append("#")
+            i += 2
+            continue
+        if c == "#":
+            break
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def parse_text(text):
+    """
+    Statements of a makefile: ("assign", line, name, op, value, mods),
+    ("define", ...same...), ("include", line, paths, optional),
+    ("export", line, names, kind), ("if", line, kind, args),
+    ("else", line, rest) and ("endif", line). Rules and recipes are skipped.
+    """
+    statements = []
+    in_rule = False
+    define = None
+    for number, raw in logical_lines(text):
+        if define is not None:
+            if raw.strip() == "endef":
+                name, op, mods, body, line = define
+                statements.append(("define", line, name, op, "\n".join(body), mods))
+                define = None
+            else:
+                define[3].append(raw)
+            continue
+        if raw.startswith("\t") and in_rule:
+            continue  # recipe
+        line = strip_comment(raw).strip()
+        if not line:
+            continue
+        match = DEFINE_RE.match(line)
+        if match:
+            define = (match.group("name"), match.group("op") or "=", match.group("mods").split(), [], number)
+            continue
+        match = ASSIGN_RE.match(line)
+        if match and not line.startswith(("ifeq", "ifneq", "ifdef", "ifndef")):
+            in_rule = False
+            statements.append(("assign", number, match.group("name"), match.group("op"),
+                               match.group("value").strip(), match.group("mods").split()))
+            continue
+        match = INCLUDE_RE.match(line)
+        if match:
+            statements.append(("include", number, match.group("paths"), bool(match.group("optional"))))
+            continue
+        match = CONDITIONAL_RE.match(line)
+        if match:
+            statements.append(("if", number, match.group("kind"), match.group("args").strip()))
+            continue
+        match = ELSE_RE.match(line)
+        if match:
+            statements.append(("else", number, match.group("rest").strip()))
+            continue
+        if line == "endif" or line.startswith("endif "):
+            statements.append(("endif", number))
+            continue
+        match = EXPORT_RE.match(line)
+        if match:
+            statements.append(("export", number, (match.group("names") or "").strip(), match.group("kind")))
+            continue
+        if ":" in line:
+            in_rule = True  # a rule; tab-indented lines that follow are its recipe
+    return statements
+
+
+def parse_file(path):
+    """parse_text() of a file, cached until its mtime or size changes"""
+    st = os.stat(path)
+    cached = _parsed.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, "r", errors="replace") as file:
+        statements = parse_text(file.read())
+    _parsed[path] = (st.st_mtime_ns, st.st_size, statements)
+    return statements
+
+
+def closing(text, start):
+    """Index of the parenthesis/brace closing the one at text[start]"""
+    opening = text[start]
+    close = ")" if opening == "(" else "}"
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == opening:
+            depth += 1
+        elif text[i] == close:
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def split_args(text, count):
+    """Split function arguments on top level commas into at most count parts"""
+    args = []
+    depth = 0
+    last = 0
+    for i, c in enumerate(text):
+        if c in "({":
+            depth += 1
+        elif c in ")}":
+            depth -= 1
+        elif c == "," and depth == 0 and len(args) < count - 1:
+            args.append(text[last:i])
+            last = i + 1
+    args.append(text[last:])
+    return args
+
+
+def pattern_stem(pattern, word):
+    """The part of word matched by % in pattern (None if it does not match)"""
+    if "%" not in pattern:
+        return "" if pattern == word else None
+    prefix, _, suffix = pattern.partition("%")
+    if word.startswith(prefix) and word.endswith(suffix) and len(word) >= len(prefix) + len(suffix):
+        return word[len(prefix):len(word) - len(suffix)]
+    return None
+
+
+def patsubst(pattern, replacement, words):
+    out = []
+    for word in words:
+        stem = pattern_stem(pattern, word)
+        out.append(word if stem is None else replacement.replace("%", stem, 1))
+    return " ".join(out)
+
+
+class MakeEvaluator:
+    """
+    In-process evaluator of the make subset used by ORFS configuration files.
+
+    Supports =, :=, ::=, ?=, += (and != without running the shell), export /
+    unexport, override, define blocks, ifeq/ifneq/ifdef/ifndef, [-]include and
+    $(VAR), ${VAR}, $(VAR:a=b) and the usual text and file name functions.
+    $(shell ...) and $(eval ...) are not run and expand to nothing. Parsed
+    files are cached by mtime, so evaluating the same config again only costs
+    the evaluation itself.
+
+    Every assignment is recorded on its variable, including ones that had no
+    effect (a ?= after the variable was set, a plain = against a command line
+    value), which is what provenance() reports.
+
+    Parameters:
+        cwd (str): Directory relative include and wildcard paths are resolved in.
+        environment (dict): Variables imported from the environment.
+        overrides (dict): Command line variables (NAME=value on make's command line).
+    """
+
+    def __init__(self, cwd, environment=None, overrides=None):
+        self.cwd = os.path.abspath(cwd)
+        self.variables = {}
+        self.included = []
+        self.missing = []
+        self.expanding = set()
+        for name, value in (environment or {}).items():
+            self.variables[name] = variable = Variable(name, value.replace("$", "$$"), "recursive", "environment")
+            variable.history.append(Assignment("environment", 0, "=", value))
+        for name, value in (overrides or {}).items():
+            self.variables[name] = variable = Variable(name, value, "recursive", "command line")
+            variable.history.append(Assignment("command line", 0, "=", value))
+
+    def define(self, name, value, note="flow default"):
+        """Predefine a simple variable the way the flow's top Makefile would"""
+        variable = self.variables.get(name)
+        if variable and variable.origin in ("command line", "environment"):
+            return
+        self.variables[name] = variable = Variable(name, value, "simple", "default")
+        variable.history.append(Assignment(note, 0, ":=", value))
+
+    # Expansion
+
+    def expand(self, text, depth=0):
+        if "$" not in text:
+            return text
+        if depth > MAX_DEPTH:
+            return ""
+        out = []
+        i = 0
+        n = len(text)
+        while i < n:
+            j = text.find("$", i)
+            if j < 0:
+                out.append(text[i:])
+                break
+            out.append(text[i:j])
+            if j + 1 >= n:
+                out.append("$")
+                break
+            c = text[j + 1]
+            if c == "$":
+                out.append("$")
+                i = j + 2
+            elif c in "({":
+                k = closing(text, j + 1)
+                if k < 0:
+                    out.append(text[j:])
+                    break
+                out.append(self.reference(text[j + 2:k], depth + 1))
+                i = k + 1
+            else:
+                out.append(self.value(c, depth + 1))
+                i = j + 2
+        return "".join(out)
+
+    def reference(self, inner, depth):
+        name, _, args = inner.partition(" ")
+        if args and name in FUNCTIONS:
+            return FUNCTIONS[name](self, args.lstrip(), depth)
+        name = self.expand(inner, depth)
+        if ":" in name and "=" in name.split(":", 1)[1]:
+            # substitution reference $(VAR:a=b)
+            name, _, substitution = name.partition(":")
+            before, _, after = substitution.partition("=")
+            if "%" not in before:
+                before, after = "%" + before, "%" + after
+            return patsubst(before, after, self.value(name, depth).split())
+        return self.value(name, depth)
+
+    def value(self, name, depth=0):
+        """Effective (expanded) value of a variable, "" if it is not defined"""
+        variable = self.variables.get(name)
+        if variable is None:
+            return ""
+        if variable.flavor == "simple":
+            return variable.value
+        if name in self.expanding:
+            return ""  # recursive reference to itself; make would stop here
+        self.expanding.add(name)
+        try:
+            return self.expand(variable.value, depth)
+        finally:
+            self.expanding.discard(name)
+
+    # Evaluation
+
+    def assign(self, name, op, value, path, line, mods=()):
+        variable = self.variables.get(name)
+        override = "override" in mods
+        record = Assignment(path, line, op, value)
+        if variable is not None and variable.origin == "command line" and not override:
+            record.applied, record.note = False, "overridden on the command line"
+        elif op == "?=" and variable is not None:
+            record.applied, record.note = False, "already set"
+        elif op == "+=" and variable is not None:
+            addition = self.expand(value) if variable.flavor == "simple" else value
+            variable.value = f"{variable.value} {addition}" if variable.value else addition
+            variable.origin = "override" if override else "file"
+        else:
+            flavor = "recursive"
+            if op in (":=", "::=", ":::="):
+                value, flavor = self.expand(value), "simple"
+            elif op == "!=":
+                value, flavor = "", "simple"
+                record.note = "shell assignment not run"
+            exported = variable.exported if variable else False
+            history = variable.history if variable else []
+            variable = Variable(name, value, flavor, "override" if override else "file")
+            variable.exported = exported
+            variable.history = history
+            self.variables[name] = variable
+        if variable is None:
+            variable = self.variables[name]
+        if "export" in mods:
+            variable.exported = True
+        variable.history.append(record)
+
+    def condition(self, kind, args):
+        if kind in ("ifdef", "ifndef"):
+            variable = self.variables.get(self.expand(args).strip())
+            defined = variable is not None and variable.value != ""
+            return defined if kind == "ifdef" else not defined
+        args = args.strip()
+        if args.startswith("("):
+            parts = split_args(args[1:args.rfind(")")], 2)
+        else:
+            parts = [a or b for a, b in re.findall(r"\"([^\"]*)\"|'([^']*)'", args)]
+        left, right = (parts + ["", ""])[:2]
+        equal = self.expand(left).strip() == self.expand(right).strip()
+        return equal if kind == "ifeq" else not equal
+
+    def include(self, path, text=None):
+        """
+        Evaluate a makefile (or, if given, text standing in for its content).
+
+        Returns:
+            bool: False if the file does not exist.
+        """
+        path = os.path.join(self.cwd, path)
+        if text is None:
+            try:
+                statements = parse_file(path)
+            except OSError:
+                self.missing.append(path)
+                return False
+        else:
+            statements = parse_text(text)
+        self.included.append(path)
+        self.run(statements, path)
+        return True
+
+    def run(self, statements, path):
+        stack = []  # [parent_active, branch_taken, active]
+        active = True
+        for statement in statements:
+            kind, line = statement[0], statement[1]
+            if kind == "if":
+                taken = active and self.condition(statement[2], statement[3])
+                stack.append([active, taken, taken])
+                active = taken
+                continue
+            if kind == "else":
+                if not stack:
+                    continue
+                parent, taken, _ = stack[-1]
+                rest = statement[2]
+                match = CONDITIONAL_RE.match(rest) if rest else None
+                now = parent and not taken and (self.condition(match.group("kind"), match.group("args")) if match else True)
+                stack[-1] = [parent, taken or now, now]
+                active = now
+                continue
+            if kind == "endif":
+                if stack:
+                    active = stack.pop()[0]
+                continue
+            if not active:
+                continue
+            if kind in ("assign", "define"):
+                _, _, name, op, value, mods = statement
+                self.assign(self.expand(name), op, value, path, line, mods)
+            elif kind == "include":
+                for pattern in self.expand(statement[2]).split():
+                    matches = sorted(glob.glob(os.path.join(self.cwd, pattern))) if glob.has_magic(pattern) else [pattern]
+                    for included in matches:
+                        if not self.include(included) and statement[3]:
+                            self.missing.pop()  # -include: a missing file is fine
+            elif kind == "export":
+                names = self.expand(statement[2]).split()
+                for name in names:
+                    variable = self.variables.setdefault(name, Variable(name, "", "recursive", "file"))
+                    variable.exported = statement[3] == "export"
+
+    # Results
+
+    def variable(self, name):
+        return self.variables.get(name)
+
+    def provenance(self, name):
+        """[Assignment] of a variable in evaluation order; the last applied one is in effect"""
+        variable = self.variables.get(name)
+        return list(variable.history) if variable else []
+
+    def effective(self, origins=("file", "override", "command line", "default")):
+        """{name: expanded value} of the variables with one of the given origins"""
+        return {name: self.value(name) for name, variable in sorted(self.variables.items())
+                if variable.origin in origins}
+
+    def exported(self):
+        return {name: self.value(name) for name, variable in sorted(self.variables.items()) if variable.exported}
+
+
+# Functions: name -> f(evaluator, raw argument text, depth)
+
+def _words(ev, args, depth):
+    return ev.expand(args, depth).split()
+
+
+def _args(args, count):
+    """split_args() padded with empty arguments up to count"""
+    return (split_args(args, count) + [""] * count)[:count]
+
+
+def _number(ev, text, depth):
+    """An expanded numeric argument, None if it is not a number"""
+    text = ev.expand(text, depth).strip()
+    return int(text) if text.isdigit() else None
+
+
+def _foreach(ev, args, depth):
+    name, words, body = _args(args, 3)
+    name = ev.expand(name, depth).strip()
+    saved = ev.variables.get(name)
+    out = []
+    for word in ev.expand(words, depth).split():
+        ev.variables[name] = Variable(name, word, "simple", "automatic")
+        out.append(ev.expand(body, depth))
+    if saved is None:
+        ev.variables.pop(name, None)
+    else:
+        ev.variables[name] = saved
+    return " ".join(out)
+
+
+def _call(ev, args, depth):
+    parts = split_args(args, 1 << 16)
+    name = ev.expand(parts[0], depth).strip()
+    saved = {}
+    for i, arg in enumerate(parts[1:], 1):
+        saved[str(i)] = ev.variables.get(str(i))
+        ev.variables[str(i)] = Variable(str(i), ev.expand(arg, depth), "simple", "automatic")
+    try:
+        return ev.value(name, depth)
+    finally:
+        for key, variable in saved.items():
+            if variable is None:
+                ev.variables.pop(key, None)
+            else:
+                ev.variables[key] = variable
+
+
+def _if(ev, args, depth):
+    parts = _args(args, 3)
+    if ev.expand(parts[0], depth).strip():
+        return ev.expand(parts[1], depth)
+    return ev.expand(parts[2], depth)
+
+
+def _or(ev, args, depth):
+    for part in split_args(args, 1 << 16):
+        value = ev.expand(part, depth).strip()
+        if value:
+            return value
+    return ""
+
+
+def _and(ev, args, depth):
+    value = ""
+    for part in split_args(args, 1 << 16):
+        value = ev.expand(part, depth).strip()
+        if not value:
+            return ""
+    return value
+
+
+def _path(ev, path):
+    return os.path.join(ev.cwd, path)
+
+
+def _word(ev, args, depth):
+    n, text = _args(args, 2)
+    words = ev.expand(text, depth).split()
+    index = _number(ev, n, depth)
+    return words[index - 1] if index and index <= len(words) else ""  # make stops on a bad index; "" here
+
+
+def _wordlist(ev, args, depth):
+    start, end, text = _args(args, 3)
+    words = ev.expand(text, depth).split()
+    start, end = _number(ev, start, depth), _number(ev, end, depth)
+    if not start or end is None:
+        return ""
+    return " ".join(words[start - 1:end])
+
+
+def _expanded_args(count):
+    def wrap(fn):
+        return lambda ev, args, depth: fn(ev, *[ev.expand(arg, depth) for arg in _args(args, count)])
+    return wrap
+
+
+FUNCTIONS = {
+    "subst": _expanded_args(3)(lambda ev, a, b, text: text.replace(a, b)),
+    "patsubst": _expanded_args(3)(lambda ev, pattern, replacement, text: patsubst(pattern.strip(), replacement.strip(), text.split())),
+    "strip": lambda ev, args, depth: " ".join(_words(ev, args, depth)),
+    "findstring": _expanded_args(2)(lambda ev, find, text: find if find in text else ""),
+    "filter": _expanded_args(2)(lambda ev, patterns, text: " ".join(
+        w for w in text.split() if any(pattern_stem(p, w) is not None for p in patterns.split()))),
+    "filter-out": _expanded_args(2)(lambda ev, patterns, text: " ".join(
+        w for w in text.split() if all(pattern_stem(p, w) is None for p in patterns.split()))),
+    "sort": lambda ev, args, depth: " ".join(sorted(set(_words(ev, args, depth)))),
+    "word": _word,
+    "wordlist": _wordlist,
+    "words": lambda ev, args, depth: str(len(_words(ev, args, depth))),
+    "firstword": lambda ev, args, depth: (_words(ev, args, depth) or [""])[0],
+    "lastword": lambda ev, args, depth: (_words(ev, args, depth) or [""])[-1],
+    "dir": lambda ev, args, depth: " ".join((os.path.dirname(w) or ".") + "/" for w in _words(ev, args, depth)),
+    "notdir": lambda ev, args, depth: " ".join(os.path.basename(w) for w in _words(ev, args, depth)),
+    "suffix": lambda ev, args, depth: " ".join(os.path.splitext(w)[1] for w in _words(ev, args, depth) if os.path.splitext(w)[1]),
+    "basename": lambda ev, args, depth: " ".join(os.path.splitext(w)[0] for w in _words(ev, args, depth)),
+    "addsuffix": _expanded_args(2)(lambda ev, suffix, text: " ".join(w + suffix for w in text.split())),
+    "addprefix": _expanded_args(2)(lambda ev, prefix, text: " ".join(prefix + w for w in text.split())),
+    "wildcard": lambda ev, args, depth: " ".join(
+        os.path.relpath(m, ev.cwd) if not os.path.isabs(p) else m
+        for p in _words(ev, args, depth) for m in sorted(glob.glob(_path(ev, p)))),
+    "abspath": lambda ev, args, depth: " ".join(os.path.normpath(_path(ev, w)) for w in _words(ev, args, depth)),
+    "realpath": lambda ev, args, depth: " ".join(os.path.realpath(_path(ev, w)) for w in _words(ev, args, depth)
+                                                 if os.path.exists(_path(ev, w))),
+    "if": _if,
+    "or": _or,
+    "and": _and,
+    "foreach": _foreach,
+    "call": _call,
+    "value": lambda ev, args, depth: (ev.variables.get(ev.expand(args, depth).strip()) or Variable("", "")).value,
+    "origin": lambda ev, args, depth: (ev.variables.get(ev.expand(args, depth).strip()) or Variable("", "", origin="undefined")).origin,
+    "flavor": lambda ev, args, depth: (ev.variables.get(ev.expand(args, depth).strip()) or Variable("", "", flavor="undefined")).flavor,
+    "shell": lambda ev, args, depth: "",
+    "eval": lambda ev, args, depth: "",
+    "error": lambda ev, args, depth: "",
+    "warning": lambda ev, args, depth: "",
+    "info": lambda ev, args, depth: "",
+}
+
+
+def flow_variables(flow_dir, platform, design, environment=None, config_text=None, overrides=None):
+    """
+    Evaluate a design's config.mk and its platform's config.mk in the order the
+    ORFS Makefile includes them.
+
+    Parameters:
+        config_text (str): Content to use instead of the design config.mk on
+            disk (e.g. an editor buffer that is not saved yet).
+
+    Returns:
+        MakeEvaluator
+    """
+    flow_dir = os.path.abspath(flow_dir)
+    design_config = f"./designs/{platform}/{design}/config.mk"
+    ev = MakeEvaluator(flow_dir, environment, overrides)
+    ev.define("FLOW_HOME", flow_dir)
+    ev.define("WORK_HOME", ".")
+    ev.define("DESIGN_HOME", os.path.join(flow_dir, "designs"))
+    ev.define("PLATFORM_HOME", os.path.join(flow_dir, "platforms"))
+    ev.define("UTILS_DIR", os.path.join(flow_dir, "util"))
+    ev.define("SCRIPTS_DIR", os.path.join(flow_dir, "scripts"))
+    ev.define("DESIGN_CONFIG", design_config)
+    ev.define("DESIGN_DIR", f"./designs/{platform}/{design}/")
+    ev.include(design_config, config_text)
+    ev.assign("DESIGN_NICKNAME", "?=", "$(DESIGN_NAME)", "flow default", 0)
+    ev.assign("FLOW_VARIANT", "?=", "base", "flow default", 0)
+    ev.assign("PLATFORM_DIR", "?=", "$(PLATFORM_HOME)/$(PLATFORM)", "flow default", 0)
+    platform_config = os.path.join(ev.value("PLATFORM_DIR"), "config.mk")
+    if ev.value("PLATFORM"):
+        ev.include(platform_config)
+    return ev
+
+
+# Structured edits
+
+def set_assignment(text, name, value, op=None, export=True):
+    """
+    Returns text with the last assignment of name set to value, keeping its
+    modifiers, operator (unless op is given), indentation and trailing comment.
+    A new "export NAME = value" line is appended if name is not assigned.
+    """
+    if "\n" in value or "\r" in value:
+        raise ValueError(f"{name}: value must be a single line")
+    value = value.replace("#", "\\#")
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.splitlines(keepends=True)
+
+    found = None
+    i = 0
+    while i < len(lines):
+        start = i
+        logical = lines[i].rstrip("\r\n")
+        while logical.endswith("\\") and i + 1 < len(lines):
+            i += 1
+            logical = logical[:-1] + lines[i].rstrip("\r\n")
+        stripped = logical.lstrip()
+        match = ASSIGN_RE.match(stripped)
+        if match and match.group("name") == name:
+            found = (start, i, logical[:len(logical) - len(stripped)], match)
+        i += 1
+
+    if found is None:
+        if lines and not lines[-1].endswith(("\n", "\r")):
+            lines[-1] += newline
+        lines.append(f"{'export ' if export else ''}{name} = {value}{newline}")
+        return "".join(lines)
+
+    start, end, indent, match = found
+    raw_value = match.group("value")
+    # the first unescaped # starts the comment, found in the raw text since strip_comment() unescapes \#
+    hash_at = next((i for i, c in enumerate(raw_value) if c == "#" and raw_value[i - 1:i] != "\\"), None)
+    comment = "" if hash_at is None else raw_value[len(raw_value[:hash_at].rstrip()):]
+    ending = lines[end][len(lines[end].rstrip("\r\n")):] or newline
+    gap = match.string[match.end("name"):match.start("op")] or " "
+    new = f"{indent}{match.group('mods')}{name}{gap}{op or match.group('op')} {value}{comment}{ending}"
+    lines[start:end + 1] = [new]
+    return "".join(lines)
+
+
+def update_file(path, assignments, op=None):
+    """
+    Apply set_assignment() for every {name: value} to a file, writing it
+    atomically and only if something changed.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    with open(path, "r", newline="") as file:
+        text = file.read()
+    new = text
+    for name, value in assignments.items():
+        new = set_assignment(new, name, value, op)
+    if new == text:
+        return False
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as file:
+        file.write(new)
+    os.replace(tmp, path)
+    return True
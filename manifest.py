@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import re
+
+# ORFS stages in flow order; each has a make target and a clean_<stage> target
+STAGES = ["synth", "floorplan", "place", "cts", "route", "finish"]
+
+# config.mk variables that only affect later stages (prefix match). Anything not
+# listed is assumed to affect synthesis, which is always the safe answer.
+STAGE_VARIABLES = {
+    "floorplan": ("CORE_UTILIZATION", "CORE_ASPECT_RATIO", "CORE_MARGIN", "CORE_AREA", "DIE_AREA",
+                  "PLACE_PINS_ARGS", "FLOORPLAN_DEF", "FOOTPRINT", "MACRO_PLACE", "MACRO_PLACEMENT",
+                  "RTLMP_", "PDN_TCL", "TAPCELL_TCL", "IO_CONSTRAINTS", "ADDITIONAL_FLOORPLAN",
+                  "TNS_END_PERCENT", "REMOVE_ABC_BUFFERS"),
+    "place": ("PLACE_DENSITY", "GPL_", "CELL_PAD_", "DPO_", "MAX_DISPLACEMENT", "ROUTABILITY_",
+              "TIMING_DRIVEN", "SKIP_INCREMENTAL_REPAIR"),
+    "cts": ("CTS_", "CLKBUF_", "SKIP_CTS_REPAIR_TIMING", "HOLD_SLACK_MARGIN", "SETUP_SLACK_MARGIN"),
+    "route": ("GRT_", "GLOBAL_ROUTE", "ROUTING_LAYER_ADJUSTMENT", "MIN_ROUTING_LAYER", "MAX_ROUTING_LAYER",
+              "DRT_", "DETAILED_ROUTE", "SKIP_ANTENNA_REPAIR", "FILL_CELLS"),
+    "finish": ("GDS_", "KLAYOUT_", "SEAL_GDS", "FILL_CONFIG"),
+}
+
+ASSIGNMENT_RE = re.compile(r"^\s*(?:export\s+|override\s+)*([A-Za-z_][A-Za-z0-9_]*)\s*(\?=|:=|::=|\+=|=)\s*(.*)$")
+
+
+def variable_stage(name):
+    for stage in reversed(STAGES):
+        if name.startswith(STAGE_VARIABLES.get(stage, ())):
+            return stage
+    return "synth"
+
+
+def config_assignments(text):
+    """
+    Returns (assignments, rest) of a makefile, continuation lines joined:
+    [(name, operator + value)] and the other non-blank lines (conditionals,
+    includes, rules), comments dropped.
+    """
+    text = re.sub(r"\\\r?\n", " ", text)
+    assignments = []
+    rest = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        match = ASSIGNMENT_RE.match(line)
+        if match:
+            assignments.append((match.group(1), match.group(2) + " " + match.group(3).strip()))
+        elif line.strip():
+            rest.append(line.strip())
+    return assignments, rest
+
+
+def stage_index(stage):
+    return STAGES.index(stage)
+
+
+class FlowManifest:
+    """
+    Content hashes of the inputs of one design on one platform.
+
+    Inputs are the design directory (config.mk, constraint.sdc, ...), the
+    imported sources under designs/src/<design> and the platform directory. Each
+    input is mapped to the earliest stage it affects; config.mk is split per
+    variable so that e.g. a CORE_UTILIZATION change only invalidates floorplan
+    and later; its other lines (ifeq, include, ...) can change any variable,
+    so they count for synth. Files are only re-hashed when their size or mtime changed.
+
+    The manifest saved after a successful run records the hashes, the file
+    mtimes and the last stage completed. plan() compares the current inputs
+    against it to find the earliest stage that really has to run again.
+    """
+
+    def __init__(self, flow_dir, platform, design, path):
+        self.flow_dir = flow_dir
+        self.platform = platform
+        self.design = design
+        self.path = path
+        self.design_dir = os.path.join(flow_dir, "designs", platform, design)
+        self.src_dir = os.path.join(flow_dir, "designs", "src", design)
+        self.platform_dir = os.path.join(flow_dir, "platforms", platform)
+        self.saved = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"inputs": {}, "files": {}, "completed": None}
+
+    def file_hash(self, path, st, files):
+        """sha256 of a file, reusing the saved hash while size and mtime are unchanged"""
+        known = self.saved["files"].get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            digest = known[2]
+        else:
+            sha = hashlib.sha256()
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+        files[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def walk(self, root):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                yield os.path.join(dirpath, name)
+
+    def current(self):
+        """Returns (inputs, files): {key: [stage, hash]} and {path: [size, mtime_ns, hash]}"""
+        inputs = {}
+        files = {}
+        for root, label in ((self.design_dir, "design"), (self.src_dir, "src"), (self.platform_dir, "platform")):
+            for path in self.walk(root):
+                try:
+                    st = os.stat(path)
+                    digest = self.file_hash(path, st, files)
+                except OSError:
+                    continue
+                rel = f"{label}:{os.path.relpath(path, root)}"
+                if label == "design" and os.path.basename(path) == "config.mk":
+                    with open(path, "r", errors="replace") as file:
+                        assignments, rest = config_assignments(file.read())
+                    for name, value in assignments:
+                        key = f"{rel}:{name}"
+                        inputs[key] = [variable_stage(name), hashlib.sha256((inputs.get(key, ["", ""])[1] + value).encode()).hexdigest()]
+                    if rest:  # "*" is no variable name
+                        inputs[f"{rel}:*"] = ["synth", hashlib.sha256("\n".join(rest).encode()).hexdigest()]
+                else:
+                    inputs[rel] = ["synth", digest]
+        return inputs, files
+
+    def changed_stage(self, inputs):
+        """Earliest stage whose inputs differ from the saved manifest (None if nothing changed)"""
+        saved = self.saved["inputs"]
+        if not saved:
+            return STAGES[0]
+        earliest = None
+        for key in set(inputs) | set(saved):
+            now, before = inputs.get(key), saved.get(key)
+            if now == before:
+                continue
+            stage = min((entry[0] for entry in (now, before) if entry), key=stage_index)
+            if earliest is None or stage_index(stage) < stage_index(earliest):
+                earliest = stage
+                if stage == STAGES[0]:
+                    break
+        return earliest
+
+    def plan(self, target):
+        """
+        Returns the stage to start from so that 'target' is up to date, or None
+        if it already is. Also returns the current inputs/files for save().
+        """
+        inputs, files = self.current()
+        start = self.changed_stage(inputs)
+        completed = self.saved.get("completed")
+        next_stage = STAGES[0] if completed is None else (
+            STAGES[stage_index(completed) + 1] if stage_index(completed) + 1 < len(STAGES) else None)
+        candidates = [stage for stage in (start, next_stage) if stage]
+        start = min(candidates, key=stage_index) if candidates else None
+        if start is not None and stage_index(start) > stage_index(target):
+            start = None
+        return start, inputs, files
+
+    def restore_mtimes(self, inputs, files, start):
+        """
+        Give files whose content did not change their recorded mtime back, so
+        make does not rebuild stages before 'start' just because a file was
+        rewritten with the same content. Only design and source files are
+        touched, never the platform.
+        """
+        saved_files = self.saved["files"]
+        restored = 0
+        for path, (size, mtime_ns, digest) in files.items():
+            before = saved_files.get(path)
+            if not before or before[2] != digest or before[1] == mtime_ns:
+                continue
+            if not (path.startswith(self.design_dir + os.sep) or path.startswith(self.src_dir + os.sep)):
+                continue
+            try:
+                os.utime(path, ns=(before[1], before[1]))
+            except OSError:
+                continue
+            files[path] = [size, before[1], digest]
+            restored += 1
+        if start and start != STAGES[0]:
+            # config.mk changed, but only in variables of later stages
+            config = os.path.join(self.design_dir, "config.mk")
+            before = saved_files.get(config)
+            if before and config in files and files[config][1] != before[1]:
+                os.utime(config, ns=(before[1], before[1]))
+                files[config] = [files[config][0], before[1], files[config][2]]
+                restored += 1
+        return restored
+
+    def save(self, inputs, files, completed):
+        self.saved = {"inputs": inputs, "files": files, "completed": completed}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.saved, file)
+        os.replace(tmp, self.path)
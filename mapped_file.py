@@ -0,0 +1,118 @@
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+
+NEWLINE = re.compile(b"\n")
+INDEX_CHUNK = 16 << 20    # bytes indexed per step
+SEARCH_WINDOW = 4 << 20   # bytes searched per step when going backwards
+
+
+class MappedFile:
+    """
+    A text file memory-mapped read-only, with an index of line start offsets.
+
+    Nothing is read up front: build_index() (meant for a background thread)
+    walks the mapping once and appends line offsets as it goes, so the first
+    lines are available right away and line_count() grows until it is done.
+    lines() decodes only what is asked for. search() runs the regular
+    expression directly over the mapping, without copying the file.
+
+    Parameters:
+        path (str): File to open.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.offsets = array("Q", [0])  # start offset of every line indexed so far
+        self.indexed = 0                # bytes covered by offsets
+        self.complete = not self.size
+        self.cancelled = False
+
+    def close(self):
+        self.cancelled = True
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def build_index(self, progress=None):
+        """Index all line starts. Returns the number of lines (None if cancelled)."""
+        while self.indexed < self.size:
+            if self.cancelled:
+                return None
+            end = min(self.indexed + INDEX_CHUNK, self.size)
+            self.offsets.extend(match.end() for match in NEWLINE.finditer(self.map, self.indexed, end))
+            self.indexed = end
+            if progress:
+                progress(self.indexed, self.size)
+        if self.size and self.offsets[-1] == self.size:
+            self.offsets.pop()  # the file ends with a newline; there is no line after it
+        self.complete = True
+        return len(self.offsets)
+
+    def line_count(self):
+        """Lines known so far (all of them once the index is complete)"""
+        if self.complete:
+            return len(self.offsets)
+        return max(0, len(self.offsets) - 1)
+
+    def line_span(self, number):
+        start = self.offsets[number]
+        if number + 1 < len(self.offsets):
+            end = self.offsets[number + 1] - 1
+        else:
+            end = self.map.find(b"\n", start) if self.size else -1
+            end = self.size if end < 0 else end
+        return start, end
+
+    def lines(self, first, count):
+        """Up to count decoded lines starting at line first"""
+        out = []
+        for number in range(first, min(first + count, self.line_count())):
+            start, end = self.line_span(number)
+            out.append(self.map[start:end].decode(errors="replace").rstrip("\r"))
+        return out
+
+    def line_of(self, offset):
+        """Line containing a byte offset, or None while that part is not indexed yet"""
+        if offset >= self.indexed and not self.complete:
+            return None
+        return bisect_right(self.offsets, offset) - 1
+
+    def search(self, pattern, start=0, backwards=False, ignore_case=False):
+        """
+        Next match of a regular expression after (or last match before) a byte offset.
+
+        Returns:
+            tuple: (start, end) byte offsets of the match, or None.
+
+        Raises:
+            re.error: for an invalid pattern.
+        """
+        if not self.size:
+            return None
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        regex = re.compile(pattern.encode() if isinstance(pattern, str) else pattern, flags)
+        if not backwards:
+            match = regex.search(self.map, start)
+            return match.span() if match else None
+        end = start
+        while end > 0 and not self.cancelled:
+            # windows start at a line start, so no single-line match is cut in two
+            window = self.map.rfind(b"\n", 0, max(0, end - SEARCH_WINDOW)) + 1 if end > SEARCH_WINDOW else 0
+            last = None
+            for match in regex.finditer(self.map, window, end):
+                last = match
+            if last:
+                return last.span()
+            end = window
+        return None
+
+    def column_of(self, offset, line):
+        """Character column of a byte offset within a line"""
+        start = self.offsets[line]
+        return len(self.map[start:offset].decode(errors="replace"))
@@ -0,0 +1,215 @@
+import os
+import re
+import time
+from collections import deque
+
+TOOLS = ("openroad", "yosys", "klayout", "make")  # everything else is grouped as "other"
+STAGE_RE = re.compile(rb"/scripts/([\w.-]+)\.(?:tcl|py)\b")  # ORFS runs one script per stage
+TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+HISTORY = 300  # samples kept for plotting
+
+
+def read_file(path, mode="r"):
+    try:
+        with open(path, mode) as file:
+            return file.read()
+    except OSError:
+        return None  # the process is gone, or not ours to read
+
+
+def tool_of(comm):
+    for tool in TOOLS:
+        if comm.startswith(tool):
+            return tool
+    return "other"
+
+
+def children(pid):
+    """Direct children of a process, from /proc/<pid>/task/*/children (one file per thread)"""
+    found = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return found
+    for task in tasks:
+        text = read_file(f"/proc/{pid}/task/{task}/children")
+        if text:
+            found.extend(int(child) for child in text.split())
+    return found
+
+
+def children_by_scan():
+    """{ppid: [pid]} of every process; for kernels without the children files"""
+    tree = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            stat = read_stat(int(name))
+            if stat:
+                tree.setdefault(stat["ppid"], []).append(int(name))
+    return tree
+
+
+CHILDREN_FILES = os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children")
+
+
+def read_stat(pid):
+    text = read_file(f"/proc/{pid}/stat")
+    if not text:
+        return None
+    # comm may contain spaces and parentheses; it ends at the last ")"
+    close = text.rfind(")")
+    fields = text[close + 2:].split()
+    return {"comm": text[text.find("(") + 1:close], "ppid": int(fields[1]),
+            "ticks": int(fields[11]) + int(fields[12]), "starttime": int(fields[19]),
+            "rss": int(fields[21]) * PAGE_SIZE}
+
+
+def read_peak_rss(pid):
+    """VmHWM (the process's own peak RSS, including between samples) in bytes"""
+    text = read_file(f"/proc/{pid}/status")
+    if text:
+        for line in text.splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def read_io(pid):
+    """(bytes read, bytes written) including page cache hits, or (0, 0) when not readable"""
+    text = read_file(f"/proc/{pid}/io")
+    values = {}
+    if text:
+        for line in text.splitlines():
+            key, _, value = line.partition(":")
+            values[key] = int(value)
+    return values.get("rchar", 0), values.get("wchar", 0)
+
+
+def memory_info():
+    """(available, total) system memory in bytes"""
+    values = {}
+    for line in (read_file("/proc/meminfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        if key in ("MemAvailable", "MemTotal"):
+            values[key] = int(value.split()[0]) * 1024
+    return values.get("MemAvailable", 0), values.get("MemTotal", 0)
+
+
+class Snapshot:
+    def __init__(self, when):
+        self.time = when
+        self.tools = {}      # {tool: [cpu %, rss, read B/s, write B/s, processes]}
+        self.stages = {}     # {stage: rss of its processes}
+        self.available = 0   # system memory
+        self.total = 0
+        self.processes = 0
+
+    @property
+    def cpu(self):
+        return sum(values[0] for values in self.tools.values())
+
+    @property
+    def rss(self):
+        return sum(values[1] for values in self.tools.values())
+
+
+class ProcessMonitor:
+    """
+    Samples the resource use of the process trees under a set of root pids.
+
+    Each sample() walks the trees through /proc (the children files of every
+    thread, or a scan of all of /proc on kernels without them) and reads
+    stat (CPU ticks, RSS), status (peak RSS) and io (bytes read/written) of
+    every process. CPU and I/O rates are the difference to the previous
+    sample of the same process, grouped per tool (openroad, yosys, klayout,
+    make, other).
+
+    A process belongs to the flow stage whose script is on its command line
+    (scripts/detail_route.tcl -> "detail_route"), or to its parent's stage.
+    peaks keeps the highest RSS each stage reached in its latest run: the
+    most of all its processes at a sample, or one process's own VmHWM if
+    that is higher.
+    A stage whose processes are all gone is reported once in finished.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.history = deque(maxlen=history)
+        self.previous = {}  # {pid: (starttime, ticks, read, written, time)}
+        self.identity = {}  # {pid: (starttime, tool, stage)}
+        self.peaks = {}     # {stage: bytes}
+        self.active = set()
+        self.finished = []  # stages that ended in the last sample
+
+    def stage_of(self, pid, stat, parent_stage):
+        known = self.identity.get(pid)
+        if known and known[0] == stat["starttime"]:
+            return known[1], known[2]
+        cmdline = read_file(f"/proc/{pid}/cmdline", "rb") or b""
+        match = STAGE_RE.search(cmdline)
+        stage = match.group(1).decode() if match else parent_stage
+        tool = tool_of(stat["comm"])
+        self.identity[pid] = (stat["starttime"], tool, stage)
+        return tool, stage
+
+    def walk(self, roots):
+        """[(pid, stat, parent stage)] of every process under the roots (roots included)"""
+        tree = None if CHILDREN_FILES else children_by_scan()
+        found = []
+        stack = [(pid, None) for pid in roots]
+        seen = set()
+        while stack:
+            pid, parent_stage = stack.pop()
+            if pid in seen:
+                continue
+            seen.add(pid)
+            stat = read_stat(pid)
+            if stat is None:
+                continue
+            found.append((pid, stat, parent_stage))
+            tool, stage = self.stage_of(pid, stat, parent_stage)
+            for child in (children(pid) if tree is None else tree.get(pid, ())):
+                stack.append((child, stage))
+        return found
+
+    def sample(self, roots):
+        now = time.monotonic()
+        snapshot = Snapshot(time.time())
+        snapshot.available, snapshot.total = memory_info()
+        previous = {}
+        hwm = {}
+        for pid, stat, parent_stage in self.walk(roots):
+            tool, stage = self.stage_of(pid, stat, parent_stage)
+            read, written = read_io(pid)
+            values = snapshot.tools.setdefault(tool, [0.0, 0, 0.0, 0.0, 0])
+            last = self.previous.get(pid)
+            if last and last[0] == stat["starttime"] and now > last[4]:
+                elapsed = now - last[4]
+                values[0] += (stat["ticks"] - last[1]) * 100.0 / TICKS / elapsed
+                values[2] += (read - last[2]) / elapsed
+                values[3] += (written - last[3]) / elapsed
+            values[1] += stat["rss"]
+            values[4] += 1
+            previous[pid] = (stat["starttime"], stat["ticks"], read, written, now)
+            if stage:
+                snapshot.stages[stage] = snapshot.stages.get(stage, 0) + stat["rss"]
+                hwm[stage] = max(hwm.get(stage, 0), read_peak_rss(pid))
+        snapshot.processes = len(previous)
+
+        self.previous = previous
+        self.identity = {pid: known for pid, known in self.identity.items() if pid in previous}
+        for stage, rss in snapshot.stages.items():
+            earlier = self.peaks.get(stage, 0) if stage in self.active else 0  # a stage run again starts over
+            self.peaks[stage] = max(earlier, rss, hwm.get(stage, 0))
+        self.finished = sorted(self.active - set(snapshot.stages))
+        self.active = set(snapshot.stages)
+        self.history.append(snapshot)
+        return snapshot
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} TB"
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+
+from manifest import STAGES
+
+QOR_METRICS = ("wns", "tns", "utilization", "instances", "drc")
+ALARM_STAGE = "cts"  # timing this far into the flow no longer improves much by itself
+READ_BYTES = 8 << 20  # most of a file read per poll, so one huge log cannot stall a poll
+
+# Metric keys of the ORFS metrics JSON files: the key suffix of each metric
+JSON_SUFFIXES = {
+    "__timing__setup__ws": "wns",
+    "__timing__setup__tns": "tns",
+    "__design__instance__utilization": "utilization",
+    "__design__instance__count": "instances",
+    "__route__drc_errors": "drc",
+}
+# Key prefixes of the metrics JSON files and the flow stage they belong to
+JSON_STAGES = {"synth": "synth", "floorplan": "floorplan", "globalplace": "place", "placeopt": "place",
+               "detailedplace": "place", "cts": "cts", "globalroute": "route", "grt": "route",
+               "detailedroute": "route", "finish": "finish"}
+
+# Report and log lines: OpenSTA (report_wns/report_tns/report_worst_slack), report_design_area,
+# yosys stat, global placement and detailed routing
+# (a literal every match contains, checked first since most log text has none, pattern, metric)
+TEXT_PATTERNS = [
+    ("wns", re.compile(r"^\s*wns(?:\s+max)?\s+(-?\d+(?:\.\d+)?(?:e[-+]?\d+)?)\s*$", re.M), "wns"),
+    ("worst slack", re.compile(r"^\s*worst slack(?:\s+max)?\s+(-?\d+(?:\.\d+)?(?:e[-+]?\d+)?)\s*$", re.M), "wns"),
+    ("tns", re.compile(r"^\s*tns(?:\s+max)?\s+(-?\d+(?:\.\d+)?(?:e[-+]?\d+)?)\s*$", re.M), "tns"),
+    ("Design area", re.compile(r"Design area [\d.]+ u\^2 ([\d.]+)% utilization"), "utilization"),
+    ("Number of cells", re.compile(r"^\s*Number of cells:\s+(\d+)", re.M), "instances"),
+    ("NumInstances", re.compile(r"\bNumInstances:\s+(\d+)"), "instances"),
+    ("Number of violations", re.compile(r"Number of violations = (\d+)"), "drc"),
+]
+DRC_ENTRY_RE = re.compile(r"violation type:", re.I)  # one per violation in a *drc*.rpt
+FILE_STAGE_RE = re.compile(r"^([1-6])_")  # 4_cts_final.rpt, 5_2_route.log, ...
+
+
+def stage_of_file(name):
+    match = FILE_STAGE_RE.match(name)
+    if match:
+        return STAGES[int(match.group(1)) - 1]
+    if name.startswith("synth"):
+        return "synth"
+    return None
+
+
+class FollowedFile:
+    """Read position and what was found so far in one report, log or metrics file"""
+
+    def __init__(self, path, stage):
+        self.path = path
+        self.stage = stage
+        self.identity = None  # (inode, mtime_ns, size) when it was last read to the end
+        self.inode = None
+        self.offset = 0
+        self.carry = b""      # an incomplete last line
+        self.values = {}      # {stage: {metric: value}}
+
+    def reset(self):
+        self.offset = 0
+        self.carry = b""
+        self.values = {}
+
+
+class QoRTailer:
+    """
+    Follows the reports, logs and metrics files ORFS writes while a run goes
+    on and picks out WNS, TNS, utilization, instance count and DRC count per
+    stage.
+
+    Text files are read incrementally: each poll() reads only what was
+    appended since the previous one (READ_BYTES at most; the rest waits for
+    the next poll) and scans complete lines. A file that shrank or was
+    replaced is read again from the start; a deleted one (clean_<stage>) no
+    longer counts. Metrics JSON files are small and written whole, so they
+    are re-read when they change and override what the text said.
+
+    Parameters:
+        dirs (list): Directories to follow (the variant's logs and reports).
+        since (float): Ignore files not written since this time (those of
+            an earlier run, which a new run may not get to rewrite).
+    """
+
+    def __init__(self, dirs, since=0.0):
+        self.dirs = dirs
+        self.since_ns = int(since * 1e9)
+        self.files = {}  # {path: FollowedFile}
+
+    def scan(self):
+        found = {}
+        for directory in self.dirs:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if name.endswith(".json") or (name.endswith((".rpt", ".log", ".txt")) and stage_of_file(name)):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if st.st_mtime_ns < self.since_ns:
+                        continue
+                    found[entry.path] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        return found
+
+    def poll(self):
+        """Read what changed. Returns True if any value changed."""
+        before = self.table()
+        found = self.scan()
+        for path in set(self.files) - set(found):
+            del self.files[path]
+        for path, identity in found.items():
+            followed = self.files.get(path)
+            if followed is None:
+                followed = self.files[path] = FollowedFile(path, stage_of_file(os.path.basename(path)))
+            if followed.identity == identity:
+                continue
+            if path.endswith(".json"):
+                self.read_json(followed)
+                followed.identity = identity
+                continue
+            inode, _, size = identity
+            if followed.inode is not None and (inode != followed.inode or size < followed.offset):
+                followed.reset()  # replaced or truncated
+            followed.inode = inode
+            self.read_text(followed, size)
+            followed.identity = identity if followed.offset >= size else None  # not done: read on next poll
+        return self.table() != before
+
+    def read_json(self, followed):
+        try:
+            with open(followed.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return  # being written; tried again next poll
+        followed.values = {}
+        if not isinstance(data, dict):
+            return
+        for key, value in data.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            prefix = key.split("__", 1)[0]
+            stage = JSON_STAGES.get(prefix)
+            for suffix, metric in JSON_SUFFIXES.items():
+                if stage and key.endswith(suffix):
+                    if metric == "utilization" and value <= 1.0:
+                        value *= 100  # ORFS records it as a fraction
+                    followed.values.setdefault(stage, {})[metric] = value
+
+    def read_text(self, followed, size):
+        try:
+            with open(followed.path, "rb") as file:
+                file.seek(followed.offset)
+                data = file.read(min(READ_BYTES, max(0, size - followed.offset)))
+        except OSError:
+            return
+        followed.offset += len(data)
+        data = followed.carry + data
+        end = data.rfind(b"\n") + 1
+        followed.carry = data[end:]
+        text = data[:end].decode(errors="replace")
+        if not text or not followed.stage:
+            return
+        values = followed.values.setdefault(followed.stage, {})
+        if "drc" in os.path.basename(followed.path):
+            count = len(DRC_ENTRY_RE.findall(text))
+            values["drc"] = values.get("drc", 0) + count
+        for keyword, regex, metric in TEXT_PATTERNS:
+            if keyword not in text:
+                continue
+            match = None
+            for match in regex.finditer(text):
+                pass
+            if match:  # the last one printed is the current value
+                value = match.group(1)
+                values[metric] = float(value) if metric in ("wns", "tns", "utilization") else int(value)
+
+    def table(self):
+        """[(stage, {metric: value})] in flow order, for the stages with any values"""
+        merged = {}
+        # text first, so a stage's metrics JSON has the last word
+        for followed in sorted(self.files.values(), key=lambda followed: (followed.path.endswith(".json"), followed.path)):
+            for stage, values in followed.values.items():
+                merged.setdefault(stage, {}).update(values)
+        return [(stage, merged[stage]) for stage in STAGES if merged.get(stage)]
+
+    def latest(self):
+        """{metric: (value, stage)} of each metric at the latest stage that reported it"""
+        latest = {}
+        for stage, values in self.table():
+            for metric, value in values.items():
+                latest[metric] = (value, stage)
+        return latest
+
+
+def timing_alarm(table, threshold=0.0, stage=ALARM_STAGE):
+    """(stage, wns) of the latest stage at or after 'stage' whose WNS is below threshold, or None"""
+    alarm = None
+    for name, values in table:
+        if STAGES.index(name) >= STAGES.index(stage) and "wns" in values:
+            alarm = (name, values["wns"]) if values["wns"] < threshold else None
+    return alarm
@@ -0,0 +1,67 @@
+import re
+import time
+from collections import deque
+
+# The persistent shell prints this line before every prompt (see SHELL_SETUP),
+# carrying the exit status of the command that just finished
+SENTINEL = "__HELPERGUI_DONE__"
+SENTINEL_RE = re.compile(SENTINEL + r" (\d+)$")
+SHELL_SETUP = ("PROMPT_COMMAND='__helpergui_rc=$?; printf \"" + SENTINEL + " %s\\n\" $__helpergui_rc'"
+               "${PROMPT_COMMAND:+\"; $PROMPT_COMMAND\"}")
+
+OUTPUT_LINES = 2000  # lines of output kept per step
+
+
+class StepResult:
+    """
+    Timing, exit status and output of one executed command.
+
+    start_time/end_time are wall clock (time.time()); duration is measured with
+    the monotonic perf_counter so it is exact even if the clock is adjusted.
+    Only the last OUTPUT_LINES lines of output are kept in memory.
+    """
+
+    def __init__(self, command, cwd=None, keep_lines=OUTPUT_LINES):
+        self.command = command
+        self.cwd = cwd
+        self.start_time = None
+        self.end_time = None
+        self.duration = None
+        self.exit_code = None
+        self.output = deque(maxlen=keep_lines)
+        self._t0 = None
+
+    def started(self):
+        self.start_time = time.time()
+        self._t0 = time.perf_counter()
+
+    def finished(self, exit_code):
+        if self._t0 is None:
+            self.started()
+        self.duration = time.perf_counter() - self._t0
+        self.end_time = self.start_time + self.duration
+        self.exit_code = exit_code
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+    def summary(self):
+        if self.exit_code is None:
+            return f"{self.command}: running"
+        return f"{self.command}: exit code {self.exit_code} after {format_duration(self.duration)}"
+
+    def to_dict(self):
+        return {"command": self.command, "cwd": self.cwd, "start_time": self.start_time,
+                "end_time": self.end_time, "duration": self.duration, "exit_code": self.exit_code,
+                "output": list(self.output)}
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
@@ -0,0 +1,92 @@
+import json
+import os
+
+from importer import DEFAULT_EXCLUDE, DEFAULT_INCLUDE
+from updates import DEFAULT_API_URL, DEFAULT_TTL, cache_dir as default_cache_dir
+
+# Runtime preferences and their values when settings.json does not set them
+DEFAULTS = {
+    "log_max_lines": 20000,         # lines kept in a log view
+    "log_flush_ms": 33,             # log view refresh interval (~30 fps)
+    "max_parallel_jobs": 0,         # concurrent flow jobs, 0 = decide from the CPU count
+    "cache_dir": "",                # app caches, empty = ~/.cache/OpenROAD_HelperGUI
+    "update_api_url": DEFAULT_API_URL,
+    "update_check_ttl": DEFAULT_TTL,
+    "settings_save_delay_ms": 500,  # debounce before changes are written to disk
+    "history_baseline_runs": 5,     # earlier runs averaged into a stage's baseline
+    "history_slowdown_percent": 25, # slowdown over the baseline that flags a stage
+    "import_include": DEFAULT_INCLUDE,  # files a design import copies (fnmatch)
+    "import_exclude": DEFAULT_EXCLUDE,  # files and directories it skips
+    "import_link_mode": "reflink",  # reflink, hardlink (shares the inode) or copy
+    "editor_max_bytes": 2000000,    # larger files open in the read-only viewer
+    "log_store_max_runs": 200,      # stored run logs kept on disk
+    "log_store_max_mb": 500,        # disk space the stored run logs may use
+    "monitor_interval_ms": 1000,    # process resource sampling interval
+    "monitor_min_free_mb": 2048,    # warn when less system memory is available
+    "workers": [],                  # host:port of worker agents (agent.py), empty = build locally
+    "worker_token": "",             # secret the worker agents expect
+    "worker_job_cores": 0,          # cores per job on a worker, 0 = all it has free
+    "worker_job_memory_mb": 4096,   # memory a worker needs available to take a job
+    "qor_poll_ms": 2000,            # how often a running job's reports are read
+    "qor_alarm_wns": 0.0,           # WNS (ns) at or after CTS below which a job is flagged
+    "qor_alarm_cancel": False,      # also cancel the flagged job
+    "artifact_cache_dir": "",       # shared store of stage outputs (local or NFS), empty = off
+    "artifact_cache_max_gb": 50,    # least recently used entries are evicted beyond this
+    "storage_keep_runs": 0,         # sweep variants kept per design besides base, 0 = all
+    "storage_final_only": False,    # of finished runs keep only 6_final.gds (and logs, reports)
+    "storage_compress_logs_days": 0,  # gzip flow logs not written for this many days, 0 = never
+    "storage_quota_gb": 0,          # beyond this the oldest runs are removed or trimmed, 0 = no quota
+}
+
+
+class SettingsStore:
+    """
+    settings.json loaded once and shared by the whole app.
+
+    set() only changes the in-memory copy and tells the listeners (the GUI uses
+    that to start a debounce timer); save() writes the file atomically by
+    writing a temporary file next to it and renaming it over the original, so a
+    crash mid-write can never leave a truncated settings.json behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r") as file:
+            self.data = json.load(file)
+        self.dirty = False
+        self.listeners = []
+
+    def get(self, key, default=None):
+        if key in self.data:
+            return self.data[key]
+        return DEFAULTS.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def set(self, key, value):
+        if self.data.get(key) == value:
+            return
+        self.data[key] = value
+        self.dirty = True
+        for listener in self.listeners:
+            listener(key, value)
+
+    def cache_dir(self, *parts):
+        """Path inside the configured cache directory (created on demand)"""
+        path = os.path.join(self.get("cache_dir") or default_cache_dir(), *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def save(self):
+        """Write pending changes (write-temp-then-rename)"""
+        if not self.dirty:
+            return False
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(self.data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.path)
+        self.dirty = False
+        return True
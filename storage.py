@@ -0,0 +1,309 @@
+import gzip
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dispatch import ARTIFACT_DIRS
+from qor import stage_of_file
+
+INDEX_VERSION = 1
+SCAN_THREADS = 16   # directory listings in flight; NFS latency, not the CPU, is the limit
+MIN_AGE = 3600      # seconds a run must have been left alone before it is touched (it may be building)
+LOG_RATIO = 0.15    # gzip'ed size of a log, for the preview
+FINAL_FILE = "6_final.gds"
+LEVELS = ("platform", "design", "run", "stage", "kind")
+
+
+def list_dir(path, cached):
+    """
+    [mtime_ns, [[name, bytes, mtime_ns]], [subdirectory names]] of one
+    directory, or the cached listing while the directory's mtime is the
+    same (its files were not added, removed or renamed). None if it is gone.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if cached and cached[0] == mtime:
+            return cached
+        files, dirs = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                files.append([entry.name, st.st_blocks * 512, st.st_mtime_ns])
+    except OSError:
+        return None
+    return [mtime, files, dirs]
+
+
+class SizeIndex:
+    """
+    Sizes of every file below flow/objects, results, logs and reports.
+
+    The trees are walked by a pool of threads, one directory listing each,
+    and the listings are kept in an index file. A directory whose mtime did
+    not change is taken from the index without looking at its files, so a
+    walk after the first costs one stat per directory. A file rewritten in
+    place keeps its old size there until its directory changes; scan(True)
+    walks everything again. Sizes are the space files take on disk.
+
+    Parameters:
+        flow_dir (str): The ORFS flow directory.
+        path (str): Index file.
+    """
+
+    def __init__(self, flow_dir, path):
+        self.flow_dir = flow_dir
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("flow_dir") != self.flow_dir:
+            return {}
+        return data["dirs"]
+
+    def save(self, dirs):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({"version": INDEX_VERSION, "flow_dir": self.flow_dir, "dirs": dirs}, file)
+        os.replace(tmp, self.path)
+
+    def scan(self, rescan=False):
+        """
+        Returns:
+            list: [relative path, bytes, mtime_ns] of every file.
+        """
+        cached = {} if rescan else self.load()
+        dirs = {}
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+            pending = {pool.submit(list_dir, os.path.join(self.flow_dir, kind), cached.get(kind)): kind
+                       for kind in ARTIFACT_DIRS}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel = pending.pop(future)
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    dirs[rel] = listing
+                    for name in listing[2]:
+                        sub = os.path.join(rel, name)
+                        pending[pool.submit(list_dir, os.path.join(self.flow_dir, sub), cached.get(sub))] = sub
+        self.save(dirs)
+        return [[os.path.join(rel, name), size, mtime] for rel, listing in dirs.items() for name, size, mtime in listing[1]]
+
+
+class DiskUsage:
+    """
+    What SizeIndex.scan() found, summed up per platform, design, run, stage
+    or kind of output. A run is one FLOW_VARIANT of a design
+    ("<platform>/<nickname>/<variant>"); files outside a run count as "-".
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.total = sum(size for _, size, _ in files)
+
+    @staticmethod
+    def parts(path):
+        """{level: name} of a file"""
+        parts = path.split(os.sep)
+        kind = parts[0]
+        platform, nickname, variant = (parts[1:4] + ["-", "-", "-"])[:3] if len(parts) > 4 else ("-", "-", "-")
+        return {"platform": platform, "design": f"{platform}/{nickname}", "run": f"{platform}/{nickname}/{variant}",
+                "stage": stage_of_file(parts[-1]) or "other", "kind": kind}
+
+    def totals(self, level):
+        """[(name, bytes)] at one of LEVELS, largest first"""
+        sums = {}
+        for path, size, _ in self.files:
+            name = self.parts(path)[level]
+            sums[name] = sums.get(name, 0) + size
+        return sorted(sums.items(), key=lambda item: -item[1])
+
+    def largest(self, count=20):
+        """[(path, bytes)] of the largest files"""
+        return [(path, size) for path, size, _ in sorted(self.files, key=lambda item: -item[1])[:count]]
+
+    def runs(self):
+        """{run: {"bytes", "mtime" (newest file, seconds), "finished", "files": [[path, bytes, mtime_ns]]}}"""
+        runs = {}
+        for item in self.files:
+            run = self.parts(item[0])["run"]
+            if run.startswith("-"):
+                continue
+            entry = runs.setdefault(run, {"bytes": 0, "mtime": 0, "finished": False, "files": []})
+            entry["bytes"] += item[1]
+            entry["mtime"] = max(entry["mtime"], item[2] / 1e9)
+            entry["finished"] = entry["finished"] or os.path.basename(item[0]) == FINAL_FILE
+            entry["files"].append(item)
+        return runs
+
+
+def run_paths(run):
+    return [os.path.join(kind, run) for kind in ARTIFACT_DIRS]
+
+
+def plan_cleanup(usage, keep_runs=0, final_only=False, compress_days=0, quota=0, busy=(), now=None):
+    """
+    What the retention policies would do, without doing it.
+
+    Runs written to in the last MIN_AGE seconds, and those in busy, are left
+    alone. A design's base run is never removed, only trimmed.
+
+    Parameters:
+        usage (DiskUsage): Current usage.
+        keep_runs (int): Variants kept per design besides base, newest
+            first; 0 keeps all.
+        final_only (bool): Of a finished run keep only 6_final.gds of its
+            results and objects (logs and reports stay).
+        compress_days (int): gzip logs not written for this many days; 0 = never.
+        quota (int): Bytes the outputs may take; over it the oldest variants
+            are removed and then the oldest finished base runs trimmed.
+            0 = no quota.
+        busy (iterable): Runs ("<platform>/<nickname>/<variant>") being built.
+
+    Returns:
+        list: Actions in the order to apply them, each {"action": "remove"
+        (the run's directories), "trim" or "compress", "run", "paths"
+        (relative to the flow directory), "bytes" freed (estimated for
+        compress) and "reason"}.
+    """
+    now = now or time.time()
+    runs = usage.runs()
+    busy = set(busy)
+    idle = {run: entry for run, entry in runs.items() if run not in busy and now - entry["mtime"] >= MIN_AGE}
+    actions = []
+    removed = set()
+
+    def remove(run, reason):
+        removed.add(run)
+        actions.append({"action": "remove", "run": run, "paths": run_paths(run), "bytes": runs[run]["bytes"],
+                        "reason": reason})
+
+    trimmed = set()
+
+    def trim(run, reason):
+        files = [(path, size) for path, size, _ in runs[run]["files"]
+                 if path.split(os.sep)[0] in ("objects", "results") and os.path.basename(path) != FINAL_FILE]
+        if files:
+            trimmed.add(run)
+            actions.append({"action": "trim", "run": run, "paths": [path for path, _ in files],
+                            "bytes": sum(size for _, size in files), "reason": reason})
+
+    if keep_runs:
+        designs = {}
+        for run, entry in runs.items():
+            design, _, variant = run.rpartition("/")
+            if variant != "base":
+                designs.setdefault(design, []).append(run)
+        for design, variants in designs.items():
+            variants.sort(key=lambda run: -runs[run]["mtime"])
+            for run in variants[keep_runs:]:
+                if run in idle:
+                    remove(run, f"older than the {keep_runs} newest variants of {design}")
+
+    if final_only:
+        for run in sorted(idle):
+            if run not in removed and runs[run]["finished"]:
+                trim(run, "finished, only the final GDS is kept")
+
+    if compress_days:
+        cutoff = (now - compress_days * 86400) * 1e9
+        for run in sorted(idle):
+            if run in removed:
+                continue
+            logs = [(path, size) for path, size, mtime in runs[run]["files"]
+                    if path.startswith("logs" + os.sep) and path.endswith(".log") and mtime < cutoff]
+            if logs:
+                actions.append({"action": "compress", "run": run, "paths": [path for path, _ in logs],
+                                "bytes": int(sum(size for _, size in logs) * (1 - LOG_RATIO)),
+                                "reason": f"logs not written for {compress_days} days"})
+
+    if quota:
+        left = usage.total - sum(action["bytes"] for action in actions)
+        oldest = sorted(idle, key=lambda run: runs[run]["mtime"])
+        for run in oldest:
+            if left <= quota:
+                break
+            if run not in removed and not run.endswith("/base"):
+                left += sum(action["bytes"] for action in actions if action["run"] == run)  # superseded
+                actions = [action for action in actions if action["run"] != run]
+                remove(run, "oldest variant, over the quota")
+                left -= runs[run]["bytes"]
+        for run in oldest:
+            if left <= quota:
+                break
+            if run.endswith("/base") and runs[run]["finished"] and run not in trimmed:
+                trim(run, "oldest finished run, over the quota")
+                if run in trimmed:
+                    left -= actions[-1]["bytes"]
+    return actions
+
+
+def apply_cleanup(flow_dir, actions):
+    """
+    Carry the actions of plan_cleanup() out. A run written to since the
+    preview (the index may not have seen it) is skipped.
+
+    Returns:
+        tuple: (bytes freed, [error messages])
+    """
+    freed = 0
+    errors = []
+    for action in actions:
+        if written_since(flow_dir, action["run"], time.time() - MIN_AGE):
+            errors.append(f"{action['run']}: written to recently, left alone")
+            continue
+        for path in action["paths"]:
+            full = os.path.join(flow_dir, path)
+            try:
+                if action["action"] == "compress":
+                    freed += compress(full)
+                elif os.path.isdir(full) and not os.path.islink(full):
+                    freed += sum(os.lstat(os.path.join(root, name)).st_blocks * 512
+                                 for root, _, names in os.walk(full) for name in names)
+                    shutil.rmtree(full)
+                elif os.path.lexists(full):
+                    freed += os.lstat(full).st_blocks * 512
+                    os.remove(full)
+            except OSError as e:
+                errors.append(f"{path}: {e}")
+    return freed, errors
+
+
+def written_since(flow_dir, run, since):
+    """Whether any file of a run changed after 'since' (checked on disk, not in the index)"""
+    for path in run_paths(run):
+        for root, _, names in os.walk(os.path.join(flow_dir, path)):
+            for name in names:
+                try:
+                    if os.lstat(os.path.join(root, name)).st_mtime > since:
+                        return True
+                except OSError:
+                    continue
+    return False
+
+
+def compress(path):
+    """gzip a file next to itself (keeping its mtime) and remove it. Returns the bytes freed."""
+    st = os.stat(path)
+    target = path + ".gz"
+    tmp = target + ".tmp"
+    with open(path, "rb") as source, gzip.open(tmp, "wb", compresslevel=6) as sink:
+        shutil.copyfileobj(source, sink, 1 << 20)
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, target)
+    os.remove(path)
+    return st.st_blocks * 512 - os.stat(target).st_blocks * 512
@@ -0,0 +1,243 @@
+import glob
+import itertools
+import json
+import os
+
+from catalog import CLOCK_PERIOD_RE
+from history import parse_stage_log
+from manifest import STAGES
+
+# Result metrics: the key suffix in the ORFS metrics JSON files and whether higher is better
+METRICS = {
+    "wns": ("__timing__setup__ws", True),
+    "tns": ("__timing__setup__tns", True),
+    "area": ("__design__instance__area", False),
+    "power": ("__power__total", False),
+    "runtime": (None, False),  # summed from the stage logs
+    "clock_period": (None, False),  # the swept CLOCK_PERIOD: a faster clock is worth some slack
+}
+# Prefixes of the metric keys in flow order; a later stage's value replaces an earlier one
+METRIC_STAGES = ["synth", "floorplan", "globalplace", "placeopt", "detailedplace", "cts",
+                 "globalroute", "grt", "detailedroute", "finish"]
+# Differences below these are never "clear", however small the values are
+METRIC_FLOORS = {"wns": 0.01, "tns": 0.1, "area": 1.0, "power": 1e-6, "runtime": 1.0, "clock_period": 0.001}
+
+SWEEP_VARIABLES = ("CORE_UTILIZATION", "PLACE_DENSITY_LB_ADDON", "CLOCK_PERIOD")
+
+
+def parse_values(text):
+    """
+    Values of one swept variable: "30:60:10" (start:stop:step, stop included),
+    "0.1, 0.2, 0.3" or a single value.
+
+    Raises:
+        ValueError: for a malformed range.
+    """
+    text = text.strip()
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        if step <= 0 or stop < start:
+            raise ValueError(f"bad range {text}")
+        decimals = max(len(part.partition(".")[2]) for part in text.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return [f"{start + i * step:.{decimals}f}" for i in range(count)]
+    return [value.strip() for value in text.split(",") if value.strip()]
+
+
+def read_metrics(logs_dir):
+    """{metric: value} from the metrics JSON files ORFS writes next to the stage logs"""
+    merged = {}
+    for path in sorted(glob.glob(os.path.join(logs_dir, "*.json"))):
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            merged.update(data)
+
+    metrics = {}
+    ranks = {}
+    for key, value in merged.items():
+        if not isinstance(value, (int, float)):
+            continue
+        stage = key.split("__", 1)[0]
+        rank = METRIC_STAGES.index(stage) if stage in METRIC_STAGES else -1
+        for metric, (suffix, _) in METRICS.items():
+            if suffix and key.endswith(suffix) and rank >= ranks.get(metric, -2):
+                metrics[metric] = value
+                ranks[metric] = rank
+
+    runtime = 0.0
+    for path in glob.glob(os.path.join(logs_dir, "*.log")):
+        stats = parse_stage_log(path)
+        if stats:
+            runtime += stats[0]
+    if runtime:
+        metrics["runtime"] = runtime
+    return metrics
+
+
+def write_sdc(source, target, period):
+    """Copy of a constraint file with its clock period replaced"""
+    with open(source, "r") as file:
+        text = file.read()
+    match = CLOCK_PERIOD_RE.search(text)
+    if not match:
+        raise ValueError(f"no clock period found in {source}")
+    group = 1 if match.group(1) is not None else 2
+    text = text[:match.start(group)] + str(period) + text[match.end(group):]
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "w") as file:
+        file.write(text)
+
+
+def clearly_better(metric, a, b, margin):
+    """a beats b on metric by more than margin (relative, with METRIC_FLOORS as the smallest scale)"""
+    higher = METRICS[metric][1]
+    difference = (a - b) if higher else (b - a)
+    return difference > margin * max(abs(a), abs(b), METRIC_FLOORS[metric])
+
+
+def dominates(a, b, metrics, margin=0.0):
+    """
+    Metrics a is at least as good as b on every metric both have, and clearly
+    better than b on at least one.
+    """
+    shared = [metric for metric in metrics if metric in a and metric in b]
+    if not shared:
+        return False
+    for metric in shared:
+        if clearly_better(metric, b[metric], a[metric], 0.0):
+            return False
+    return any(clearly_better(metric, a[metric], b[metric], margin) for metric in shared)
+
+
+class SweepRun:
+    """
+    A parameter sweep over one design: every combination of the swept values
+    is a variant built in its own FLOW_VARIANT directory, stage by stage.
+
+    The state (variants, their status, last completed stage and metrics) is
+    kept in a JSON file so a sweep can be looked at after a restart. After a
+    variant completes the checkpoint stage (or any later one) it is compared
+    with every other variant at the same point: one that another variant
+    clearly dominates (no worse on any metric known there, better by more
+    than margin on one) is pruned and not built any further.
+
+    Parameters:
+        path (str): JSON file of the sweep.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.platform = None
+        self.design = None
+        self.nickname = None
+        self.parameters = {}  # {variable: [values]}
+        self.checkpoint = STAGES[1]
+        self.margin = 0.05
+        self.target = STAGES[-1]
+        self.variants = []    # [{"name", "values", "status", "stage", "metrics", "snapshots", "pruned_by"}]
+
+    @classmethod
+    def create(cls, path, platform, design, nickname, parameters, checkpoint, margin, target=STAGES[-1]):
+        run = cls(path)
+        run.platform, run.design, run.nickname = platform, design, nickname
+        run.parameters = parameters
+        run.checkpoint, run.margin, run.target = checkpoint, margin, target
+        names = list(parameters)
+        for number, combination in enumerate(itertools.product(*(parameters[name] for name in names)), 1):
+            run.variants.append({"name": f"{run.name}_{number:03d}", "values": dict(zip(names, combination)),
+                                 "status": "pending", "stage": None, "metrics": {}, "snapshots": {},
+                                 "pruned_by": None})
+        return run
+
+    def load(self):
+        with open(self.path, "r") as file:
+            data = json.load(file)
+        for key in ("platform", "design", "nickname", "parameters", "checkpoint", "margin", "target", "variants"):
+            setattr(self, key, data[key])
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({key: getattr(self, key) for key in ("platform", "design", "nickname", "parameters",
+                                                            "checkpoint", "margin", "target", "variants")}, file, indent=1)
+        os.replace(tmp, self.path)
+
+    def variant(self, name):
+        return next(variant for variant in self.variants if variant["name"] == name)
+
+    def logs_dir(self, flow_dir, variant):
+        return os.path.join(flow_dir, "logs", self.platform, self.nickname, variant["name"])
+
+    def make_variables(self, flow_dir, variant):
+        """Command line variables of a variant's make runs (they override config.mk)"""
+        variables = {"FLOW_VARIANT": variant["name"]}
+        for name, value in variant["values"].items():
+            if name == "CLOCK_PERIOD":
+                # the period lives in constraint.sdc, so each variant gets its own copy
+                sdc = os.path.join(os.path.dirname(self.path), self.name, variant["name"] + ".sdc")
+                write_sdc(os.path.join(flow_dir, "designs", self.platform, self.design, "constraint.sdc"), sdc, value)
+                variables["SDC_FILE"] = sdc
+            else:
+                variables[name] = value
+        return variables
+
+    def next_stage(self, variant):
+        """Stage to build next, or None when the variant is finished, failed or pruned"""
+        if variant["status"] in ("failed", "pruned", "cancelled", "done"):
+            return None
+        if variant["stage"] is None:
+            return STAGES[0]
+        index = STAGES.index(variant["stage"])
+        return STAGES[index + 1] if variant["stage"] != self.target else None
+
+    def stage_finished(self, name, stage, ok, metrics):
+        """
+        Record a finished stage of a variant.
+
+        Returns:
+            list: Names of variants pruned because of this result (possibly
+            including this one), whose running builds should be stopped.
+        """
+        variant = self.variant(name)
+        if variant["status"] in ("pruned", "cancelled"):
+            return []
+        if not ok:
+            variant["status"] = "failed"
+            return []
+        if "CLOCK_PERIOD" in variant["values"]:
+            metrics = dict(metrics, clock_period=float(variant["values"]["CLOCK_PERIOD"]))
+        variant["stage"] = stage
+        variant["metrics"] = metrics
+        variant["snapshots"][stage] = metrics
+        variant["status"] = "done" if stage == self.target else "running"
+        if STAGES.index(stage) < STAGES.index(self.checkpoint) or stage == self.target:
+            return []
+
+        pruned = []
+        objectives = [metric for metric in METRICS if metric != "runtime"]  # runtime so far says little
+        for other in self.variants:
+            if other is variant or stage not in other["snapshots"]:
+                continue
+            ours, theirs = metrics, other["snapshots"][stage]
+            if other["status"] not in ("failed", "cancelled") and dominates(theirs, ours, objectives, self.margin):
+                variant["status"], variant["pruned_by"] = "pruned", other["name"]
+                pruned.append(name)
+                break
+            if other["status"] in ("pending", "running") and dominates(ours, theirs, objectives, self.margin):
+                other["status"], other["pruned_by"] = "pruned", name
+                pruned.append(other["name"])
+        return pruned
+
+    def pareto(self, metrics=None):
+        """Names of the finished variants no other finished variant dominates"""
+        metrics = metrics or list(METRICS)
+        done = [variant for variant in self.variants if variant["status"] == "done"]
+        return [variant["name"] for variant in done
+                if not any(dominates(other["metrics"], variant["metrics"], metrics) for other in done if other is not variant)]
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_TTL = 24 * 60 * 60  # seconds between real requests
+
+
+def cache_dir():
+    """Per-user cache directory of the app (XDG_CACHE_HOME or ~/.cache)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "OpenROAD_HelperGUI")
+
+
+class UpdateCheck:
+    """
+    Looks up the latest release tag of a GitHub repository.
+
+    The answer is cached on disk together with the response ETag. Within the TTL
+    no request is made at all; after it, a conditional request (If-None-Match)
+    is sent, so an unchanged release costs a 304 with no body. Failed requests
+    are remembered too, so hosts without network access only pay the timeout
+    once per TTL instead of on every launch.
+
+    Parameters:
+        repo (str): GitHub repository in "owner/repo" format.
+        base_url (str): API root, e.g. a local stub server for testing.
+        cache_path (str): JSON file holding the cached answer.
+        ttl (int): Seconds a cached answer is trusted without asking again.
+        timeout (float): Request timeout in seconds.
+    """
+
+    def __init__(self, repo, base_url=DEFAULT_API_URL, cache_path=None, ttl=DEFAULT_TTL, timeout=5):
+        self.repo = repo
+        self.url = f"{base_url.rstrip('/')}/repos/{repo}/releases/latest"
+        self.cache_path = cache_path or os.path.join(cache_dir(), "latest_release.json")
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # A cache written for another URL (e.g. a stub server) does not count
+        return entry if entry.get("url") == self.url else None
+
+    def save_cache(self, entry):
+        entry["url"] = self.url
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump(entry, file)
+        os.replace(tmp, self.cache_path)
+
+    def latest(self):
+        """
+        Returns:
+            str: The latest version tag name (possibly from the cache).
+
+        Raises:
+            ConnectionError: if the lookup failed and there is no cached answer
+            to fall back to.
+        """
+        entry = self.load_cache() or {}
+        now = time.time()
+        if entry and now - entry.get("checked", 0) < self.ttl:
+            if entry.get("tag_name"):
+                return entry["tag_name"]
+            raise ConnectionError(entry.get("error") or "update check failed recently")
+
+        import requests  # only needed when the cache is stale
+
+        headers = {"Accept": "application/vnd.github+json"}
+        if entry.get("etag") and entry.get("tag_name"):
+            headers["If-None-Match"] = entry["etag"]
+
+        try:
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                entry["checked"] = now
+                self.save_cache(entry)
+                return entry["tag_name"]
+            response.raise_for_status()
+            tag = response.json()["tag_name"]
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            # Back off for a full TTL, keeping the last known tag if we have one
+            entry["checked"] = now
+            entry["error"] = str(e)
+            self.save_cache(entry)
+            if entry.get("tag_name"):
+                return entry["tag_name"]
+            raise ConnectionError(str(e)) from e
+
+        self.save_cache({"checked": now, "etag": response.headers.get("ETag"), "tag_name": tag})
+        return tag
@@ -0,0 +1,290 @@
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+VERILOG_EXTENSIONS = (".v", ".sv")
+
+# Design units and the keyword that closes each of them
+UNIT_RE = re.compile(r"(?<![\w$`])(?:(module|macromodule|interface|package|program)|(endmodule|endinterface|endpackage|endprogram))(?![\w$])")
+NAME_RE = re.compile(r"\s+(?:(?:automatic|static)\s+)?([A-Za-z_][\w$]*)")
+# Identifiers in a position where they can name another unit: "name inst (", "name #(", "pkg::", "intf.modport"
+REFERENCE_RE = re.compile(r"(?<![\w$.`'])([A-Za-z_][\w$]*)(?=\s*#|\s+\\?[A-Za-z_]|\s*::|\.[A-Za-z_])")
+INCLUDE_RE = re.compile(r'^[ \t]*`include\s+"([^"]+)"[^\n]*', re.MULTILINE)
+# Comments and strings, blanked before scanning so offsets stay valid
+NOISE_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"', re.DOTALL)
+
+KEYWORDS = {"input", "output", "inout", "wire", "reg", "logic", "bit", "assign", "always", "always_ff",
+            "always_comb", "always_latch", "initial", "begin", "end", "if", "else", "case", "casez", "casex",
+            "for", "generate", "genvar", "parameter", "localparam", "integer", "signed", "unsigned", "function",
+            "task", "return", "typedef", "struct", "enum", "union", "packed", "import", "export", "modport",
+            "virtual", "posedge", "negedge", "or", "and", "not", "default", "int", "byte", "automatic", "const",
+            "var", "string", "real", "time", "supply0", "supply1", "tri", "wand", "wor", "unique", "priority",
+            "module", "macromodule", "interface", "package", "program", "extern"}
+
+PARALLEL_MIN = 32     # files to scan before worker processes are worth starting
+MAX_INCLUDE_DEPTH = 16
+
+
+def blank(match):
+    text = match.group(0)
+    if text.startswith('"'):
+        return '"' + " " * (len(text) - 2) + '"'
+    return re.sub(r"[^\n]", " ", text)
+
+
+def references(text):
+    return sorted({name for name in REFERENCE_RE.findall(text) if name not in KEYWORDS})
+
+
+def scan_file(path):
+    """
+    Design units of one source file.
+
+    Returns:
+        dict: units [[kind, name, start, end, references]] with character
+        offsets into the file and refs made outside any unit (e.g. a file
+        level "import pkg::*;").
+    """
+    with open(path, "r", errors="replace") as file:
+        raw = file.read()
+    text = NOISE_RE.sub(blank, raw)
+
+    units = []
+    outside = []
+    depth = 0
+    last = 0
+    current = None
+    for match in UNIT_RE.finditer(text):
+        if match.group(1):
+            before = text[max(0, match.start() - 16):match.start()].split()
+            if before and before[-1] in ("extern", "virtual"):
+                continue
+            if depth == 0:
+                name = NAME_RE.match(text, match.end())
+                if not name:
+                    continue
+                current = [match.group(1), name.group(1), match.start()]
+                outside.append(text[last:match.start()])
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                kind, name, start = current
+                units.append([kind, name, start, match.end(), references(text[start:match.end()])])
+                last = match.end()
+    outside.append(text[last:])
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "units": units,
+            "refs": references("".join(outside))}
+
+
+class BundleResult:
+    def __init__(self, path):
+        self.path = path
+        self.scanned = 0    # files parsed this time
+        self.cached = 0     # files taken from the index cache
+        self.units = 0      # design units found
+        self.kept = 0       # units reachable from the top
+        self.files = 0      # files contributing to the bundle
+        self.top_found = False
+        self.duplicates = []
+        self.unresolved = []
+
+    def __str__(self):
+        return (f"{self.kept}/{self.units} modules from {self.files} files "
+                f"({self.scanned} scanned, {self.cached} cached)")
+
+
+class VerilogBundler:
+    """
+    Writes the sources one top module needs into a single Verilog file.
+
+    Every .v/.sv file is scanned once for the units it declares (module,
+    interface, package, program) and the names each of them references; the
+    resulting module -> file index is cached on disk and a file is only
+    re-scanned when its size or mtime changes. Scanning runs in worker
+    processes when there are many files to parse.
+
+    Starting at the top, only units that are reachable are written, file by
+    file with dependencies first, so packages precede their users. Anything
+    outside the units (`timescale, `define, `ifdef guards) is kept, unreachable
+    units are cut out; files without a reachable unit (a defines.v listed for
+    compile order) come first, in source order, with just that text and `include "..." lines are replaced by the header they
+    name, searched next to the including file and then in every source
+    directory. The output is streamed to a temporary file and renamed over
+    the previous bundle.
+
+    Parameters:
+        root (str): Design source folder.
+        files (list): Paths relative to root to consider (headers included).
+        cache_path (str): JSON file holding the module index.
+    """
+
+    def __init__(self, root, files, cache_path):
+        self.root = os.path.abspath(root)
+        self.files = [rel for rel in files if rel.endswith(VERILOG_EXTENSIONS)]
+        self.include_dirs = sorted({os.path.dirname(os.path.join(self.root, rel)) for rel in files} | {self.root})
+        self.cache_path = cache_path
+        self.resolved = {}
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as file:
+                cache = json.load(file)
+            if cache.get("root") == self.root:
+                return cache["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save_cache(self, entries):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({"root": self.root, "files": entries}, file)
+        os.replace(tmp, self.cache_path)
+
+    def scan(self, result):
+        """{rel: scan_file() entry} for all files, reusing cached entries"""
+        cached = self.load_cache()
+        entries = {}
+        todo = []
+        for rel in self.files:
+            st = os.stat(os.path.join(self.root, rel))
+            entry = cached.get(rel)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                entries[rel] = entry
+            else:
+                todo.append(rel)
+        result.cached = len(entries)
+        result.scanned = len(todo)
+
+        paths = [os.path.join(self.root, rel) for rel in todo]
+        scanned = None
+        if len(todo) >= PARALLEL_MIN:
+            workers = min(os.cpu_count() or 1, 16)
+            try:
+                # forkserver: forking the (threaded) GUI process itself is not safe
+                context = multiprocessing.get_context("forkserver")
+                with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                    scanned = list(pool.map(scan_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+            except (OSError, BrokenProcessPool):
+                scanned = None  # no worker processes here; scan in this thread instead
+        if scanned is None:
+            scanned = [scan_file(path) for path in paths]
+        entries.update(zip(todo, scanned))
+
+        if todo or set(cached) != set(entries):
+            self.save_cache(entries)
+        return entries
+
+    def index(self, entries, result):
+        """{unit name: rel path}; the first file in path order wins a duplicate"""
+        index = {}
+        for rel in sorted(entries):
+            for kind, name, start, end, refs in entries[rel]["units"]:
+                result.units += 1
+                if name in index and index[name] != rel:
+                    result.duplicates.append((name, index[name], rel))
+                else:
+                    index[name] = rel
+        return index
+
+    def reachable(self, top, entries, index):
+        """(unit names reachable from top, files in dependency-first order)"""
+        refs = {}
+        for rel, entry in entries.items():
+            for kind, name, start, end, unit_refs in entry["units"]:
+                if index.get(name) == rel:
+                    refs.setdefault(name, set()).update(unit_refs)
+        deps = lambda name: [ref for ref in sorted(refs.get(name, ()) | set(entries[index[name]]["refs"]))
+                             if ref in index and ref != name]
+
+        seen = {top}
+        order = []
+        placed = set()
+        stack = [(top, iter(deps(top)))]
+        while stack:
+            name, pending = stack[-1]
+            for dep in pending:
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append((dep, iter(deps(dep))))
+                    break
+            else:
+                stack.pop()
+                rel = index[name]
+                if rel not in placed:
+                    placed.add(rel)
+                    order.append(rel)
+        return seen, order
+
+    def resolve_include(self, name, base_dir):
+        key = (name, base_dir)
+        if key not in self.resolved:
+            found = None
+            for directory in [base_dir] + self.include_dirs:
+                candidate = os.path.join(directory, name)
+                if os.path.isfile(candidate):
+                    found = candidate
+                    break
+            self.resolved[key] = found
+        return self.resolved[key]
+
+    def inline_includes(self, text, base_dir, result, depth=0):
+        def replace(match):
+            path = self.resolve_include(match.group(1), base_dir)
+            if path is None or depth >= MAX_INCLUDE_DEPTH:
+                result.unresolved.append(match.group(1))
+                return match.group(0)
+            with open(path, "r", errors="replace") as file:
+                header = file.read()
+            header = self.inline_includes(header, os.path.dirname(path), result, depth + 1)
+            return f"// --- `include \"{match.group(1)}\" ---\n{header}\n"
+        return INCLUDE_RE.sub(replace, text)
+
+    def write(self, output, top=None):
+        """
+        Bundle the units reachable from top (everything if top is not found).
+
+        Returns:
+            BundleResult
+        """
+        result = BundleResult(output)
+        entries = self.scan(result)
+        index = self.index(entries, result)
+
+        if top in index:
+            result.top_found = True
+            keep, order = self.reachable(top, entries, index)
+            placed = set(order)
+            order = [rel for rel in self.files if rel not in placed] + order
+        else:
+            keep, order = set(index), sorted(entries)
+
+        tmp = output + ".tmp"
+        with open(tmp, "w") as outfile:
+            for rel in order:
+                path = os.path.join(self.root, rel)
+                with open(path, "r", errors="replace") as infile:
+                    text = infile.read()
+                drop = [(start, end) for kind, name, start, end, refs in entries[rel]["units"]
+                        if name not in keep or index.get(name) != rel]
+                result.kept += len(entries[rel]["units"]) - len(drop)
+                pieces = []
+                last = 0
+                for start, end in drop:
+                    pieces.append(text[last:start])
+                    last = end
+                pieces.append(text[last:])
+                if len(drop) == len(entries[rel]["units"]) and not "".join(pieces).strip():
+                    continue  # nothing of it is needed
+                outfile.write(f"// --- Start of {rel} ---\n")
+                outfile.write(self.inline_includes("".join(pieces), os.path.dirname(path), result))
+                outfile.write("\n")
+                result.files += 1
+        os.replace(tmp, output)
+        return result